@@ -0,0 +1,234 @@
+"""
+Ingestion and query benchmark for the health data API.
+
+Generates synthetic Health Auto Export payloads (metrics x days x samples per day), posts them to the
+Flask app through its test client and then exercises the read endpoints. Reports rows/sec, latency
+percentiles per endpoint and peak RSS, optionally as JSON for comparing runs.
+
+The database is a throwaway SQLite file unless --database-url points at a Postgres stand-in.
+Use an empty database so every run ingests the same rows.
+
+Usage:
+    python benchmark.py --metrics 10 --days 7 --samples-per-day 1440 --output bench.json
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Metric names as exported by Health Auto Export; more metrics than listed get generic names
+METRIC_NAMES = [
+    ('heart_rate', 'count/min'),
+    ('step_count', 'count'),
+    ('active_energy', 'kJ'),
+    ('resting_heart_rate', 'count/min'),
+    ('heart_rate_variability', 'ms'),
+    ('walking_running_distance', 'km'),
+    ('respiratory_rate', 'count/min'),
+    ('blood_oxygen_saturation', '%'),
+]
+
+def generate_payloads(metrics, days, samples_per_day, days_per_request, seed):
+    """
+    Yield synthetic Health Auto Export payloads, one per days_per_request days.
+    """
+    rng = random.Random(seed)
+    names = [METRIC_NAMES[i] if i < len(METRIC_NAMES) else (f'metric_{i}', 'count') for i in range(metrics)]
+    start = datetime(2024, 1, 1)
+    interval = timedelta(days=1) / samples_per_day
+
+    for first_day in range(0, days, days_per_request):
+        last_day = min(first_day + days_per_request, days)
+        payload_metrics = []
+        for name, units in names:
+            data = []
+            for day in range(first_day, last_day):
+                day_start = start + timedelta(days=day)
+                for sample in range(samples_per_day):
+                    ts = day_start + sample * interval
+                    data.append({
+                        "date": ts.strftime('%Y-%m-%d %H:%M:%S +0000'),
+                        "qty": round(rng.uniform(40, 160), 2),
+                        "source": "Benchmark Watch",
+                    })
+            payload_metrics.append({"name": name, "units": units, "data": data})
+        yield {"data": {"metrics": payload_metrics}}, len(payload_metrics) * (last_day - first_day) * samples_per_day
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile of a list of values.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def latency_summary(latencies):
+    """
+    Summarize request latencies in milliseconds.
+    """
+    return {
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies) if latencies else None,
+    }
+
+def timed(call):
+    """
+    Run call and return its result with the elapsed time in milliseconds.
+    """
+    start = time.perf_counter()
+    result = call()
+    return result, (time.perf_counter() - start) * 1000
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process in megabytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_ingest(client, args):
+    """
+    POST every generated payload and measure latency and throughput.
+    """
+    latencies = []
+    rows = inserted = 0
+    job_urls = []
+    headers = {'Content-Type': 'application/json'}
+    if args.gzip:
+        headers['Content-Encoding'] = 'gzip'
+
+    start = time.perf_counter()
+    for payload, payload_rows in generate_payloads(args.metrics, args.days, args.samples_per_day, args.days_per_request, args.seed):
+        body = json.dumps(payload).encode('utf-8')
+        if args.gzip:
+            body = gzip.compress(body)
+        response, elapsed = timed(lambda: client.post(
+            f'/health-data?mode={args.mode}&batch_size={args.batch_size}', data=body, headers=headers
+        ))
+        if response.status_code not in (201, 202):
+            raise RuntimeError(f"POST failed with {response.status_code}: {response.get_data(as_text=True)}")
+        latencies.append(elapsed)
+        rows += payload_rows
+        if response.status_code == 202:
+            job_urls.append(response.headers['Location'])
+        else:
+            inserted += response.get_json()["inserted"]
+
+    # In async mode throughput counts until the workers have drained the queue
+    for url in job_urls:
+        while True:
+            job = client.get(url).get_json()
+            if job["status"] in ('done', 'failed'):
+                inserted += job["inserted"] or 0
+                break
+            time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mode": args.mode,
+        "rows": rows,
+        "inserted": inserted,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed else None,
+        "post": latency_summary(latencies),
+    }
+
+def run_queries(client, args):
+    """
+    Walk the table with keyset pages, stream it as NDJSON and read the rollups.
+    """
+    page_latencies = []
+    rows = 0
+    cursor = None
+    start = time.perf_counter()
+    while True:
+        url = f'/health-data?limit={args.page_size}' + (f'&cursor={cursor}' if cursor else '')
+        response, elapsed = timed(lambda: client.get(url))
+        page_latencies.append(elapsed)
+        rows += len(response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    page_seconds = time.perf_counter() - start
+
+    stream_latencies = []
+    stream_rows = 0
+    for _ in range(args.stream_requests):
+        response, elapsed = timed(lambda: client.get('/health-data?format=ndjson&name=heart_rate').get_data())
+        stream_latencies.append(elapsed)
+        stream_rows = response.count(b'\n')
+
+    summary_latencies = []
+    for _ in range(args.summary_requests):
+        _, elapsed = timed(lambda: client.get('/health-data/summary?period=day').get_data())
+        summary_latencies.append(elapsed)
+
+    return {
+        "pages": {
+            "rows": rows,
+            "rows_per_sec": rows / page_seconds if page_seconds else None,
+            **latency_summary(page_latencies),
+        },
+        "ndjson_stream": {"rows": stream_rows, **latency_summary(stream_latencies)},
+        "summary": latency_summary(summary_latencies),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion and queries of the health data API.")
+    parser.add_argument('--metrics', type=int, default=5, help="Number of metrics per payload.")
+    parser.add_argument('--days', type=int, default=7, help="Number of days of data.")
+    parser.add_argument('--samples-per-day', type=int, default=288, help="Samples per metric per day.")
+    parser.add_argument('--days-per-request', type=int, default=1, help="Days of data in each POST.")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Rows per INSERT statement.")
+    parser.add_argument('--mode', choices=['sync', 'async'], default='sync', help="Ingest mode for POST requests.")
+    parser.add_argument('--gzip', action='store_true', help="Send gzip encoded bodies.")
+    parser.add_argument('--page-size', type=int, default=1000, help="Rows per page when walking GET /health-data.")
+    parser.add_argument('--stream-requests', type=int, default=5, help="NDJSON stream requests to time.")
+    parser.add_argument('--summary-requests', type=int, default=20, help="Summary requests to time.")
+    parser.add_argument('--database-url', help="Database to benchmark against (defaults to a temporary SQLite file).")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the synthetic payloads.")
+    parser.add_argument('--output', help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    # The API reads its configuration from the environment at import time
+    temp_dir = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        temp_dir = tempfile.TemporaryDirectory()
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(temp_dir.name, 'benchmark.db')}"
+    from health_data_api import app
+
+    client = app.test_client()
+    report = {
+        "parameters": {key: value for key, value in vars(args).items() if key not in ('output', 'database_url')},
+        "database": app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+        "ingest": run_ingest(client, args),
+        "query": run_queries(client, args),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+    output = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,20 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context, url_for
 import json
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, inspect, select, text, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import hashlib
+import io
 import os
+import threading
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+
+
+from health_payload import READ_CHUNK_SIZE, DecodedStream, PayloadTooLargeError, iter_payload_records
 
 from dotenv import load_dotenv
 dotenv_path = '.env'
@@ -14,101 +27,1086 @@ app = Flask(__name__)
 # # Configure the Postgres database connection
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL').replace('postgres://', 'postgresql://')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Number of rows written per multi-row INSERT statement
+app.config['INGEST_BATCH_SIZE'] = int(os.getenv('INGEST_BATCH_SIZE', 1000))
+# Largest accepted POST body in bytes, measured after gzip/deflate decompression
+app.config['INGEST_MAX_BODY_BYTES'] = int(os.getenv('INGEST_MAX_BODY_BYTES', 256 * 1024 * 1024))
+# Page size defaults and limits for GET requests, and rows fetched per server-side cursor round trip when streaming
+app.config['QUERY_PAGE_SIZE'] = int(os.getenv('QUERY_PAGE_SIZE', 1000))
+app.config['QUERY_MAX_PAGE_SIZE'] = int(os.getenv('QUERY_MAX_PAGE_SIZE', 10000))
+app.config['QUERY_STREAM_CHUNK_SIZE'] = int(os.getenv('QUERY_STREAM_CHUNK_SIZE', 1000))
+# Rows per Arrow record batch / Parquet row group in columnar exports
+app.config['EXPORT_BATCH_SIZE'] = int(os.getenv('EXPORT_BATCH_SIZE', 65536))
+# Bounds of the in-process cache of serialized GET responses
+app.config['RESPONSE_CACHE_ENTRIES'] = int(os.getenv('RESPONSE_CACHE_ENTRIES', 256))
+app.config['RESPONSE_CACHE_MAX_BYTES'] = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# Default ingest mode for POST requests ('sync' or 'async'); clients can override it per request
+app.config['INGEST_MODE'] = os.getenv('INGEST_MODE', 'sync')
+# Background ingest workers per process, queued jobs coalesced into one transaction, and queue polling
+app.config['INGEST_WORKERS'] = int(os.getenv('INGEST_WORKERS', 2))
+app.config['INGEST_COALESCE_JOBS'] = int(os.getenv('INGEST_COALESCE_JOBS', 20))
+app.config['INGEST_POLL_INTERVAL'] = float(os.getenv('INGEST_POLL_INTERVAL', 1.0))
+# Seconds without a heartbeat after which a running job is assumed abandoned by a crashed worker and
+# reclaimed; workers renew the heartbeat of their jobs every INGEST_HEARTBEAT_INTERVAL seconds
+app.config['INGEST_JOB_TIMEOUT'] = int(os.getenv('INGEST_JOB_TIMEOUT', 600))
+app.config['INGEST_HEARTBEAT_INTERVAL'] = float(os.getenv('INGEST_HEARTBEAT_INTERVAL', 60))
 
 # # Initializes the SQLAlchemy extension with the Flask app.
 db = SQLAlchemy(app)
 
-# Defining the database model for health data
-class HealthData(db.Model):
+# Dictionary of metric names and their units, referenced by health samples
+class HealthMetric(db.Model):
+    __tablename__ = 'health_metric'
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(50), nullable=False)
-    date = db.Column(db.String(50), nullable=False)
-    qty = db.Column(db.Float, nullable=False)
-    source = db.Column(db.String(255))
+    name = db.Column(db.String(50), nullable=False, unique=True)
     units = db.Column(db.String(50))
 
+# Dictionary of data sources (devices/apps), referenced by health samples.
+# Samples without a source reference the empty-name row, since NULLs never conflict in a unique index.
+class HealthSource(db.Model):
+    __tablename__ = 'health_source'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False, unique=True)
+
+# Defining the time-series model for health data
+class HealthSample(db.Model):
+    __tablename__ = 'health_sample'
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    metric_id = db.Column(db.Integer, db.ForeignKey('health_metric.id'), nullable=False)
+    source_id = db.Column(db.Integer, db.ForeignKey('health_source.id'), nullable=False)
+    # Sample time normalized to UTC, plus the device's UTC offset in minutes to render local time
+    ts = db.Column(db.DateTime(timezone=True), nullable=False)
+    utc_offset = db.Column(db.SmallInteger, nullable=False, default=0)
+    qty = db.Column(db.Float, nullable=False)
+
+    # One sample per metric, timestamp and source; lets inserts skip duplicates with ON CONFLICT.
+    # Its (metric_id, ts) prefix is the composite index serving per-metric time-range queries.
+    __table_args__ = (
+        db.Index('uq_health_sample_metric_ts_source', 'metric_id', 'ts', 'source_id', unique=True),
+    )
+
+# Per metric aggregates over local calendar days and ISO weeks (bucket is the Monday),
+# maintained incrementally as samples are ingested
+class HealthRollup(db.Model):
+    __tablename__ = 'health_rollup'
+    period = db.Column(db.String(4), primary_key=True)
+    metric_id = db.Column(db.Integer, db.ForeignKey('health_metric.id'), primary_key=True)
+    bucket = db.Column(db.Date, primary_key=True)
+    sample_count = db.Column(db.Integer, nullable=False)
+    min_qty = db.Column(db.Float, nullable=False)
+    max_qty = db.Column(db.Float, nullable=False)
+    sum_qty = db.Column(db.Float, nullable=False)
+
+ROLLUP_PERIODS = ('day', 'week')
+
+# Durable queue of raw POST payloads waiting to be ingested by the background workers
+class IngestJob(db.Model):
+    __tablename__ = 'ingest_job'
+    id = db.Column(db.String(36), primary_key=True)
+    status = db.Column(db.String(10), nullable=False, default='queued')
+    # Raw (possibly compressed) request body; cleared once the job is done to keep the queue small
+    payload = db.Column(db.LargeBinary)
+    content_encoding = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    started_at = db.Column(db.DateTime(timezone=True))
+    # Token of the current claim and the last heartbeat of the worker holding it
+    claim_token = db.Column(db.String(36))
+    heartbeat_at = db.Column(db.DateTime(timezone=True))
+    finished_at = db.Column(db.DateTime(timezone=True))
+    records = db.Column(db.Integer)
+    inserted = db.Column(db.Integer)
+    skipped = db.Column(db.Integer)
+    error = db.Column(db.Text)
+
+    __table_args__ = (
+        db.Index('ix_ingest_job_status_created_at', 'status', 'created_at'),
+    )
+
+# Single-row counter advanced by every ingestion transaction that writes samples;
+# GET responses derive their ETag, Last-Modified and cache validity from it
+class IngestWatermark(db.Model):
+    __tablename__ = 'ingest_watermark'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+    updated_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+# Read-only views over the normalized tables. health_data keeps the columns of the original
+# health_data table so existing readers such as the health agent's PGSearchTool keep working.
+HEALTH_VIEWS = {
+    'health_data': """
+CREATE VIEW health_data AS
+SELECT s.id, m.name, s.ts AS date, s.qty, NULLIF(src.name, '') AS source, m.units
+FROM health_sample s
+JOIN health_metric m ON m.id = s.metric_id
+JOIN health_source src ON src.id = s.source_id
+""",
+    'health_data_summary': """
+CREATE VIEW health_data_summary AS
+SELECT r.period, m.name, m.units, r.bucket, r.sample_count, r.min_qty, r.max_qty,
+       r.sum_qty / r.sample_count AS mean_qty, r.sum_qty
+FROM health_rollup r
+JOIN health_metric m ON m.id = r.metric_id
+""",
+}
+
+def create_health_view(name):
+    """
+    Create one of the read-only views over the normalized tables.
+    """
+    with db.engine.begin() as connection:
+        connection.execute(text(HEALTH_VIEWS[name]))
+
+# Dialect specific INSERT constructs supporting ON CONFLICT DO NOTHING
+dialect_inserts = {
+    'postgresql': postgresql_insert,
+    'sqlite': sqlite_insert,
+}
+
 # Create the database tables
 with app.app_context():
     db.create_all()
+    db.session.execute(
+        dialect_inserts[db.engine.dialect.name](IngestWatermark)
+        .values(id=1, version=0, updated_at=datetime.now(timezone.utc))
+        .on_conflict_do_nothing(index_elements=['id'])
+    )
+    db.session.commit()
+    # A legacy health_data table is replaced by the view once migrate_health_data.py has backfilled it
+    for view_name in HEALTH_VIEWS:
+        if not inspect(db.engine).has_table(view_name):
+            create_health_view(view_name)
+
+# Process-wide caches of committed dictionary ids by name, keyed by table name
+metric_ids = {}
+source_ids = {}
+dictionary_caches = {
+    HealthMetric.__tablename__: metric_ids,
+    HealthSource.__tablename__: source_ids,
+}
+
+def pending_dictionary_ids(session, model):
+    """
+    Dictionary ids seen by the session's open transaction, by name. They are shared through the
+    process-wide caches only once the transaction commits, so other sessions never reference a row
+    that may still be rolled back.
+    """
+    return session.info.setdefault('pending_dictionary_ids', {}).setdefault(model.__tablename__, {})
+
+@event.listens_for(db.session, 'after_commit')
+def publish_dictionary_ids(session):
+    """
+    Share the dictionary ids of a committed transaction with the other sessions of the process.
+    """
+    for table_name, ids in session.info.pop('pending_dictionary_ids', {}).items():
+        dictionary_caches[table_name].update(ids)
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def discard_dictionary_ids(session, previous_transaction):
+    """
+    Forget the dictionary ids seen by a rolled back transaction, since the ones it inserted no longer exist.
+    """
+    session.info.pop('pending_dictionary_ids', None)
+
+def parse_timestamp(value):
+    """
+    Parse a Health Auto Export timestamp such as '2024-08-30 07:15:00 +0100' (or any ISO 8601 string).
+    Timestamps without an offset are taken as UTC.
+
+    Returns:
+        tuple: The timestamp normalized to UTC and the original UTC offset in minutes.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid date: {value!r}")
+    try:
+        parsed = datetime.strptime(value, '%Y-%m-%d %H:%M:%S %z')
+    except ValueError:
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid date: {value!r}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    utc_offset = int(parsed.utcoffset().total_seconds() // 60)
+    return parsed.astimezone(timezone.utc), utc_offset
+
+def format_timestamp(ts, utc_offset):
+    """
+    Render a stored sample time in the device's local time, in the Health Auto Export format.
+    """
+    # SQLite hands back naive datetimes; they are stored in UTC
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone(timedelta(minutes=utc_offset))).strftime('%Y-%m-%d %H:%M:%S %z')
+
+def resolve_dictionary_ids(model, values):
+    """
+    Look up (creating where missing) the dictionary ids for the given names, in the current transaction.
+
+    Args:
+        model: HealthMetric or HealthSource.
+        values (dict): Name to column values for rows that may need to be created.
+
+    Returns:
+        dict: Dictionary id by name.
+    """
+    cache = dictionary_caches[model.__tablename__]
+    pending = pending_dictionary_ids(db.session, model)
+    ids = {}
+    missing = []
+    for name in values:
+        id = cache.get(name, pending.get(name))
+        if id is None:
+            missing.append(name)
+        else:
+            ids[name] = id
+    if not missing:
+        return ids
+    insert = dialect_inserts[db.engine.dialect.name]
+    db.session.execute(
+        insert(model).values([values[name] for name in missing]).on_conflict_do_nothing(index_elements=['name'])
+    )
+    for id, name in db.session.execute(select(model.id, model.name).where(model.name.in_(missing))):
+        pending[name] = id
+        ids[name] = id
+    return ids
+
+def rollup_bucket(period, ts, utc_offset):
+    """
+    Return the rollup bucket (local day, or the Monday of the local ISO week) of a sample.
+    """
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    local_date = (ts + timedelta(minutes=utc_offset)).date()
+    if period == 'week':
+        return local_date - timedelta(days=local_date.weekday())
+    return local_date
+
+def update_rollups(samples):
+    """
+    Fold newly inserted samples into the daily and weekly rollups with a single upsert,
+    in the caller's transaction.
+
+    Args:
+        samples: Rows with metric_id, ts, utc_offset and qty of the inserted samples.
+    """
+    aggregates = {}
+    for sample in samples:
+        for period in ROLLUP_PERIODS:
+            key = (period, sample.metric_id, rollup_bucket(period, sample.ts, sample.utc_offset))
+            aggregate = aggregates.get(key)
+            if aggregate is None:
+                aggregates[key] = [1, sample.qty, sample.qty, sample.qty]
+            else:
+                aggregate[0] += 1
+                aggregate[1] = min(aggregate[1], sample.qty)
+                aggregate[2] = max(aggregate[2], sample.qty)
+                aggregate[3] += sample.qty
+    if not aggregates:
+        return
+
+    dialect_name = db.engine.dialect.name
+    insert = dialect_inserts[dialect_name]
+    # SQLite spells the two-argument LEAST/GREATEST as scalar MIN/MAX
+    least, greatest = (func.min, func.max) if dialect_name == 'sqlite' else (func.least, func.greatest)
+
+    statement = insert(HealthRollup).values([
+        {
+            "period": period,
+            "metric_id": metric_id,
+            "bucket": bucket,
+            "sample_count": count,
+            "min_qty": min_qty,
+            "max_qty": max_qty,
+            "sum_qty": sum_qty,
+        } for (period, metric_id, bucket), (count, min_qty, max_qty, sum_qty) in aggregates.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=['period', 'metric_id', 'bucket'],
+        set_={
+            "sample_count": HealthRollup.sample_count + statement.excluded.sample_count,
+            "min_qty": least(HealthRollup.min_qty, statement.excluded.min_qty),
+            "max_qty": greatest(HealthRollup.max_qty, statement.excluded.max_qty),
+            "sum_qty": HealthRollup.sum_qty + statement.excluded.sum_qty,
+        }
+    )
+    db.session.execute(statement)
+
+def advance_ingest_watermark():
+    """
+    Bump the ingest watermark in the caller's transaction, so it moves exactly when the new rows commit.
+    Called last before the commit to keep the row lock short.
+    """
+    db.session.execute(
+        update(IngestWatermark)
+        .where(IngestWatermark.id == 1)
+        .values(version=IngestWatermark.version + 1, updated_at=datetime.now(timezone.utc))
+    )
+
+def bulk_insert_health_data(records, batch_size):
+    """
+    Write records as health samples with batched multi-row INSERT ... ON CONFLICT DO NOTHING statements.
+
+    Returns:
+        tuple: The number of inserted rows and the number of rows skipped as duplicates.
+    """
+    dialect_name = db.engine.dialect.name
+    if dialect_name not in dialect_inserts:
+        raise RuntimeError(f"Bulk ingestion is not supported for the '{dialect_name}' database dialect.")
+    insert = dialect_inserts[dialect_name]
+
+    inserted = 0
+    skipped = 0
+    # Keys of the current batch only, so memory stays bounded by the batch size;
+    # duplicates across batches are skipped by ON CONFLICT
+    seen = set()
+    batch = []
+
+    def flush(rows):
+        row_metric_ids = resolve_dictionary_ids(HealthMetric, {row["name"]: {"name": row["name"], "units": row["units"]} for row in rows})
+        row_source_ids = resolve_dictionary_ids(HealthSource, {row["source"]: {"name": row["source"]} for row in rows})
+        statement = insert(HealthSample).values([
+            {
+                "metric_id": row_metric_ids[row["name"]],
+                "source_id": row_source_ids[row["source"]],
+                "ts": row["ts"],
+                "utc_offset": row["utc_offset"],
+                "qty": row["qty"],
+            } for row in rows
+        ]).on_conflict_do_nothing(
+            index_elements=['metric_id', 'ts', 'source_id']
+        ).returning(HealthSample.metric_id, HealthSample.ts, HealthSample.utc_offset, HealthSample.qty)
+        # RETURNING only yields the rows that were actually inserted, so duplicates never reach the rollups
+        samples = db.session.execute(statement).all()
+        update_rollups(samples)
+        return len(samples)
+
+    for record in records:
+        if not record["name"]:
+            raise ValueError("Each metric must have a name.")
+        ts, utc_offset = parse_timestamp(record["date"])
+        source = record["source"] or ''
+
+        # Drop duplicates within the batch before they reach the database
+        key = (record["name"], ts, source)
+        if key in seen:
+            skipped += 1
+            continue
+        seen.add(key)
+
+        batch.append({
+            "name": record["name"],
+            "units": record["units"],
+            "source": source,
+            "ts": ts,
+            "utc_offset": utc_offset,
+            "qty": record["qty"],
+        })
+        if len(batch) >= batch_size:
+            count = flush(batch)
+            inserted += count
+            skipped += len(batch) - count
+            batch = []
+            seen.clear()
+
+    if batch:
+        count = flush(batch)
+        inserted += count
+        skipped += len(batch) - count
+
+    if inserted:
+        advance_ingest_watermark()
+
+    return inserted, skipped
+
+# Wakes idle ingest workers as soon as a job is queued
+ingest_wakeup = threading.Event()
+ingest_workers = []
+ingest_workers_lock = threading.Lock()
+
+def start_ingest_workers():
+    """
+    Start the background ingest worker threads for this process, once.
+    """
+    with ingest_workers_lock:
+        if ingest_workers:
+            return
+        for index in range(app.config['INGEST_WORKERS']):
+            worker = threading.Thread(target=run_ingest_worker, name=f'ingest-worker-{index}', daemon=True)
+            worker.start()
+            ingest_workers.append(worker)
+
+def run_ingest_worker():
+    """
+    Drain the ingest queue until the process exits, sleeping while it is empty.
+    """
+    while True:
+        try:
+            with app.app_context():
+                claim_token, jobs = claim_ingest_jobs(app.config['INGEST_COALESCE_JOBS'])
+                if jobs:
+                    with IngestLease(db.engine, [job.id for job in jobs], claim_token):
+                        process_ingest_jobs(jobs, claim_token)
+        except Exception as e:
+            logging.error(f"Ingest worker error: {e}")
+            jobs = None
+        if not jobs:
+            ingest_wakeup.wait(app.config['INGEST_POLL_INTERVAL'])
+            ingest_wakeup.clear()
+
+class IngestClaimLost(Exception):
+    """
+    Raised when a job's claim was taken over by another worker, whose result then wins.
+    """
+
+def claim_ingest_jobs(limit):
+    """
+    Atomically move up to limit of the oldest queued (or abandoned running) jobs to running under a new
+    claim token. Each job is claimed with a conditional UPDATE, so concurrent workers and processes never
+    share a job, and a running job is only abandoned once its heartbeat is older than INGEST_JOB_TIMEOUT.
+
+    Returns:
+        tuple: The claim token and the list of claimed IngestJob objects.
+    """
+    now = datetime.now(timezone.utc)
+    abandoned = now - timedelta(seconds=app.config['INGEST_JOB_TIMEOUT'])
+    claimable = (IngestJob.status == 'queued') | ((IngestJob.status == 'running') & (IngestJob.heartbeat_at < abandoned))
+    claim_token = str(uuid.uuid4())
+
+    candidates = db.session.execute(
+        select(IngestJob.id).where(claimable).order_by(IngestJob.created_at).limit(limit)
+    ).scalars().all()
+    claimed = []
+    for job_id in candidates:
+        result = db.session.execute(
+            update(IngestJob).where(IngestJob.id == job_id, claimable)
+            .values(status='running', started_at=now, heartbeat_at=now, claim_token=claim_token)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            claimed.append(job_id)
+    db.session.commit()
+
+    if not claimed:
+        return claim_token, []
+    return claim_token, db.session.execute(select(IngestJob).where(IngestJob.id.in_(claimed)).order_by(IngestJob.created_at)).scalars().all()
+
+def renew_ingest_lease(connection, job_ids, claim_token):
+    """
+    Move the heartbeat of the jobs still held under claim_token to now.
+
+    Returns:
+        int: The number of jobs whose lease was renewed.
+    """
+    result = connection.execute(
+        update(IngestJob)
+        .where(IngestJob.id.in_(job_ids), IngestJob.claim_token == claim_token, IngestJob.status == 'running')
+        .values(heartbeat_at=datetime.now(timezone.utc))
+    )
+    return result.rowcount
+
+class IngestLease:
+    """
+    Context manager that keeps renewing the heartbeat of claimed jobs while they are processed.
+
+    The heartbeat is written by a background thread on its own connection and committed right away,
+    so it is visible to other workers while the ingest transaction is still open.
+
+    By default there are no heartbeats on SQLite: the ingest transaction holds the database's only write
+    lock, so a heartbeat would wait on it until "database is locked", and other workers cannot reclaim
+    the jobs before that transaction ends anyway.
+    """
+    def __init__(self, engine, job_ids, claim_token, interval=None, heartbeat=None):
+        self.engine = engine
+        self.job_ids = job_ids
+        self.claim_token = claim_token
+        self.interval = interval or app.config['INGEST_HEARTBEAT_INTERVAL']
+        self.heartbeat = engine.dialect.name != 'sqlite' if heartbeat is None else heartbeat
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='ingest-heartbeat', daemon=True)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                with self.engine.begin() as connection:
+                    renew_ingest_lease(connection, self.job_ids, self.claim_token)
+            except Exception as e:
+                logging.error(f"Error renewing ingest job lease: {e}")
+
+    def __enter__(self):
+        if self.heartbeat:
+            self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+def ingest_job_payload(job):
+    """
+    Write one job's payload into the current transaction.
+
+    Returns:
+        tuple: The number of inserted and skipped samples.
+    """
+    stream = DecodedStream(io.BytesIO(job.payload), job.content_encoding, app.config['INGEST_MAX_BODY_BYTES'])
+    return bulk_insert_health_data(iter_payload_records(stream), app.config['INGEST_BATCH_SIZE'])
+
+def finish_ingest_job(job_id, claim_token, counts=None, error=None):
+    """
+    Mark a job done (dropping its payload and recording its counts) or failed, in the current transaction.
+    The update only applies while the job is still held under claim_token.
+
+    Raises:
+        IngestClaimLost: When another worker has reclaimed the job in the meantime.
+    """
+    values = {"finished_at": datetime.now(timezone.utc)}
+    if error is None:
+        inserted, skipped = counts
+        values.update(status='done', payload=None, records=inserted + skipped, inserted=inserted, skipped=skipped)
+    else:
+        values.update(status='failed', error=error)
+    result = db.session.execute(
+        update(IngestJob)
+        .where(IngestJob.id == job_id, IngestJob.claim_token == claim_token, IngestJob.status == 'running')
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise IngestClaimLost(f"Ingest job {job_id} was reclaimed by another worker.")
+
+def process_ingest_jobs(jobs, claim_token):
+    """
+    Ingest a group of jobs claimed under claim_token in a single transaction. If any job fails, the group
+    is rolled back and each job is retried in its own transaction so one bad payload cannot fail the others.
+    Jobs reclaimed by another worker in the meantime are rolled back and left to that worker.
+    """
+    job_ids = [job.id for job in jobs]
+    try:
+        for job in jobs:
+            finish_ingest_job(job.id, claim_token, counts=ingest_job_payload(job))
+        db.session.commit()
+        return
+    except Exception as e:
+        db.session.rollback()
+        if len(jobs) == 1:
+            if not isinstance(e, IngestClaimLost):
+                fail_ingest_job(job_ids[0], claim_token, str(e))
+            else:
+                logging.error(str(e))
+            return
+
+    for job_id in job_ids:
+        try:
+            job = db.session.get(IngestJob, job_id)
+            finish_ingest_job(job_id, claim_token, counts=ingest_job_payload(job))
+            db.session.commit()
+        except IngestClaimLost as e:
+            db.session.rollback()
+            logging.error(str(e))
+        except Exception as e:
+            db.session.rollback()
+            fail_ingest_job(job_id, claim_token, str(e))
+
+def fail_ingest_job(job_id, claim_token, error):
+    """
+    Record a job's error in its own transaction, unless the job was reclaimed by another worker.
+    """
+    try:
+        finish_ingest_job(job_id, claim_token, error=error)
+        db.session.commit()
+    except IngestClaimLost as e:
+        db.session.rollback()
+        logging.error(str(e))
+
+def check_payload_size(raw, content_encoding):
+    """
+    Decode a raw payload without keeping it, to enforce the maximum body size on its decompressed size.
+
+    Raises:
+        PayloadTooLargeError: When the decompressed payload exceeds INGEST_MAX_BODY_BYTES.
+        ValueError: When the Content-Encoding is unsupported or the body cannot be decompressed.
+    """
+    stream = DecodedStream(io.BytesIO(raw), content_encoding, app.config['INGEST_MAX_BODY_BYTES'])
+    while stream.read(READ_CHUNK_SIZE):
+        pass
+
+def enqueue_ingest_job(raw, content_encoding):
+    """
+    Durably store a raw payload as a queued job and wake the workers.
+
+    Returns:
+        IngestJob: The queued job.
+    """
+    job = IngestJob(
+        id=str(uuid.uuid4()),
+        status='queued',
+        payload=raw,
+        content_encoding=content_encoding,
+        created_at=datetime.now(timezone.utc),
+    )
+    db.session.add(job)
+    db.session.commit()
+    start_ingest_workers()
+    ingest_wakeup.set()
+    return job
+
+def wants_async_ingest():
+    """
+    Whether this POST should be queued rather than ingested within the request.
+    """
+    mode = request.args.get('mode')
+    if mode is None and 'respond-async' in request.headers.get('Prefer', ''):
+        mode = 'async'
+    return (mode or app.config['INGEST_MODE']) == 'async'
 
 # POST request for the Health Auto Export application 
 @app.route('/health-data', methods=['POST'])
 def receive_health_data():
     try:
-        # Check if the request content type is JSON
-        if request.is_json:
-            data = request.get_json()
-        else:
-            # Attempt to parse as JSON if not already recognized as JSON
+        # In async mode the raw body is queued as-is and parsed later by the ingest workers
+        if wants_async_ingest():
+            max_bytes = app.config['INGEST_MAX_BODY_BYTES']
+            raw = request.stream.read(max_bytes + 1)
+            if len(raw) > max_bytes:
+                return jsonify({"error": f"Payload exceeds the maximum body size of {max_bytes} bytes."}), 413
+            # The limit applies to the decompressed body, so compressed payloads are decoded once up front
             try:
-                data = json.loads(request.data.decode('utf-8'))
-            except json.JSONDecodeError:
-                return jsonify({"error": "Invalid data format. Expected JSON."}), 400
-
-        #  Ensure data is in a list format for uniform processing
-        if isinstance(data, dict):
-            data = [data]
-
-        for item in data:
-            if not isinstance(item, dict):
-                return jsonify({"error": "Each item in the data array must be a dictionary."}), 400
-            
-            # Extract the metrics list from the data
-            metrics = item.get("data", {}).get("metrics", [])
-            for metric in metrics:
-                name = metric.get("name")
-                units = metric.get("units")
-                
-                # Iterate over each entry in the data array of the current metric
-                for entry in metric.get("data", []):
-                    date = entry.get("date")
-                    qty = entry.get("qty")
-                    source = entry.get("source")
-
-                    # Skip the record if qty is None
-                    if qty is None:
-                        continue
-
-                    # Check if a record with the same name, date, and source already exists
-                    existing_record = HealthData.query.filter_by(name=name, date=date, source=source).first()
-                    if existing_record:
-                        # Skip the record to avoid duplicates
-                        continue
-
-                    # Create a new HealthData object and add it to the database
-                    health_data = HealthData(
-                        name=name,
-                        date=date,
-                        qty=qty,
-                        source=source,
-                        units=units
-                    )
-                    db.session.add(health_data)
+                check_payload_size(raw, request.headers.get('Content-Encoding'))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            except PayloadTooLargeError as e:
+                return jsonify({"error": str(e)}), 413
+            job = enqueue_ingest_job(raw, request.headers.get('Content-Encoding'))
+            response = jsonify({"message": "Data accepted for processing", "job_id": job.id, "status": job.status})
+            response.headers['Location'] = url_for('get_ingest_job', job_id=job.id)
+            return response, 202
+
+        batch_size = request.args.get('batch_size', app.config['INGEST_BATCH_SIZE'], type=int)
+        if batch_size < 1:
+            return jsonify({"error": "batch_size must be a positive integer."}), 400
+
+        # Parse the (optionally gzip/deflate encoded) body incrementally, writing records batch by batch
+        try:
+            stream = DecodedStream(request.stream, request.headers.get('Content-Encoding'), app.config['INGEST_MAX_BODY_BYTES'])
+            inserted, skipped = bulk_insert_health_data(iter_payload_records(stream), batch_size)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 400
+        except PayloadTooLargeError as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 413
 
         # Commit the transaction to save all the records in the database
         db.session.commit()
 
-        return jsonify({"message": "Data received successfully"}), 201
+        return jsonify({"message": "Data received successfully", "inserted": inserted, "skipped": skipped}), 201
 
     except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+# GET request to report the progress of a queued ingest job
+@app.route('/health-data/jobs/<job_id>', methods=['GET'])
+def get_ingest_job(job_id):
+    try:
+        job = db.session.get(IngestJob, job_id)
+        if job is None:
+            return jsonify({"error": "Job not found."}), 404
+
+        result = {
+            "job_id": job.id,
+            "status": job.status,
+            "created_at": job.created_at.isoformat(),
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+            "records": job.records,
+            "inserted": job.inserted,
+            "skipped": job.skipped,
+            "error": job.error,
+        }
+        # Queued jobs also report how many jobs are ahead of them
+        if job.status == 'queued':
+            result["queue_position"] = db.session.execute(
+                select(func.count()).select_from(IngestJob).where(IngestJob.status == 'queued', IngestJob.created_at < job.created_at)
+            ).scalar()
+        return jsonify(result), 200
+
+    except Exception as e:
+        # Print the exception for debugging purposes
+        print("Exception occurred:", str(e))
         return jsonify({"error": str(e)}), 500
 
+class ResponseCache:
+    """
+    In-process LRU cache of serialized GET responses for one ingest watermark version.
+    Entries from older versions are dropped as soon as a newer version is seen.
+    """
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = None
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, version, key):
+        with self.lock:
+            if version != self.version:
+                return None
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, version, key, entry):
+        body = entry[0]
+        if len(body) > self.max_bytes:
+            return
+        with self.lock:
+            if version != self.version:
+                self.version = version
+                self.entries.clear()
+                self.size = 0
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key)[0])
+            self.entries[key] = entry
+            self.size += len(body)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, (evicted, _, _) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+response_cache = ResponseCache(app.config['RESPONSE_CACHE_ENTRIES'], app.config['RESPONSE_CACHE_MAX_BYTES'])
+
+# Response headers kept alongside cached bodies
+CACHED_HEADERS = ('X-Next-Cursor', 'Link')
+
+def conditional_response(build, cacheable=True):
+    """
+    Serve a GET response validated by the ingest watermark: answer 304 when the client's
+    If-None-Match/If-Modified-Since still matches, otherwise serve the body from the response cache
+    or build it (and cache it, when cacheable) and tag it with ETag and Last-Modified.
+
+    Args:
+        build (callable): Returns the full Response for the current request.
+        cacheable (bool): Whether the body may be kept in memory; False for unbounded streams.
+    """
+    watermark = db.session.get(IngestWatermark, 1)
+    last_modified = watermark.updated_at
+    # SQLite hands back naive datetimes; they are stored in UTC
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+    key = (request.path, tuple(sorted(request.args.items(multi=True))), request.accept_mimetypes.best)
+    etag = hashlib.sha1(repr((watermark.version,) + key).encode('utf-8')).hexdigest()
+
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = request.if_modified_since is not None and last_modified.replace(microsecond=0) <= request.if_modified_since
+    if not_modified:
+        response = Response(status=304)
+    elif cacheable:
+        cached = response_cache.get(watermark.version, key)
+        if cached is not None:
+            body, mimetype, headers = cached
+            response = Response(body, mimetype=mimetype, headers=headers)
+        else:
+            response = build()
+            headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+            response_cache.put(watermark.version, key, (response.get_data(), response.mimetype, headers))
+    else:
+        response = build()
+
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    return response
+
+def serialize_health_data(data):
+    """
+    Convert a health sample row into its JSON representation.
+    """
+    return {
+        "id": data.id,
+        "name": data.name,
+        "date": format_timestamp(data.ts, data.utc_offset),
+        "qty": data.qty,
+        "source": data.source or None,
+        "units": data.units
+    }
+
+def build_health_data_query(args):
+    """
+    Build a SELECT over health samples joined to their dictionaries, ordered by id,
+    applying the filters given in the request arguments.
+    """
+    query = (
+        select(
+            HealthSample.id,
+            HealthMetric.name,
+            HealthSample.ts,
+            HealthSample.utc_offset,
+            HealthSample.qty,
+            HealthSource.name.label('source'),
+            HealthMetric.units,
+        )
+        .join(HealthMetric, HealthSample.metric_id == HealthMetric.id)
+        .join(HealthSource, HealthSample.source_id == HealthSource.id)
+        .order_by(HealthSample.id)
+    )
+
+    # Keyset cursor: only rows after the last id the client has seen
+    cursor = args.get('cursor', type=int)
+    if cursor is not None:
+        query = query.where(HealthSample.id > cursor)
+    if args.get('name'):
+        query = query.where(HealthMetric.name == args['name'])
+    if args.get('source'):
+        query = query.where(HealthSource.name == args['source'])
+    if args.get('start'):
+        query = query.where(HealthSample.ts >= parse_timestamp(args['start'])[0])
+    if args.get('end'):
+        query = query.where(HealthSample.ts <= parse_timestamp(args['end'])[0])
+    return query
+
+def stream_health_data(query):
+    """
+    Yield NDJSON lines for every row of the query, fetching rows in chunks from a server-side cursor.
+    """
+    chunk_size = app.config['QUERY_STREAM_CHUNK_SIZE']
+    result = db.session.execute(query.execution_options(yield_per=chunk_size))
+    for data in result:
+        yield json.dumps(serialize_health_data(data)) + "\n"
+
 # GET request to retrieve health data
 @app.route('/health-data', methods=['GET'])
 def get_health_data():
     try:
-        # Query all health data entries from the database
-        all_data = HealthData.query.all()
-        results = [
-            {
-                "name": data.name,
-                "date": data.date,
-                "qty": data.qty,
-                "source": data.source,
-                "units": data.units
-            } for data in all_data]
+        try:
+            query = build_health_data_query(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # NDJSON mode streams every matching row without materializing the result set
+        if request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson':
+            limit = request.args.get('limit', type=int)
+            if limit is not None:
+                if limit < 1:
+                    return jsonify({"error": "limit must be a positive integer."}), 400
+                query = query.limit(limit)
+            return conditional_response(
+                lambda: Response(stream_with_context(stream_health_data(query)), mimetype='application/x-ndjson'),
+                cacheable=False,
+            )
+
+        limit = request.args.get('limit', app.config['QUERY_PAGE_SIZE'], type=int)
+        if limit < 1:
+            return jsonify({"error": "limit must be a positive integer."}), 400
+        limit = min(limit, app.config['QUERY_MAX_PAGE_SIZE'])
+
+        def build():
+            # Query one page of health data entries from the database
+            page = db.session.execute(query.limit(limit)).all()
+            results = [serialize_health_data(data) for data in page]
+
+            response = jsonify(results)
+            # A full page means more rows may follow; hand the client the cursor for the next page
+            if len(page) == limit:
+                next_cursor = page[-1].id
+                response.headers['X-Next-Cursor'] = str(next_cursor)
+                args = request.args.to_dict()
+                args['cursor'] = next_cursor
+                response.headers['Link'] = f'<{url_for("get_health_data", **args)}>; rel="next"'
+            return response
+
+        return conditional_response(build)
+
+    except Exception as e:
+        # Print the exception for debugging purposes
+        print("Exception occurred:", str(e))
+        return jsonify({"error": str(e)}), 500
+
+def import_pyarrow():
+    """
+    Import pyarrow for columnar exports. Only the export endpoint needs it, so the rest of the API keeps
+    working where it is missing or built against another NumPy.
+
+    Returns:
+        tuple: The pyarrow and pyarrow.parquet modules.
+    """
+    import pyarrow
+    import pyarrow.parquet
+    return pyarrow, pyarrow.parquet
+
+def export_schema(pa):
+    """
+    Schema of columnar exports; ts is UTC and utc_offset the device's offset in minutes.
+    """
+    return pa.schema([
+        ('id', pa.int64()),
+        ('name', pa.string()),
+        ('ts', pa.timestamp('us', tz='UTC')),
+        ('utc_offset', pa.int16()),
+        ('qty', pa.float64()),
+        ('source', pa.string()),
+        ('units', pa.string()),
+    ])
+
+# Export formats: file extension, mimetype, and the writer factory (taking a sink and the schema) of pyarrow
+EXPORT_FORMATS = {
+    # The Arrow IPC file format can be memory-mapped once saved
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file', lambda pa, pq: pa.ipc.new_file),
+    'arrow-stream': ('arrows', 'application/vnd.apache.arrow.stream', lambda pa, pq: pa.ipc.new_stream),
+    'parquet': ('parquet', 'application/vnd.apache.parquet', lambda pa, pq: pq.ParquetWriter),
+}
+
+class ChunkSink:
+    """
+    Write-only file-like object collecting what a columnar writer produces until it is drained.
+    """
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def export_record_batch(pa, schema, rows):
+    """
+    Build an Arrow record batch from a partition of health sample rows.
+    """
+    return pa.record_batch([
+        pa.array([row.id for row in rows], pa.int64()),
+        pa.array([row.name for row in rows], pa.string()),
+        pa.array([row.ts for row in rows], pa.timestamp('us', tz='UTC')),
+        pa.array([row.utc_offset for row in rows], pa.int16()),
+        pa.array([row.qty for row in rows], pa.float64()),
+        pa.array([row.source or None for row in rows], pa.string()),
+        pa.array([row.units for row in rows], pa.string()),
+    ], schema=schema)
+
+def stream_health_data_export(query, writer_factory, pa, pq):
+    """
+    Yield a columnar export of the query, one record batch (or Parquet row group) per partition
+    fetched from a server-side cursor.
+    """
+    batch_size = app.config['EXPORT_BATCH_SIZE']
+    schema = export_schema(pa)
+    sink = ChunkSink()
+    writer = writer_factory(sink, schema)
+    result = db.session.execute(query.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        batch = export_record_batch(pa, schema, rows)
+        if isinstance(writer, pq.ParquetWriter):
+            writer.write_batch(batch, row_group_size=batch_size)
+        else:
+            writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+# GET request to export health data in a columnar format
+@app.route('/health-data/export', methods=['GET'])
+def export_health_data():
+    try:
+        export_format = request.args.get('format', 'arrow')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}."}), 400
+        extension, mimetype, get_writer_factory = EXPORT_FORMATS[export_format]
+
+        try:
+            query = build_health_data_query(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        try:
+            pa, pq = import_pyarrow()
+        except Exception as e:
+            logging.error(f"Columnar export unavailable: {e}")
+            return jsonify({"error": "Columnar exports are unavailable: pyarrow is not installed or cannot be imported."}), 501
+        writer_factory = get_writer_factory(pa, pq)
+
+        def build():
+            response = Response(stream_with_context(stream_health_data_export(query, writer_factory, pa, pq)), mimetype=mimetype)
+            response.headers['Content-Disposition'] = f'attachment; filename=health_data.{extension}'
+            return response
+
+        return conditional_response(build, cacheable=False)
+
+    except Exception as e:
+        # Print the exception for debugging purposes
+        print("Exception occurred:", str(e))
+        return jsonify({"error": str(e)}), 500
+
+def serialize_health_rollup(rollup):
+    """
+    Convert a rollup row into its JSON representation.
+    """
+    return {
+        "name": rollup.name,
+        "units": rollup.units,
+        "period": rollup.period,
+        "bucket": rollup.bucket.isoformat(),
+        "count": rollup.sample_count,
+        "min": rollup.min_qty,
+        "max": rollup.max_qty,
+        "mean": rollup.sum_qty / rollup.sample_count,
+        "sum": rollup.sum_qty
+    }
+
+# GET request to retrieve daily or weekly aggregates per metric
+@app.route('/health-data/summary', methods=['GET'])
+def get_health_data_summary():
+    try:
+        period = request.args.get('period', 'day')
+        if period not in ROLLUP_PERIODS:
+            return jsonify({"error": f"period must be one of: {', '.join(ROLLUP_PERIODS)}."}), 400
+
+        query = (
+            select(
+                HealthMetric.name,
+                HealthMetric.units,
+                HealthRollup.period,
+                HealthRollup.bucket,
+                HealthRollup.sample_count,
+                HealthRollup.min_qty,
+                HealthRollup.max_qty,
+                HealthRollup.sum_qty,
+            )
+            .join(HealthMetric, HealthRollup.metric_id == HealthMetric.id)
+            .where(HealthRollup.period == period)
+            .order_by(HealthMetric.name, HealthRollup.bucket)
+        )
+        if request.args.get('name'):
+            query = query.where(HealthMetric.name == request.args['name'])
+        try:
+            if request.args.get('start'):
+                query = query.where(HealthRollup.bucket >= date.fromisoformat(request.args['start']))
+            if request.args.get('end'):
+                query = query.where(HealthRollup.bucket <= date.fromisoformat(request.args['end']))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-        return jsonify(results), 200
+        return conditional_response(
+            lambda: jsonify([serialize_health_rollup(rollup) for rollup in db.session.execute(query)])
+        )
 
     except Exception as e:
         # Print the exception for debugging purposes
@@ -116,4 +1114,5 @@ def get_health_data():
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
+    start_ingest_workers()
     app.run(debug=True)
\ No newline at end of file
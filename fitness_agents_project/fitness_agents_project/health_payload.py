@@ -0,0 +1,134 @@
+"""
+Incremental parsing of Health Auto Export payloads.
+
+Request bodies are read from a stream, decompressed on the fly for gzip/deflate Content-Encoding,
+and parsed event by event with ijson, so records reach the database writer while the rest of the
+export is still being read.
+"""
+import zlib
+
+import ijson
+
+# Bytes read from the underlying stream per call
+READ_CHUNK_SIZE = 64 * 1024
+
+class PayloadTooLargeError(Exception):
+    """
+    Raised when a (decompressed) payload exceeds the configured maximum body size.
+    """
+
+class DecodedStream:
+    """
+    Read-only file-like wrapper that decompresses a request stream and enforces a size limit.
+    """
+    def __init__(self, stream, content_encoding, max_bytes):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.buffer = b''
+        self.eof = False
+
+        encoding = (content_encoding or 'identity').strip().lower()
+        if encoding == 'gzip':
+            self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            # Auto-detects the zlib wrapper HTTP specifies for deflate
+            self.decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        elif encoding == 'identity':
+            self.decompressor = None
+        else:
+            raise ValueError(f"Unsupported Content-Encoding: {content_encoding}")
+
+    def read(self, size=-1):
+        while not self.eof and (size < 0 or len(self.buffer) < size):
+            chunk = self.stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                self.eof = True
+                if self.decompressor is not None:
+                    self.buffer += self.decompressor.flush()
+                break
+            if self.decompressor is not None:
+                try:
+                    chunk = self.decompressor.decompress(chunk)
+                except zlib.error as e:
+                    raise ValueError(f"Invalid compressed body: {e}")
+            self.buffer += chunk
+            self.bytes_read += len(chunk)
+            if self.bytes_read > self.max_bytes:
+                raise PayloadTooLargeError(f"Payload exceeds the maximum body size of {self.max_bytes} bytes.")
+
+        if size < 0:
+            data, self.buffer = self.buffer, b''
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+def iter_payload_records(stream):
+    """
+    Incrementally parse data.metrics[].data[] from a Health Auto Export JSON stream (a single
+    payload object or an array of them) into records with a name, date, qty, source and units.
+    Entries without a quantity are skipped.
+
+    Entries are emitted as soon as they are parsed once their metric's name is known; a metric whose
+    name follows its data is buffered until the end of that metric.
+    """
+    metric = entry = None
+    metrics_prefix = None
+    try:
+        for prefix, event, value in ijson.parse(stream, use_float=True):
+            if metrics_prefix is None:
+                # The first event tells whether the body is one payload object or an array of them
+                if event == 'start_map':
+                    metrics_prefix = 'data.metrics.item'
+                elif event == 'start_array':
+                    metrics_prefix = 'item.data.metrics.item'
+                else:
+                    raise ValueError("Invalid data format. Expected a JSON object or array.")
+                entry_prefix = metrics_prefix + '.data.item'
+                continue
+
+            if prefix == 'item' and metrics_prefix.startswith('item.') and event not in ('start_map', 'end_map', 'map_key'):
+                raise ValueError("Each item in the data array must be a dictionary.")
+
+            if prefix == metrics_prefix:
+                if event == 'start_map':
+                    metric = {"name": None, "units": None, "pending": []}
+                elif event == 'end_map':
+                    # Flush entries that arrived before the metric's name
+                    for pending in metric["pending"]:
+                        yield make_record(metric, pending)
+                    metric = None
+            elif metric is None:
+                continue
+            elif prefix == metrics_prefix + '.name' and event == 'string':
+                metric["name"] = value
+            elif prefix == metrics_prefix + '.units' and event == 'string':
+                metric["units"] = value
+            elif prefix == entry_prefix:
+                if event == 'start_map':
+                    entry = {}
+                elif event == 'end_map':
+                    if entry.get("qty") is not None:
+                        if metric["name"] is None:
+                            metric["pending"].append(entry)
+                        else:
+                            yield make_record(metric, entry)
+                    entry = None
+            elif entry is not None and prefix.startswith(entry_prefix + '.') and event not in ('map_key', 'start_map', 'end_map', 'start_array', 'end_array'):
+                key = prefix[len(entry_prefix) + 1:]
+                if '.' not in key:
+                    entry[key] = value
+    except ijson.JSONError:
+        raise ValueError("Invalid data format. Expected JSON.")
+
+def make_record(metric, entry):
+    """
+    Combine a metric header and one of its data entries into a record.
+    """
+    return {
+        "name": metric["name"],
+        "date": entry.get("date"),
+        "qty": entry.get("qty"),
+        "source": entry.get("source"),
+        "units": metric["units"],
+    }
@@ -0,0 +1,165 @@
+"""
+Backfill the typed health_sample schema from the legacy health_data table.
+
+The legacy table stores every sample with its date as text and repeats the metric name, units and
+source on each row. Rows are copied over in id order, one chunk per transaction, so the backfill can
+be stopped and resumed with --start-after. Once everything is copied, --finalize renames the legacy
+table to health_data_legacy and puts the health_data compatibility view in its place.
+--rebuild-rollups recomputes the daily and weekly rollups from every stored sample, for samples
+ingested before the rollups existed. An ingest_job table created before claim leases first gets its
+claim_token and heartbeat_at columns added.
+
+Usage:
+    python migrate_health_data.py [--chunk-size 5000] [--start-after 0] [--finalize] [--rebuild-rollups]
+"""
+import argparse
+import logging
+import sys
+
+from sqlalchemy import column, delete, func, inspect, select, table, text
+
+from health_data_api import (
+    app,
+    db,
+    HealthRollup,
+    HealthSample,
+    IngestJob,
+    advance_ingest_watermark,
+    bulk_insert_health_data,
+    create_health_view,
+    parse_timestamp,
+    update_rollups,
+)
+
+# Configure logging
+logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+
+LEGACY_TABLE = 'health_data'
+RENAMED_LEGACY_TABLE = 'health_data_legacy'
+
+def add_ingest_lease_columns():
+    """
+    Add the claim lease columns to an ingest_job table that predates them.
+    """
+    columns = {column['name'] for column in inspect(db.engine).get_columns(IngestJob.__tablename__)}
+    with db.engine.begin() as connection:
+        for lease_column in (IngestJob.__table__.c.claim_token, IngestJob.__table__.c.heartbeat_at):
+            if lease_column.name not in columns:
+                column_type = lease_column.type.compile(dialect=db.engine.dialect)
+                connection.execute(text(f"ALTER TABLE {IngestJob.__tablename__} ADD COLUMN {lease_column.name} {column_type}"))
+                logging.info(f"Added column {IngestJob.__tablename__}.{lease_column.name}")
+
+def legacy_table(name):
+    """
+    Lightweight table construct for the legacy string-typed health data table.
+    """
+    return table(name, column('id'), column('name'), column('date'), column('qty'), column('source'), column('units'))
+
+def find_legacy_table():
+    """
+    Return the name of the legacy table, or None when there is nothing left to migrate.
+    """
+    inspector = inspect(db.engine)
+    if inspector.has_table(LEGACY_TABLE) and LEGACY_TABLE not in inspector.get_view_names():
+        return LEGACY_TABLE
+    if inspector.has_table(RENAMED_LEGACY_TABLE):
+        return RENAMED_LEGACY_TABLE
+    return None
+
+def backfill(legacy, chunk_size, start_after):
+    """
+    Copy legacy rows into health_sample in chunks of chunk_size rows, committing after each chunk.
+
+    Returns:
+        tuple: The number of inserted, duplicate and invalid rows.
+    """
+    total = db.session.execute(select(func.count()).select_from(legacy).where(legacy.c.id > start_after)).scalar()
+    logging.info(f"Migrating {total} rows from {legacy.name}")
+
+    inserted = skipped = invalid = 0
+    last_id = start_after
+    while True:
+        rows = db.session.execute(
+            select(legacy).where(legacy.c.id > last_id).order_by(legacy.c.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        records = []
+        for row in rows:
+            try:
+                parse_timestamp(row.date)
+            except ValueError:
+                invalid += 1
+                logging.warning(f"Skipping row {row.id} with invalid date {row.date!r}")
+                continue
+            records.append({
+                "name": row.name,
+                "date": row.date,
+                "qty": row.qty,
+                "source": row.source,
+                "units": row.units,
+            })
+
+        chunk_inserted, chunk_skipped = bulk_insert_health_data(records, chunk_size)
+        db.session.commit()
+
+        inserted += chunk_inserted
+        skipped += chunk_skipped
+        last_id = rows[-1].id
+        logging.info(f"Migrated rows up to id {last_id}: {inserted} inserted, {skipped} duplicates, {invalid} invalid")
+
+    return inserted, skipped, invalid
+
+def finalize(legacy_name):
+    """
+    Move the legacy table aside and replace it with the health_data view.
+    """
+    if legacy_name == LEGACY_TABLE:
+        with db.engine.begin() as connection:
+            connection.execute(text(f"ALTER TABLE {LEGACY_TABLE} RENAME TO {RENAMED_LEGACY_TABLE}"))
+        logging.info(f"Renamed {LEGACY_TABLE} to {RENAMED_LEGACY_TABLE}")
+    if not inspect(db.engine).has_table(LEGACY_TABLE):
+        create_health_view(LEGACY_TABLE)
+        logging.info(f"Created the {LEGACY_TABLE} view")
+
+def rebuild_rollups(chunk_size):
+    """
+    Recompute all rollups from health_sample in a single transaction, streaming samples in chunks.
+    """
+    db.session.execute(delete(HealthRollup))
+    result = db.session.execute(
+        select(HealthSample.metric_id, HealthSample.ts, HealthSample.utc_offset, HealthSample.qty)
+        .execution_options(yield_per=chunk_size)
+    )
+    folded = 0
+    for samples in result.partitions():
+        update_rollups(samples)
+        folded += len(samples)
+    advance_ingest_watermark()
+    db.session.commit()
+    logging.info(f"Rebuilt rollups from {folded} samples")
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill health_sample from the legacy health_data table.")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Rows copied per transaction.")
+    parser.add_argument('--start-after', type=int, default=0, help="Resume after this legacy row id.")
+    parser.add_argument('--finalize', action='store_true', help="Replace the legacy table with the health_data view when done.")
+    parser.add_argument('--rebuild-rollups', action='store_true', help="Recompute the daily and weekly rollups from all samples.")
+    args = parser.parse_args()
+
+    with app.app_context():
+        add_ingest_lease_columns()
+        legacy_name = find_legacy_table()
+        if legacy_name is None:
+            logging.info("No legacy health_data table found; nothing to migrate.")
+        else:
+            backfill(legacy_table(legacy_name), args.chunk_size, args.start_after)
+            if args.finalize:
+                finalize(legacy_name)
+
+        if args.rebuild_rollups:
+            rebuild_rollups(args.chunk_size)
+
+if __name__ == '__main__':
+    main()
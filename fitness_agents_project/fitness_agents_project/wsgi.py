@@ -1,4 +1,7 @@
-from health_data_api import app
+from health_data_api import app, start_ingest_workers
+
+# Each gunicorn worker process drains the ingest queue with its own background threads
+start_ingest_workers()
 
 if __name__ == "__main__":
     app.run()
\ No newline at end of file
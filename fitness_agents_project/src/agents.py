@@ -11,21 +11,30 @@ logging.basicConfig(stream=sys.stdout, level=logging.WARNING)
 logging.getLogger().addHandler(logging.StreamHandler(stream=sys.stdout))
 
 class Agents:
-    def __init__(self, tool_set, query_engine_tools):
+    def __init__(self, tool_set, query_engine_tools, fitness_details_path=None, website_search_dir=None):
         self.tool_set = tool_set
         
         if query_engine_tools is None:
             raise ValueError("Query engine tools could not be initialized.")
         else:
             self.query_engine_tools = query_engine_tools
-        self.search_tool = self.tool_set.create_search_tool()
-        self.website_rag_tool = self.tool_set.create_website_rag_tool()
-        self.youtube_search_tool = self.tool_set.create_youtube_search_tool()
-        self.json_file_reader_tool = self.tool_set.create_json_file_reader_tool()
+        # Tools are shared, already built instances from the process-wide tool registry
+        self.search_tool = self.tool_set.get_tool('search_tool')
+        # Pages indexed for one run's websites must not be found by another's, so every run builds its own
+        self.website_rag_tool = self.tool_set.create_website_rag_tool(website_search_dir)
+        self.youtube_search_tool = self.tool_set.get_tool('youtube_search_tool')
+        # A run with its own workspace reads its own fitness details
+        if fitness_details_path is None:
+            self.json_file_reader_tool = self.tool_set.get_tool('json_file_reader_tool')
+        else:
+            self.json_file_reader_tool = self.tool_set.create_json_file_reader_tool(fitness_details_path)
+        # The database search tools embed the rows present when they are built, so every run builds its own
         self.pg_rag_tool = self.tool_set.create_pg_rag_tool()
-        self.calendar_tool = self.tool_set.create_calendar_tool()
-        self.weather_tool = self.tool_set.create_weather_tool()
-        # self.spotify_tool = self.tool_set.create_spotify_tool()
+        self.pg_summary_tool = self.tool_set.create_pg_summary_tool()
+        self.health_trend_tool = self.tool_set.get_tool('health_trend_tool')
+        self.calendar_tool = self.tool_set.get_tool('calendar_tool')
+        self.weather_tool = self.tool_set.get_tool('weather_tool')
+        # self.spotify_tool = self.tool_set.get_tool('spotify_tool')
         self.input_summary_tool, self.input_semantic_search_tool = self.query_engine_tools.create_tools()
 
     # Define agents
@@ -54,7 +63,7 @@ class Agents:
                 'In this role, your task is to continuously interpret health data from the Apple Watch and integrate this with the information contained in the uploaded medical reports, delivering tailored insights and actionable recommendations to improve the user’s fitness and well-being.'
             ),
             verbose=True,
-            tools=[self.pg_rag_tool, self.input_summary_tool, self.input_semantic_search_tool]
+            tools=[self.health_trend_tool, self.pg_rag_tool, self.pg_summary_tool, self.input_summary_tool, self.input_semantic_search_tool]
         )
 
     def wellbeing_agent(self):
@@ -7,16 +7,21 @@ import logging
 import nest_asyncio
 import json
 import time
+import uuid
+import tempfile
 
 from agents import Agents
+from crew_memory import DirectoryMemoryCrew
+from dag_crew import DagCrew
 from tools.toolset import Toolset
 from tools.query_engine_tool import MedicalReportRagPipeline
-from tasks import AgentTasks
+from tasks import AgentTasks, task_input_fields
+from run_cache import RunCache, ingest_watermark_version
+from job_runner import job_runner
 
-from utils import StreamToExpander
 import streamlit as st
 from streamlit_date_picker import date_range_picker, PickerType
-from crewai import Crew, Process
+from crewai import Process
 
 from langchain_openai import ChatOpenAI
 
@@ -32,8 +37,15 @@ dotenv_path = 'src/.env'
 load_dotenv(dotenv_path)
 
 model_name = os.getenv("OPENAI_MODEL_NAME")
+# Crew execution: 'dag' runs independent tasks concurrently, 'hierarchical' lets a manager LLM run them one by one
+crew_process = os.getenv("CREW_PROCESS", "dag")
+crew_max_parallel_tasks = int(os.getenv("CREW_MAX_PARALLEL_TASKS", 3))
 
 input_dir = "src/tools/data/inputs"
+output_dir = "src/tools/data/outputs"
+fitness_details_file = "src/tools/data/fitness_details.json"
+# Seconds between progress updates of a running plan generation
+job_poll_interval = float(os.getenv("JOB_POLL_INTERVAL", 2))
 
 def setup_page():
     st.set_page_config(
@@ -46,10 +58,29 @@ def setup_page():
         }
     )
 
+def save_uploaded_file(uploaded_file, directory):
+    """
+    Save an uploaded file to a temporary file and move it into place, so a build reading the
+    directory never sees it partially written.
+    """
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix='.part')
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(uploaded_file.getbuffer())
+        os.replace(temp_path, os.path.join(directory, uploaded_file.name))
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
 def main_page():
     st.title("Personalized Fitness Plan Generator")
     st.write("Create a fitness plan tailored to your preferences and goals.")
 
+    # Each browser session keeps its uploads, and their vector collections, to itself
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = uuid.uuid4().hex
+    session_input_dir = os.path.join(input_dir, st.session_state['session_id'])
+
     # User Demographics
     with st.expander("User Demographics"):
         age = st.number_input("Enter your age", min_value=10, max_value=100, value=st.session_state.get('age', 25))
@@ -68,12 +99,18 @@ def main_page():
         if medical_report:
             st.session_state['medical_report_uploaded_status'] = True
             
-            save_uploaded_files_path = "src/tools/data/inputs/"
-            for uploaded_file in medical_report:
-                save_path = os.path.join(save_uploaded_files_path, uploaded_file.name)
-                with open(save_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                st.toast(f"Uploaded and saved: {uploaded_file.name}")
+            # Files are only saved when the uploads change, as a build may be reading the saved ones
+            uploaded_files = sorted((uploaded_file.name, uploaded_file.size) for uploaded_file in medical_report)
+            if st.session_state.get('rag_pipeline_files') != uploaded_files:
+                os.makedirs(session_input_dir, exist_ok=True)
+                for uploaded_file in medical_report:
+                    save_uploaded_file(uploaded_file, session_input_dir)
+                    st.toast(f"Uploaded and saved: {uploaded_file.name}")
+                # Index the uploaded reports in the background while the rest of the form is filled in
+                rag_pipeline = MedicalReportRagPipeline(document_dir=session_input_dir, session_id=st.session_state['session_id'])
+                rag_pipeline.start_background_build()
+                st.session_state['rag_pipeline'] = rag_pipeline
+                st.session_state['rag_pipeline_files'] = uploaded_files
         else:
             st.session_state['medical_report_uploaded_status'] = False
         weight = st.number_input("Enter your weight (kg)", min_value=30, max_value=200, value=st.session_state.get('weight', 70), step=1)
@@ -115,8 +152,9 @@ def main_page():
     daily_goal = st.text_area("Describe your fitness goal and current feelings", value=st.session_state.get('daily_goal', ''))
     st.session_state['daily_goal'] = daily_goal
 
-    # Generate Plan Button
-    button_clicked = st.button("Generate Fitness Plan")
+    # Generate Plan Button. Plans are generated in background jobs, one at a time per session
+    job = job_runner.get(st.session_state['job_id']) if st.session_state.get('job_id') else None
+    button_clicked = st.button("Generate Fitness Plan", disabled=job is not None and not job.done)
     if button_clicked:
         st.session_state['workflow_completed'] = False 
         fitness_details = {
@@ -136,48 +174,92 @@ def main_page():
             "daily_goal": st.session_state['daily_goal']
         }
 
-        # Convert the dictionary to a JSON string and save it to a file
-        json_filename = "src/tools/data/fitness_details.json"
-        with open(json_filename, "w") as json_file:
-            json.dump(fitness_details, json_file, indent=4)
-
+        rag_pipeline = st.session_state.get('rag_pipeline') if st.session_state['medical_report_uploaded_status'] else None
+        if rag_pipeline is None:
+            rag_pipeline = MedicalReportRagPipeline(document_dir=session_input_dir, session_id=st.session_state['session_id'])
+        job = job_runner.submit(run_fitness_crew, fitness_details, rag_pipeline)
+        st.session_state['job_id'] = job.job_id
         st.success("Preference and goals received!")
 
-        # Directly initiate the agentic crew after saving the JSON
-        with st.spinner("Initiating Fitness Agents...Please wait for process to complete"):
-            time.sleep(5)  
-        fitness_crew = create_agentic_crew()
-        start_time = time.time()
-        st.info('Agentic Workflow Execution started...', icon="1️⃣")
-        with st.status("🤖 **Agents at work...**", state="running", expanded=True) as status:
-            with st.container(height=500, border=False):
-                sys.stdout = StreamToExpander(st)
-                result = fitness_crew.kickoff()
-            status.update(label="✅ Requirement Analysis and Specification Successful!",
-                          state="complete", expanded=False)
-        st.subheader('View Agentic Workflow Outputs', anchor=False, divider="rainbow")
-        st.info("This section allows you to view the outputs of the agentic workflow. Click the link below to access the Output Viewer Page.")
-        st.page_link("pages/1_outputs_viewer.py", label="Output Viewer", icon="1️⃣")
-
-        end_time = time.time()
-        elapsed_time = end_time - start_time
+    if job is not None:
+        show_job_progress(job, session_input_dir)
+
+def show_job_progress(job, session_input_dir):
+    """
+    Show the progress of the session's plan generation job, polling until it is done.
+    """
+    progress = job.progress()
+    st.info(f"Agentic Workflow Execution {progress['status']} (job {job.job_id})", icon="1️⃣")
+    if progress['status'] == 'completed':
+        label, state = "✅ Requirement Analysis and Specification Successful!", "complete"
+    elif progress['status'] == 'failed':
+        label, state = "❌ Agentic Workflow Execution failed", "error"
+    else:
+        label, state = "🤖 **Agents at work...**", "running"
+    with st.status(label, state=state, expanded=not job.done):
+        with st.container(height=500, border=False):
+            for event in progress['events']:
+                st.markdown(event)
+
+    if not job.done:
+        time.sleep(job_poll_interval)
+        st.rerun()
+
+    if progress['status'] == 'failed':
+        st.error(f"Failed to generate the fitness plan. Reason: {progress['error']}")
+        return
+
+    if not st.session_state.get('workflow_completed'):
         # Remove uploaded input document(s)
-        for file_name in os.listdir(input_dir):
-            file_path = os.path.join(input_dir, file_name)
+        for file_name in os.listdir(session_input_dir) if os.path.isdir(session_input_dir) else []:
+            file_path = os.path.join(session_input_dir, file_name)
             try:
                 os.remove(file_path)
                 st.toast("Uploaded document(s) removed from App.")
             except Exception as e:
                 st.error(f'Failed to delete {file_path}. Reason: {e}')
-    
-        st.info(f"Time executed: {elapsed_time:.2f} seconds", icon="1️⃣")
-
         st.session_state['workflow_completed'] = True
+    st.session_state['outputs_dir'] = job.outputs_dir
+
+    st.subheader('View Agentic Workflow Outputs', anchor=False, divider="rainbow")
+    st.info("This section allows you to view the outputs of the agentic workflow. Click the link below to access the Output Viewer Page.")
+    st.page_link("pages/1_outputs_viewer.py", label="Output Viewer", icon="1️⃣")
+    st.info(f"Time executed: {progress['elapsed']:.2f} seconds", icon="1️⃣")
+
+def describe_step(step):
+    """
+    Progress event of an agent step: the tools it used, or its answer.
+    """
+    if isinstance(step, list):
+        return "\n".join(f"🔧 Used tool: {getattr(action, 'tool', 'unknown')}" for action, _ in step)
+    return "💬 An agent reached its answer"
+
+def run_fitness_crew(job, fitness_details, rag_pipeline):
+    """
+    Generate a fitness plan in a job's workspace, reporting progress to the job.
+
+    Returns:
+        str: The final output of the crew.
+    """
+    fitness_details_path = os.path.join(job.workspace, 'fitness_details.json')
+    with open(fitness_details_path, "w") as json_file:
+        json.dump(fitness_details, json_file, indent=4)
+
+    fitness_crew = create_agentic_crew(rag_pipeline, fitness_details, workspace=job.workspace, progress=job.log)
+    job.log("Initiating Fitness Agents")
+    result = fitness_crew.kickoff()
+    logging.info(f"Tool cache: {Toolset().cache_report()}")
+    return result.raw
 
-def create_agentic_crew():
+def create_agentic_crew(query_engine_tools=None, fitness_details=None, workspace=None, progress=None):
     tool_set = Toolset()
-    query_engine_tools = MedicalReportRagPipeline(document_dir=input_dir)
-    agents = Agents(tool_set, query_engine_tools)
+    # The pipeline builds its indexes on first use, so runs that never query the reports skip the RAG work
+    if query_engine_tools is None:
+        query_engine_tools = MedicalReportRagPipeline(document_dir=input_dir)
+    # A run in a workspace reads its fitness details from, and writes its outputs to, that workspace only
+    fitness_details_path = os.path.join(workspace, 'fitness_details.json') if workspace else fitness_details_file
+    website_search_dir = os.path.join(workspace, 'website_search') if workspace else None
+    agents = Agents(tool_set, query_engine_tools, fitness_details_path, website_search_dir)
     data_ingestion_and_interpretation_agent = agents.data_ingestion_and_interpretation_agent()
     health_monitoring_agent = agents.health_monitoring_agent()
     wellbeing_agent = agents.wellbeing_agent()
@@ -190,40 +272,85 @@ def create_agentic_crew():
         wellbeing_agent,
         fitness_coach_agent,
         nutritionist_agent,
+        base_output_path=os.path.join(workspace, 'outputs') if workspace else output_dir,
     )
 
+    # The wellbeing, workout and nutrition plans only build on the persona and the health report
     data_ingestion_task = agent_tasks.create_data_ingestion_task()
-    health_monitoring_task = agent_tasks.create_health_monitoring_task()
-    wellbeing_task = agent_tasks.create_wellbeing_task()
-    fitness_coach_task = agent_tasks.create_fitness_coach_task()
-    nutritionist_task = agent_tasks.create_nutritionist_task()
-    
+    health_monitoring_task = agent_tasks.create_health_monitoring_task(context=[data_ingestion_task])
+    plan_context = [data_ingestion_task, health_monitoring_task]
+    wellbeing_task = agent_tasks.create_wellbeing_task(context=plan_context)
+    fitness_coach_task = agent_tasks.create_fitness_coach_task(context=plan_context)
+    nutritionist_task = agent_tasks.create_nutritionist_task(context=plan_context)
 
-    fitness_crew = Crew(
-        agents = [
-            data_ingestion_and_interpretation_agent,
-            health_monitoring_agent,
-            wellbeing_agent,
-            fitness_coach_agent,
-            nutritionist_agent,
-        ],
-        tasks = [
-            data_ingestion_task,
-            health_monitoring_task,
-            wellbeing_task,
-            fitness_coach_task,
-            nutritionist_task,
-        ],
-        verbose=True,
-        memory=True,
-        process=Process.hierarchical,
-        manager_llm=ChatOpenAI(model=model_name)
-    )
+    crew_agents = [
+        data_ingestion_and_interpretation_agent,
+        health_monitoring_agent,
+        wellbeing_agent,
+        fitness_coach_agent,
+        nutritionist_agent,
+    ]
+    crew_tasks = [
+        data_ingestion_task,
+        health_monitoring_task,
+        wellbeing_task,
+        fitness_coach_task,
+        nutritionist_task,
+    ]
+
+    # Agent steps and finished tasks are reported as progress events instead of through stdout
+    callbacks = {}
+    if progress is not None:
+        callbacks = {
+            "step_callback": lambda step: progress(describe_step(step)),
+            "task_callback": lambda output: progress(f"✅ **{output.agent}** finished: {output.summary}"),
+        }
+
+    # Concurrent runs keep their crew memories in their own workspaces, so they do not see each other's
+    memory_dir = os.path.join(workspace, 'memory') if workspace else None
+
+    if crew_process == 'dag':
+        if fitness_details is None:
+            with open(fitness_details_path) as json_file:
+                fitness_details = json.load(json_file)
+        # Tasks whose definitions, input fields, documents and health data are unchanged reuse their previous output
+        run_cache = RunCache()
+        document_hashes = query_engine_tools.hash_documents()
+        health_data_version = ingest_watermark_version(str(os.getenv('DATABASE_URL')))
+        task_cache_keys = [
+            run_cache.task_key(task, task_input_fields[name], fitness_details, document_hashes, health_data_version)
+            for name, task in zip(['data_ingestion', 'health_monitoring', 'wellbeing', 'fitness_coach', 'nutritionist'], crew_tasks)
+        ]
+        fitness_crew = DagCrew(
+            agents=crew_agents,
+            tasks=crew_tasks,
+            verbose=True,
+            memory=True,
+            memory_dir=memory_dir,
+            process=Process.sequential,
+            max_parallel_tasks=crew_max_parallel_tasks,
+            run_cache=run_cache,
+            task_cache_keys=task_cache_keys,
+            **callbacks,
+        )
+    else:
+        fitness_crew = DirectoryMemoryCrew(
+            agents=crew_agents,
+            tasks=crew_tasks,
+            verbose=True,
+            memory=True,
+            memory_dir=memory_dir,
+            process=Process.hierarchical,
+            manager_llm=ChatOpenAI(model=model_name),
+            **callbacks,
+        )
     
     return fitness_crew
 
 def main():
     setup_page()
+    # Build the shared tools in the background once per process, so the first crew run does not wait on them
+    Toolset().warm_up(wait=False)
     main_page()
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+"""
+Chunking benchmark for the medical report RAG pipeline.
+
+Splits the sample reports with each chunking mode, indexes the chunks in an in-memory vector index and
+measures, per mode: embedding calls and texts spent on chunking and on indexing, wall time, and the
+retrieval hit rate at top-k. Queries come from a JSON file of {"query": ..., "expected": ...} objects,
+where a query is a hit when a retrieved chunk contains the expected text, or are sampled as sentences
+from the reports themselves.
+
+The hashing embedding backend runs without network access; pass --embedding-backend nomic to measure
+against the production embeddings.
+
+Usage:
+    python src/chunking_benchmark.py --input-dir reports/ --modes semantic fast --output chunking.json
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+from llama_index.core import SimpleDirectoryReader, VectorStoreIndex
+
+from tools.chunking import create_text_splitter
+from tools.embedding_backends import create_embed_model
+from tools.embedding_scheduler import ScheduledEmbedding
+
+def normalize(text):
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+def sample_queries(documents, count, seed):
+    """
+    Sample sentences from the documents as queries that should retrieve the chunk containing them.
+    """
+    sentences = [
+        sentence.strip()
+        for document in documents
+        for sentence in re.split(r"(?<=[.!?])\s+|\n+", document.text)
+        if len(sentence.strip()) >= 40
+    ]
+    rng = random.Random(seed)
+    return [{"query": sentence, "expected": sentence} for sentence in rng.sample(sentences, min(count, len(sentences)))]
+
+def embedding_usage(embed_model):
+    report = embed_model.report()
+    return {"texts": report["texts"], "calls": report["batches"], "seconds": report["seconds"]}
+
+def run_mode(mode, documents, queries, args):
+    """
+    Chunk, index and query the documents with one chunking mode.
+    """
+    split_embed_model = ScheduledEmbedding(create_embed_model(args.embedding_backend))
+    splitter = create_text_splitter(split_embed_model, mode=mode, max_tokens=args.chunk_size, semantic_refine=args.semantic_refine)
+    start = time.perf_counter()
+    nodes = splitter.get_nodes_from_documents(documents)
+    split_seconds = time.perf_counter() - start
+
+    index_embed_model = ScheduledEmbedding(create_embed_model(args.embedding_backend))
+    start = time.perf_counter()
+    index = VectorStoreIndex(nodes, embed_model=index_embed_model)
+    index_seconds = time.perf_counter() - start
+
+    retriever = index.as_retriever(similarity_top_k=args.top_k)
+    hits = 0
+    start = time.perf_counter()
+    for query in queries:
+        retrieved = retriever.retrieve(query["query"])
+        expected = normalize(query["expected"])
+        hits += any(expected in normalize(result.node.get_content()) for result in retrieved)
+    query_seconds = time.perf_counter() - start
+
+    return {
+        "chunks": len(nodes),
+        "mean_chunk_chars": sum(len(node.get_content()) for node in nodes) / len(nodes) if nodes else None,
+        "chunking": {"seconds": split_seconds, "embeddings": embedding_usage(split_embed_model)},
+        "indexing": {"seconds": index_seconds, "embeddings": embedding_usage(index_embed_model)},
+        "retrieval": {
+            "queries": len(queries),
+            "top_k": args.top_k,
+            "hit_rate": hits / len(queries) if queries else None,
+            "mean_ms": query_seconds * 1000 / len(queries) if queries else None,
+        },
+        "total_seconds": split_seconds + index_seconds,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chunking modes of the medical report RAG pipeline.")
+    parser.add_argument('--input-dir', default='src/tools/data/inputs', help="Directory of sample reports.")
+    parser.add_argument('--modes', nargs='+', default=['semantic', 'fast'], help="Chunking modes to compare.")
+    parser.add_argument('--chunk-size', type=int, default=512, help="Maximum tokens per chunk in fast mode.")
+    parser.add_argument('--semantic-refine', action='store_true', help="Refine oversized sections semantically in fast mode.")
+    parser.add_argument('--embedding-backend', default='hashing', help="Embedding backend (see tools/embedding_backends.py).")
+    parser.add_argument('--queries', help="JSON file of {\"query\", \"expected\"} objects.")
+    parser.add_argument('--sample-queries', type=int, default=50, help="Queries to sample from the reports without --queries.")
+    parser.add_argument('--top-k', type=int, default=5, help="Chunks retrieved per query.")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for sampled queries.")
+    parser.add_argument('--output', help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    documents = SimpleDirectoryReader(input_dir=args.input_dir, recursive=True).load_data()
+    if args.queries:
+        with open(args.queries) as f:
+            queries = json.load(f)
+    else:
+        queries = sample_queries(documents, args.sample_queries, args.seed)
+
+    report = {
+        "parameters": {key: value for key, value in vars(args).items() if key != 'output'},
+        "documents": len(documents),
+        "modes": {mode: run_mode(mode, documents, queries, args) for mode in args.modes},
+    }
+
+    output = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import os
+import shutil
+from typing import Optional
+
+from pydantic import Field, model_validator
+from crewai import Crew
+from crewai.memory.entity.entity_memory import EntityMemory
+from crewai.memory.long_term.long_term_memory import LongTermMemory
+from crewai.memory.memory import Memory
+from crewai.memory.short_term.short_term_memory import ShortTermMemory
+from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
+from crewai.memory.storage.rag_storage import FakeLLM, RAGStorage
+from embedchain import App
+
+class DirectoryRAGStorage(RAGStorage):
+    """
+    crewai's RAG memory storage, kept in the given directory instead of crewai's process-wide storage directory.
+    """
+    def __init__(self, type, storage_dir, allow_reset=True, embedder_config=None, crew=None):
+        if not os.getenv("OPENAI_API_KEY") and not os.getenv("OPENAI_BASE_URL") == "https://api.openai.com/v1":
+            os.environ["OPENAI_API_KEY"] = "fake"
+
+        agents = "_".join(self._sanitize_role(agent.role) for agent in (crew.agents if crew else []))
+        config = {
+            "app": {"config": {"name": type, "collect_metrics": False, "log_level": "ERROR"}},
+            "chunker": {"chunk_size": 5000, "chunk_overlap": 100, "length_function": "len", "min_chunk_size": 150},
+            "vectordb": {
+                "provider": "chroma",
+                "config": {"collection_name": type, "dir": f"{storage_dir}/{type}/{agents}", "allow_reset": allow_reset},
+            },
+        }
+        if embedder_config:
+            config["embedder"] = embedder_config
+        self.type = type
+        self.storage_dir = storage_dir
+        self.app = App.from_config(config=config)
+        self.app.llm = FakeLLM()
+        if allow_reset:
+            self.app.reset()
+
+    def reset(self) -> None:
+        try:
+            shutil.rmtree(f"{self.storage_dir}/{self.type}")
+        except Exception as e:
+            raise Exception(f"An error occurred while resetting the {self.type} memory: {e}")
+
+def memory_on(memory_class, storage):
+    """
+    Create a crewai memory on the given storage, without creating the default storage of the memory class.
+    """
+    memory = memory_class.__new__(memory_class)
+    Memory.__init__(memory, storage)
+    return memory
+
+class DirectoryMemoryCrew(Crew):
+    """
+    Crew whose memory is stored in memory_dir when it is set.
+
+    crewai keeps the memory of every crew under one storage directory per process, so crews running
+    at the same time would read, and reset, each other's memories. A crew with a memory_dir of its
+    own keeps its short-term, long-term and entity memories apart from all other crews.
+    """
+    memory_dir: Optional[str] = Field(default=None, description="Directory of the crew's memory storage.")
+
+    @model_validator(mode="after")
+    def create_crew_memory(self) -> "DirectoryMemoryCrew":
+        if self.memory and self.memory_dir:
+            os.makedirs(self.memory_dir, exist_ok=True)
+            self._long_term_memory = memory_on(
+                LongTermMemory, LTMSQLiteStorage(db_path=os.path.join(self.memory_dir, 'long_term_memory_storage.db'))
+            )
+            self._short_term_memory = memory_on(
+                ShortTermMemory,
+                DirectoryRAGStorage('short_term', self.memory_dir, embedder_config=self.embedder, crew=self),
+            )
+            self._entity_memory = memory_on(
+                EntityMemory,
+                DirectoryRAGStorage('entities', self.memory_dir, allow_reset=False, embedder_config=self.embedder, crew=self),
+            )
+        elif self.memory:
+            super().create_crew_memory()
+        return self
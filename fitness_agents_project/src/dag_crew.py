@@ -0,0 +1,63 @@
+import threading
+from typing import Any, List, Optional
+
+from pydantic import Field, PrivateAttr
+from crewai.crews.crew_output import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.formatter import aggregate_raw_outputs_from_tasks
+
+from crew_memory import DirectoryMemoryCrew
+from task_graph import run_task_graph
+
+class DagCrew(DirectoryMemoryCrew):
+    """
+    Crew that runs its tasks as a dependency graph instead of one after another.
+
+    A task's upstream tasks are the ones in its context, and it receives only their outputs. Tasks whose
+    upstream tasks have finished run concurrently on a pool of at most max_parallel_tasks workers,
+    so the run takes about as long as its critical path rather than the sum of all tasks.
+    Each task runs with its own agent, as in the sequential process.
+
+    With a run_cache and a cache key per task, a task whose key has a cached output is not executed:
+    its output and output file are restored from the cache instead.
+    """
+    max_parallel_tasks: int = Field(default=3, description="Maximum number of tasks executed at once.")
+    run_cache: Optional[Any] = Field(default=None, exclude=True, description="RunCache of task outputs.")
+    task_cache_keys: List[Optional[str]] = Field(default_factory=list, description="Run cache key of each task, by task index.")
+    _log_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def _run_sequential_process(self) -> CrewOutput:
+        run_task_graph(self.tasks, self._execute_dag_task, self.max_parallel_tasks)
+        # The last task in the list is the final output, as in the sequential process
+        return self._create_crew_output([self.tasks[-1].output])
+
+    def _execute_dag_task(self, task, task_index):
+        """
+        Execute one task with the outputs of its upstream tasks as context, or restore its cached output.
+        """
+        cache_key = self.task_cache_keys[task_index] if self.run_cache is not None and task_index < len(self.task_cache_keys) else None
+        if cache_key is not None:
+            cached = self.run_cache.load(cache_key)
+            if cached is not None:
+                return self._restore_cached_task(task, task_index, cached)
+
+        self._prepare_agent_tools(task)
+        self._log_task_start(task, task.agent.role)
+        context = aggregate_raw_outputs_from_tasks(task.context) if task.context else ""
+        task_output = task.execute_sync(agent=task.agent, context=context, tools=task.agent.tools)
+        with self._log_lock:
+            self._process_task_result(task, task_output)
+            self._store_execution_log(task, task_output, task_index)
+        if cache_key is not None:
+            self.run_cache.store(cache_key, task_output)
+        return task_output
+
+    def _restore_cached_task(self, task, task_index, cached):
+        self._logger.log("info", f"== Reusing cached output of task: {task.description}", color=self._logging_color)
+        task_output = TaskOutput(description=task.description, raw=cached["raw"], agent=cached["agent"])
+        task.output = task_output
+        if task.output_file:
+            task._save_file(task_output.raw)
+        with self._log_lock:
+            self._store_execution_log(task, task_output, task_index)
+        return task_output
@@ -0,0 +1,139 @@
+import os
+import time
+import uuid
+import shutil
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Every run gets its own workspace for its fitness details and generated outputs
+jobs_path = 'src/tools/data/runs/'
+# Number of plan generations running at once, further jobs wait in the queue
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+# Seconds finished jobs, and their workspaces, are kept for the UI
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", 86400))
+
+class Job:
+    """
+    A queued or running plan generation, with its workspace and progress events.
+    """
+    def __init__(self, job_id, workspace):
+        self.job_id = job_id
+        self.workspace = workspace
+        self.status = 'queued'
+        self.events = []
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.lock = threading.Lock()
+
+    @property
+    def outputs_dir(self):
+        return os.path.join(self.workspace, 'outputs')
+
+    @property
+    def done(self):
+        return self.status in ('completed', 'failed')
+
+    def log(self, message):
+        """
+        Record a progress event, for the UI to poll.
+        """
+        with self.lock:
+            self.events.append((time.time(), message))
+
+    def progress(self, since=0):
+        """
+        Returns:
+            dict: The status, elapsed seconds, error and progress events from index since onwards.
+        """
+        with self.lock:
+            end = self.finished or time.time()
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "elapsed": end - self.started if self.started else 0.0,
+                "error": self.error,
+                "events": [message for _, message in self.events[since:]],
+            }
+
+class JobRunner:
+    """
+    Job queue running plan generations on a pool of worker threads, off the Streamlit script threads.
+
+    Threads rather than processes, so the jobs share the process-wide tools, tool cache and the
+    report pipelines of the sessions. Each job gets a job id and a workspace directory of its own.
+    """
+    def __init__(self, max_workers=JOB_WORKERS, jobs_path=jobs_path, retention=JOB_RETENTION):
+        self.jobs_path = jobs_path
+        self.retention = retention
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fitness-job')
+        self.lock = threading.Lock()
+        self.jobs = {}
+
+    def submit(self, run, *args, **kwargs):
+        """
+        Queue run(job, *args, **kwargs) in a new job.
+
+        Returns:
+            Job: The job, whose progress can be polled with its job id.
+        """
+        self.evict_finished()
+        job_id = uuid.uuid4().hex
+        job = Job(job_id, os.path.join(self.jobs_path, job_id))
+        os.makedirs(job.outputs_dir, exist_ok=True)
+        with self.lock:
+            self.jobs[job_id] = job
+        job.log("Queued")
+        self.executor.submit(self.execute, job, run, args, kwargs)
+        return job
+
+    def execute(self, job, run, args, kwargs):
+        with job.lock:
+            job.started = time.time()
+            job.status = 'running'
+        job.log("Started")
+        try:
+            result = run(job, *args, **kwargs)
+        except Exception as e:
+            logging.error(f"Error running job {job.job_id}: {e}")
+            job.log(f"Failed: {e}")
+            self.finish(job, 'failed', error=str(e))
+        else:
+            job.log("Completed")
+            self.finish(job, 'completed', result=result)
+
+    def finish(self, job, status, result=None, error=None):
+        """
+        Mark a job done, after its last progress event. Its finish time is set along with its status,
+        so a done job always has one.
+        """
+        with job.lock:
+            job.result = result
+            job.error = error
+            job.finished = time.time()
+            job.status = status
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def evict_finished(self):
+        """
+        Forget jobs finished more than retention seconds ago and remove their workspaces.
+        """
+        with self.lock:
+            now = time.time()
+            expired = [
+                job for job in self.jobs.values()
+                if job.done and job.finished is not None and now - job.finished > self.retention
+            ]
+            for job in expired:
+                del self.jobs[job.job_id]
+        for job in expired:
+            shutil.rmtree(job.workspace, ignore_errors=True)
+
+# Shared by every session of the app process
+job_runner = JobRunner()
@@ -25,7 +25,8 @@ def main():
     st.header('Generated Fitness Plan and Related Outputs')
     st.subheader('Results Derived from the Personalized Fitness Plan Generator')
 
-    base_path = 'src/tools/data/outputs'  # Adjust the path as necessary
+    # Outputs of the session's last plan generation, which runs in a workspace of its own
+    base_path = st.session_state.get('outputs_dir', 'src/tools/data/outputs')
 
     files = [
         "health_report_analysis.md",
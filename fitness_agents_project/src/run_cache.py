@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from sqlalchemy import create_engine, text
+
+# Task outputs of previous crew runs, one JSON file per task cache key
+run_cache_path = os.getenv("RUN_CACHE_PATH", 'src/tools/data/run_cache/')
+# Seconds cached outputs are reused; newly ingested health data invalidates them sooner through the ingest watermark
+RUN_CACHE_TTL = int(os.getenv("RUN_CACHE_TTL", 86400))
+
+def canonical_hash(value):
+    """
+    SHA-256 of the canonical JSON form of a value: sorted keys and no insignificant whitespace.
+    """
+    return hashlib.sha256(json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode()).hexdigest()
+
+def task_definition(task):
+    """
+    The prompt and agent definition of a task, whose changes invalidate its cached output. Where the output
+    is written is left out, as every run writes to its own workspace.
+    """
+    agent = task.agent
+    return {
+        "description": task.description,
+        "expected_output": task.expected_output,
+        "agent": {
+            "role": agent.role,
+            "goal": agent.goal,
+            "backstory": agent.backstory,
+            "tools": sorted(tool.name for tool in agent.tools or []),
+        } if agent else None,
+    }
+
+def ingest_watermark_version(db_uri):
+    """
+    Version of the Apple Watch data in the health database, advanced by every ingest that writes samples.
+
+    Returns:
+        int: The version, or None when it cannot be read.
+    """
+    try:
+        engine = create_engine(db_uri.replace('postgres://', 'postgresql://'))
+        try:
+            with engine.connect() as connection:
+                return connection.execute(text("SELECT version FROM ingest_watermark WHERE id = 1")).scalar()
+        finally:
+            engine.dispose()
+    except Exception as e:
+        logging.error(f"Error reading the ingest watermark: {e}")
+        return None
+
+class RunCache:
+    """
+    Disk cache of crew task outputs, so unchanged tasks are not executed again.
+
+    A task's key is a canonical hash of its own and its upstream tasks' definitions, the input fields it
+    depends on, when it depends on 'documents', the content hashes of the uploaded reports and, when it
+    depends on 'health_data', the ingest watermark version of the health database.
+    """
+    def __init__(self, cache_path=run_cache_path, ttl=RUN_CACHE_TTL):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+        os.makedirs(self.cache_path, exist_ok=True)
+        self.evict_expired()
+
+    def task_key(self, task, input_fields, inputs, document_hashes=(), health_data_version=None):
+        """
+        Cache key of a task for the given inputs.
+
+        Args:
+            task (Task): The task, with its upstream tasks in its context.
+            input_fields (list): Input fields the task depends on, 'documents' for the uploaded reports and
+                'health_data' for the health database.
+            inputs (dict): The fitness details entered in the UI.
+            document_hashes (iterable): Content hashes of the uploaded reports.
+            health_data_version (int): Ingest watermark version of the health database.
+
+        Returns:
+            str: The key, or None when the task depends on the health data and its version is unknown,
+                so the task is not cached.
+        """
+        if 'health_data' in input_fields and health_data_version is None:
+            return None
+        definitions, stack = [], [task]
+        while stack:
+            current = stack.pop()
+            definition = canonical_hash(task_definition(current))
+            if definition not in definitions:
+                definitions.append(definition)
+                stack.extend(current.context or [])
+        return canonical_hash({
+            "definitions": definitions,
+            "inputs": {field: inputs.get(field) for field in input_fields if field not in ('documents', 'health_data')},
+            "documents": sorted(document_hashes) if 'documents' in input_fields else None,
+            "health_data": health_data_version if 'health_data' in input_fields else None,
+        })
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_path, f"{key}.json")
+
+    def load(self, key):
+        """
+        Returns:
+            dict: The cached output of the task with this key, or None when missing or expired.
+        """
+        path = self.entry_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        with self.lock:
+            if entry is None or time.time() - entry["created"] > self.ttl:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        return entry
+
+    def store(self, key, task_output):
+        entry = {"raw": task_output.raw, "agent": task_output.agent, "created": time.time()}
+        path = self.entry_path(key)
+        # Written to a temporary file first, so concurrent runs never read a partial entry
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(temporary_path, path)
+        except OSError as e:
+            logging.error(f"Error storing run cache entry {key}: {e}")
+
+    def evict_expired(self):
+        for file_name in os.listdir(self.cache_path):
+            path = os.path.join(self.cache_path, file_name)
+            try:
+                if time.time() - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+            except OSError as e:
+                logging.error(f"Error evicting run cache entry {path}: {e}")
@@ -0,0 +1,43 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+def run_task_graph(tasks, execute, max_workers, upstream=lambda task: task.context or []):
+    """
+    Run tasks as a dependency graph: a task starts as soon as all its upstream tasks have finished, and
+    tasks whose upstream tasks have finished run concurrently on a pool of at most max_workers threads.
+    If a task fails, tasks not yet started are cancelled and the error is raised.
+
+    Args:
+        tasks (list): The tasks, in list order.
+        execute (callable): Runs execute(task, task_index) for a task on a worker thread.
+        max_workers (int): Maximum number of tasks executed at once.
+        upstream (callable): Returns the upstream tasks of a task, by default the tasks in its context.
+
+    Raises:
+        ValueError: When some tasks depend on tasks outside the list or on each other in a cycle.
+    """
+    upstream_ids = {id(task): [id(other) for other in upstream(task)] for task in tasks}
+    pending = list(enumerate(tasks))
+    finished = set()
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='dag-task') as executor:
+        while pending or running:
+            for task_index, task in [(i, t) for i, t in pending if all(u in finished for u in upstream_ids[id(t)])]:
+                pending.remove((task_index, task))
+                running[executor.submit(execute, task, task_index)] = task
+
+            if not running:
+                raise ValueError("Task dependencies could not be resolved, check the context of the tasks.")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"Error executing task '{str(getattr(task, 'description', task))[:80]}': {e}")
+                    for other in running:
+                        other.cancel()
+                    raise
+                finished.add(id(task))
@@ -1,6 +1,24 @@
 import os
 from crewai import Task
 
+plan_input_fields = ['age', 'gender', 'fitness_level', 'conditions', 'weight', 'height', 'plan_start_date', 'plan_end_date', 'intensity', 'daily_goal']
+
+# Fields of fitness_details.json each task depends on, directly or through the tasks in its context,
+# with 'documents' standing for the uploaded medical reports and 'health_data' for the Apple Watch data in
+# the database. The run cache keys each task on these only, so changing the dietary restrictions re-runs the
+# persona and nutrition tasks and reuses the others, and newly ingested health data re-runs the health report
+# and the plans built on it.
+task_input_fields = {
+    'data_ingestion': [
+        'age', 'gender', 'fitness_level', 'conditions', 'medical_report_uploaded_status', 'weight', 'height', 'workout_time',
+        'workout_location', 'dietary_restrictions', 'plan_start_date', 'plan_end_date', 'intensity', 'daily_goal'
+    ],
+    'health_monitoring': ['age', 'gender', 'fitness_level', 'conditions', 'medical_report_uploaded_status', 'weight', 'height', 'daily_goal', 'documents', 'health_data'],
+    'wellbeing': plan_input_fields + ['medical_report_uploaded_status', 'documents', 'health_data'],
+    'fitness_coach': plan_input_fields + ['medical_report_uploaded_status', 'workout_time', 'workout_location', 'documents', 'health_data'],
+    'nutritionist': plan_input_fields + ['medical_report_uploaded_status', 'dietary_restrictions', 'documents', 'health_data'],
+}
+
 class AgentTasks:
     def __init__(
             self,
@@ -9,16 +27,17 @@ class AgentTasks:
             wellbeing_agent,
             fitness_coach_agent,
             nutritionist_agent,
+            base_output_path='src/tools/data/outputs',
         ):
         self.data_ingestion_and_interpretation_agent = data_ingestion_and_interpretation_agent
         self.health_monitoring_agent = health_monitoring_agent
         self.wellbeing_agent = wellbeing_agent
         self.fitness_coach_agent = fitness_coach_agent
         self.nutritionist_agent = nutritionist_agent
-        self.base_output_path = f'src/tools/data/outputs'
+        self.base_output_path = base_output_path
 
     
-    def create_data_ingestion_task(self):
+    def create_data_ingestion_task(self, context=None):
         return Task(
             description=(
                 "Collect and understand the user fitness plan requirements from the application UI. "
@@ -30,14 +49,17 @@ class AgentTasks:
                 "demographics information, fitness profile, workout preferences, dietary considerations, goal setting and plan duration. "
             ),
             agent=self.data_ingestion_and_interpretation_agent,
+            context=context,
             output_file=f'{self.base_output_path}/user_persona.md',
         )
 
-    def create_health_monitoring_task(self):
+    def create_health_monitoring_task(self, context=None):
         return Task(
             description=(
                 "Analyze and interpret health and fitness data collected from the user's Apple Watch, providing personalized insights and recommendations based on their user persona and goals."
-                "This includes analyzing key health metrics, identifying trends and patterns, and offering actionable advice."
+                "This includes analyzing key health metrics, identifying trends and patterns, and offering actionable advice. "
+                "Base the health metrics summary, trend analysis and alerts on the precomputed output of the Health Trend Analysis Tool, "
+                "use the daily and weekly health data summaries for further context, and only search the raw health data for specific readings."
             ),
             expected_output=(
                 "Generate a health report with the following sections:\n"
@@ -47,10 +69,11 @@ class AgentTasks:
                 "4. **Alerts and Warnings** (If any)\n"
             ),
             agent=self.health_monitoring_agent,
+            context=context,
             output_file=f'{self.base_output_path}/health_report_analysis.md',
         )
     
-    def create_wellbeing_task(self):
+    def create_wellbeing_task(self, context=None):
         return Task(
             description=(
                 "Curate personalized music or podcast recommendations that align with the user's fitness goals, derived from their current mental state or mood when possible from Spotify. "
@@ -62,10 +85,11 @@ class AgentTasks:
                 "2. **Recovery Recommendations**:\n"
             ),
             agent=self.wellbeing_agent,
+            context=context,
             output_file=f'{self.base_output_path}/wellbeing_plan.md',
         )
     
-    def create_fitness_coach_task(self):
+    def create_fitness_coach_task(self, context=None):
         return Task(
             description=(
             "Design and implement personalized workout plans that align with the user’s fitness level and goals, current health state, targeted focus areas and the respective plan start and end date. "
@@ -80,10 +104,11 @@ class AgentTasks:
                 "4. **Location and Environmental Adjustments**:\n"
             ),
             agent=self.fitness_coach_agent,
+            context=context,
             output_file=f'{self.base_output_path}/workout_plan.md',
         )
 
-    def create_nutritionist_task(self):
+    def create_nutritionist_task(self, context=None):
         return Task(
             description=(
                 "Develop and manage tailored nutrition plans that align with the user’s fitness level and goals, dietary preferences, health requirements and the respective plan start and end date.  "
@@ -97,6 +122,7 @@ class AgentTasks:
                 "4. **Shopping List**:\n"
             ),
             agent=self.nutritionist_agent,
+            context=context,
             output_file=f'{self.base_output_path}/nutrition_plan.md',
         )
 
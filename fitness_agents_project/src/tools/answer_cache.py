@@ -0,0 +1,116 @@
+import re
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from llama_index.core.base.base_query_engine import BaseQueryEngine
+
+def normalize_query(query):
+    """
+    Normalize a query for exact matching: case, surrounding punctuation and whitespace are ignored.
+    """
+    return re.sub(r"\s+", " ", query.lower()).strip(" \t\n?!.,;:")
+
+class CachedQueryEngine(BaseQueryEngine):
+    """
+    Query engine wrapper that answers repeated questions from a cache instead of the LLM.
+
+    A query hits the cache when its normalized text matches a previous query, or when its embedding
+    has a cosine similarity of at least similarity_threshold with one. Entries are scoped to the index
+    version, so answers over an older set of documents are never returned.
+    """
+    def __init__(self, query_engine, embed_model, index_version, similarity_threshold=0.95, max_entries=256):
+        super().__init__(callback_manager=None)
+        self.query_engine = query_engine
+        self.embed_model = embed_model
+        self.index_version = index_version
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        # (index version, normalized query) -> (query embedding, response), least recently used first
+        self.entries = OrderedDict()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    def _get_prompt_modules(self):
+        return {}
+
+    def lookup_exact(self, version, normalized):
+        """
+        Find a cached response for a previous query with the same normalized text.
+        """
+        with self.lock:
+            key = (version, normalized)
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.stats["exact_hits"] += 1
+                return self.entries[key][1]
+            return None
+
+    def lookup_similar(self, version, embedding):
+        """
+        Find a cached response for the most similar previous query, when it is similar enough.
+        Counts a miss when there is none.
+        """
+        with self.lock:
+            candidates = [candidate for candidate in self.entries if candidate[0] == version and self.entries[candidate][0] is not None]
+            if candidates and embedding is not None:
+                vectors = np.array([self.entries[candidate][0] for candidate in candidates])
+                query = np.asarray(embedding)
+                similarities = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query) + 1e-12)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    self.entries.move_to_end(candidates[best])
+                    self.stats["semantic_hits"] += 1
+                    return self.entries[candidates[best]][1]
+
+            self.stats["misses"] += 1
+            return None
+
+    def store(self, version, normalized, embedding, response):
+        with self.lock:
+            self.entries[(version, normalized)] = (embedding, response)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def embed(self, query):
+        try:
+            return self.embed_model.get_query_embedding(query)
+        except Exception as e:
+            # Without an embedding the cache still serves exact matches
+            logging.error(f"Error embedding query for the answer cache: {e}")
+            return None
+
+    async def aembed(self, query):
+        try:
+            return await self.embed_model.aget_query_embedding(query)
+        except Exception as e:
+            logging.error(f"Error embedding query for the answer cache: {e}")
+            return None
+
+    def _query(self, query_bundle):
+        version = self.index_version()
+        normalized = normalize_query(query_bundle.query_str)
+        # The query is only embedded when no previous query has the same text
+        response = self.lookup_exact(version, normalized)
+        if response is None:
+            embedding = self.embed(query_bundle.query_str)
+            response = self.lookup_similar(version, embedding)
+            if response is None:
+                response = self.query_engine.query(query_bundle)
+                self.store(version, normalized, embedding, response)
+        logging.info(f"Answer cache: {self.stats}")
+        return response
+
+    async def _aquery(self, query_bundle):
+        version = self.index_version()
+        normalized = normalize_query(query_bundle.query_str)
+        response = self.lookup_exact(version, normalized)
+        if response is None:
+            embedding = await self.aembed(query_bundle.query_str)
+            response = self.lookup_similar(version, embedding)
+            if response is None:
+                response = await self.query_engine.aquery(query_bundle)
+                self.store(version, normalized, embedding, response)
+        logging.info(f"Answer cache: {self.stats}")
+        return response
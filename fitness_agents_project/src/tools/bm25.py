@@ -0,0 +1,123 @@
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter, defaultdict
+
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.schema import NodeRelationship, NodeWithScore, RelatedNodeInfo, TextNode
+
+# Words, and numbers or units with inner separators kept whole: "5.6", "mg/dl", "hba1c", "120/80"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[./,-][a-z0-9]+)*")
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index over text nodes, persisted as JSON next to a vector collection.
+
+    Exact terms such as lab values, drug names and units are matched lexically, where dense embeddings
+    tend to blur them. Nodes are grouped by their source document so they can be removed together.
+    """
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.lock = threading.Lock()
+        # node id -> {"text", "metadata", "ref_doc_id", "length"}
+        self.nodes = {}
+        # term -> {node id: term frequency}
+        self.postings = defaultdict(dict)
+        self.total_length = 0
+
+    def add_nodes(self, nodes):
+        with self.lock:
+            for node in nodes:
+                if node.node_id in self.nodes:
+                    continue
+                text = node.get_content()
+                frequencies = Counter(tokenize(text))
+                for term, frequency in frequencies.items():
+                    self.postings[term][node.node_id] = frequency
+                length = sum(frequencies.values())
+                self.nodes[node.node_id] = {"text": text, "metadata": node.metadata, "ref_doc_id": node.ref_doc_id, "length": length}
+                self.total_length += length
+
+    def delete_ref_doc(self, ref_doc_id):
+        with self.lock:
+            node_ids = [node_id for node_id, node in self.nodes.items() if node["ref_doc_id"] == ref_doc_id]
+            for node_id in node_ids:
+                node = self.nodes.pop(node_id)
+                self.total_length -= node["length"]
+                for term in set(tokenize(node["text"])):
+                    self.postings[term].pop(node_id, None)
+                    if not self.postings[term]:
+                        del self.postings[term]
+
+    def search(self, query, top_k):
+        """
+        Score the nodes against the query terms with Okapi BM25.
+
+        Returns:
+            list: Up to top_k (node, score) pairs, best first, for nodes sharing a term with the query.
+        """
+        with self.lock:
+            if not self.nodes:
+                return []
+            count = len(self.nodes)
+            average_length = self.total_length / count
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for node_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.nodes[node_id]["length"] / average_length)
+                    scores[node_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+            return [(self.text_node(node_id), score) for node_id, score in ranked]
+
+    def text_node(self, node_id):
+        node = self.nodes[node_id]
+        relationships = {}
+        if node["ref_doc_id"]:
+            relationships[NodeRelationship.SOURCE] = RelatedNodeInfo(node_id=node["ref_doc_id"])
+        return TextNode(id_=node_id, text=node["text"], metadata=node["metadata"], relationships=relationships)
+
+    def persist(self, path):
+        with self.lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump({"k1": self.k1, "b": self.b, "nodes": self.nodes}, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a persisted index, rebuilding the postings from the stored node texts.
+        """
+        with open(path) as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        for node_id, node in data["nodes"].items():
+            for term, frequency in Counter(tokenize(node["text"])).items():
+                index.postings[term][node_id] = frequency
+            index.nodes[node_id] = node
+            index.total_length += node["length"]
+        return index
+
+class BM25Retriever(BaseRetriever):
+    """
+    Retriever over a BM25Index.
+    """
+    def __init__(self, bm25_index, similarity_top_k=10):
+        super().__init__()
+        self.bm25_index = bm25_index
+        self.similarity_top_k = similarity_top_k
+
+    def _retrieve(self, query_bundle):
+        return [
+            NodeWithScore(node=node, score=score)
+            for node, score in self.bm25_index.search(query_bundle.query_str, self.similarity_top_k)
+        ]
@@ -0,0 +1,142 @@
+import os
+import re
+from typing import Any, Callable, List, Optional
+
+from llama_index.core import Document
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.node_parser import SemanticSplitterNodeParser
+from llama_index.core.node_parser.interface import TextSplitter
+from llama_index.core.utils import get_tokenizer
+
+# Chunking: 'semantic' splits on embedding breakpoints, 'fast' packs token windows along sentence and heading
+# boundaries, optionally refining oversized sections semantically
+chunking_mode = os.getenv("CHUNKING_MODE", "semantic")
+chunk_size = int(os.getenv("CHUNK_SIZE", 512))
+chunking_semantic_refine = os.getenv("CHUNKING_SEMANTIC_REFINE", "false").lower() == "true"
+
+# Markdown headings, and short colon-terminated or all-caps title lines as found in lab reports. Every word of an
+# all-caps title has a letter, so result rows such as "LDL 140" are not taken for headings
+HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?:#{1,6}[ \t]+\S.*"
+    r"|[A-Z][\w &/(),'-]{2,60}:"
+    r"|(?=[A-Z][^\n]{2,60}$)[A-Z][A-Z0-9&/(),'-]*(?:[ \t]+(?=[A-Z0-9&/(),'-]*[A-Z])[A-Z0-9&/(),'-]+)*)[ \t]*$",
+    re.MULTILINE,
+)
+# Sentence ends and line breaks, so table rows and list items stay whole
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+
+class FastChunker(TextSplitter):
+    """
+    Token-window chunking aligned to heading and sentence boundaries, without embedding anything.
+
+    Sections between headings are kept whole, and consecutive sections are merged greedily into chunks of
+    at most chunk_size tokens. Larger sections are packed greedily by sentence instead, after an optional
+    semantic pass over just those sections when a semantic_refiner node parser is given.
+    """
+    chunk_size: int = Field(default=512, description="Maximum number of tokens per chunk.", gt=0)
+    semantic_refiner: Optional[Any] = Field(
+        default=None, exclude=True, description="Node parser used to split oversized sections by meaning first."
+    )
+    _tokenizer: Callable = PrivateAttr()
+
+    def __init__(self, chunk_size: int = 512, semantic_refiner: Optional[Any] = None, **kwargs: Any):
+        super().__init__(chunk_size=chunk_size, semantic_refiner=semantic_refiner, **kwargs)
+        self._tokenizer = get_tokenizer()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FastChunker"
+
+    def count_tokens(self, text):
+        return len(self._tokenizer(text))
+
+    def section_spans(self, text):
+        """
+        Start and end offsets of the sections of text, each starting at a heading line.
+        """
+        starts = sorted({0, *(match.start() for match in HEADING_PATTERN.finditer(text))})
+        for start, end in zip(starts, starts[1:] + [len(text)]):
+            if text[start:end].strip():
+                yield start, end
+
+    def sentence_spans(self, text):
+        """
+        Start and end offsets of the sentences in text.
+        """
+        start = 0
+        for boundary in SENTENCE_BOUNDARY_PATTERN.finditer(text):
+            if text[start:boundary.start()].strip():
+                yield start, boundary.start()
+            start = boundary.end()
+        if text[start:].strip():
+            yield start, len(text)
+
+    def pack(self, text, spans=None, split=None):
+        """
+        Greedily pack consecutive spans of text, by default its sentences, into chunks of at most chunk_size
+        tokens. A span longer than a chunk is cut by split, by default into word windows.
+        Chunks are slices of the original text, so line breaks in tables and lists are kept.
+        """
+        spans = self.sentence_spans(text) if spans is None else spans
+        split = split or self.split_words
+        chunks, chunk_start, chunk_end, chunk_tokens = [], None, None, 0
+        for start, end in spans:
+            tokens = self.count_tokens(text[start:end])
+            if chunk_start is not None and (tokens > self.chunk_size or chunk_tokens + tokens > self.chunk_size):
+                chunks.append(text[chunk_start:chunk_end].strip())
+                chunk_start, chunk_tokens = None, 0
+            if tokens > self.chunk_size:
+                chunks.extend(split(text[start:end]))
+                continue
+            if chunk_start is None:
+                chunk_start = start
+            chunk_end = end
+            chunk_tokens += tokens
+        if chunk_start is not None:
+            chunks.append(text[chunk_start:chunk_end].strip())
+        return chunks
+
+    def split_words(self, text):
+        """
+        Cut text into windows of whole words of at most chunk_size tokens.
+        """
+        chunks, current, current_tokens = [], [], 0
+        for word in text.split():
+            # Token counts of space-prefixed words add up closely enough to the joined text's
+            tokens = self.count_tokens(' ' + word)
+            if current and current_tokens + tokens > self.chunk_size:
+                chunks.append(' '.join(current))
+                current, current_tokens = [], 0
+            current.append(word)
+            current_tokens += tokens
+        if current:
+            chunks.append(' '.join(current))
+        return chunks
+
+    def split_section(self, section):
+        """
+        Split a section longer than a chunk by sentence, after the optional semantic pass.
+        """
+        pieces = [section]
+        if self.semantic_refiner is not None:
+            pieces = [node.get_content() for node in self.semantic_refiner.get_nodes_from_documents([Document(text=section)])]
+        return [chunk for piece in pieces for chunk in self.pack(piece)]
+
+    def split_text(self, text: str) -> List[str]:
+        return self.pack(text, self.section_spans(text), self.split_section)
+
+def create_text_splitter(embed_model, mode=None, max_tokens=None, semantic_refine=None):
+    """
+    Create the node parser of a chunking mode, by default configured by CHUNKING_MODE, CHUNK_SIZE
+    and CHUNKING_SEMANTIC_REFINE.
+    """
+    mode = mode or chunking_mode
+    semantic_splitter = SemanticSplitterNodeParser(
+        buffer_size=1, breakpoint_percentile_threshold=95, embed_model=embed_model
+    )
+    if mode == 'semantic':
+        return semantic_splitter
+    if mode == 'fast':
+        refine = chunking_semantic_refine if semantic_refine is None else semantic_refine
+        return FastChunker(chunk_size=max_tokens or chunk_size, semantic_refiner=semantic_splitter if refine else None)
+    raise ValueError(f"Unknown chunking mode: {mode}. Expected 'semantic' or 'fast'.")
@@ -0,0 +1,93 @@
+import time
+import queue
+import logging
+import multiprocessing
+
+from llama_index.core import SimpleDirectoryReader
+
+# How often pending files are checked against the timeout, in seconds
+poll_interval = 0.5
+
+# Queue on which a worker process announces each file it starts parsing
+started_files = None
+
+def initialize_worker(started_queue):
+    global started_files
+    started_files = started_queue
+
+def load_file(file_path):
+    """
+    Parse a single file into documents.
+    """
+    return SimpleDirectoryReader(input_files=[file_path]).load_data()
+
+def run_load(load, file_path):
+    """
+    Announce a file and parse it with load. Runs in a worker process.
+    """
+    started_files.put(file_path)
+    return load(file_path)
+
+def iter_loaded_files(file_paths, max_workers, timeout, load=load_file):
+    """
+    Parse files across a process pool and yield (file_path, documents) as each file finishes,
+    so slow files (scanned PDFs, audio, video) do not hold up the others.
+
+    Args:
+        file_paths (list): Paths of the files to parse.
+        max_workers (int): Number of worker processes.
+        timeout (float): Seconds a file may take to parse before it is skipped.
+        load (callable): Function parsing one file path into documents, run in the worker processes.
+    """
+    if not file_paths:
+        return
+    # Spawned workers stay clear of the threads (and their locks) of the Streamlit process
+    context = multiprocessing.get_context('spawn')
+    started_queue = context.Queue()
+    pool = context.Pool(
+        processes=min(max_workers, len(file_paths)),
+        initializer=initialize_worker,
+        initargs=(started_queue,),
+    )
+    # Results and errors are handed over by the pool's result thread as each file finishes
+    finished = queue.Queue()
+    for file_path in file_paths:
+        pool.apply_async(
+            run_load,
+            (load, file_path),
+            callback=lambda documents, file_path=file_path: finished.put((file_path, documents, None)),
+            error_callback=lambda error, file_path=file_path: finished.put((file_path, None, error)),
+        )
+    started = {}
+    timed_out = False
+    try:
+        pending = set(file_paths)
+        while pending:
+            try:
+                file_path, documents, error = finished.get(timeout=poll_interval)
+            except queue.Empty:
+                pass
+            else:
+                if file_path in pending:
+                    pending.discard(file_path)
+                    if error is None:
+                        yield file_path, documents
+                    else:
+                        logging.error(f"Error loading document {file_path}: {error}")
+
+            # A file's clock starts once a worker picks it up, not while the pool is starting or busy
+            now = time.monotonic()
+            while not started_queue.empty():
+                started.setdefault(started_queue.get(), now)
+            for file_path in list(pending):
+                if now - started.get(file_path, now) > timeout:
+                    logging.error(f"Loading document {file_path} timed out after {timeout} seconds")
+                    pending.discard(file_path)
+                    timed_out = True
+    finally:
+        if timed_out or pending:
+            # Workers stuck on a timed out file cannot be cancelled, only terminated
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
@@ -0,0 +1,144 @@
+import os
+import re
+import hashlib
+from typing import Any, List, Optional
+
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+
+# Embedding backend used by the RAG pipeline, one of the names in embedding_backends
+embedding_backend = os.getenv("EMBEDDING_BACKEND", "nomic")
+
+class HashingEmbedding(BaseEmbedding):
+    """
+    Deterministic, dependency-free embedding by feature hashing of word unigrams and bigrams.
+    Meant for tests and offline benchmarks: identical texts always get identical vectors and
+    texts sharing words get similar ones, without any model or network access.
+    """
+    dimensionality: int = Field(default=384, description="Embedding dimensionality.")
+
+    def __init__(self, dimensionality: int = 384, **kwargs: Any):
+        super().__init__(model_name=f"hashing-{dimensionality}", dimensionality=dimensionality, embed_batch_size=2048, **kwargs)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "HashingEmbedding"
+
+    def embed(self, texts):
+        """
+        Embed a batch of texts into an L2-normalized (texts x dimensionality) NumPy array.
+        """
+        rows, columns, signs = [], [], []
+        for row, text in enumerate(texts):
+            words = re.findall(r"\w+", text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                digest = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+                rows.append(row)
+                columns.append(digest % self.dimensionality)
+                # The sign bit keeps colliding features from only ever adding up
+                signs.append(1.0 if digest >> 63 else -1.0)
+
+        vectors = np.zeros((len(texts), self.dimensionality))
+        np.add.at(vectors, (np.array(rows, dtype=int), np.array(columns, dtype=int)), np.array(signs))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self.embed([query])[0].tolist()
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self.embed([text])[0].tolist()
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        return self.embed(texts).tolist()
+
+class LocalEmbedding(BaseEmbedding):
+    """
+    CPU-local sentence-transformer embedding, optionally through its ONNX runtime backend.
+    Requires the optional sentence-transformers dependency.
+    """
+    dimensionality: Optional[int] = Field(default=None, description="Embedding dimensionality.")
+    _model: Any = PrivateAttr()
+
+    def __init__(self, model_name: str, backend: str = "torch", batch_size: int = 64, **kwargs: Any):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError("The local embedding backend requires sentence-transformers: pip install sentence-transformers")
+
+        model_kwargs = {"backend": backend} if backend != "torch" else {}
+        model = SentenceTransformer(model_name, device="cpu", **model_kwargs)
+        super().__init__(
+            model_name=model_name,
+            dimensionality=model.get_sentence_embedding_dimension(),
+            embed_batch_size=batch_size,
+            **kwargs,
+        )
+        self._model = model
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LocalEmbedding"
+
+    def embed(self, texts):
+        """
+        Embed a batch of texts into a normalized (texts x dimensionality) NumPy array.
+        """
+        return self._model.encode(texts, batch_size=self.embed_batch_size, normalize_embeddings=True, convert_to_numpy=True)
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self.embed([query])[0].tolist()
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self.embed([text])[0].tolist()
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        return self.embed(texts).tolist()
+
+def create_nomic_embedding():
+    from llama_index.embeddings.nomic import NomicEmbedding
+    return NomicEmbedding(
+        api_key=os.getenv("NOMIC_API_KEY"),
+        dimensionality=768,
+        model_name="nomic-embed-text-v1.5"
+    )
+
+def create_openai_embedding():
+    from llama_index.embeddings.openai import OpenAIEmbedding
+    return OpenAIEmbedding(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        model=os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+    )
+
+def create_local_embedding():
+    return LocalEmbedding(
+        model_name=os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+        backend=os.getenv("LOCAL_EMBEDDING_RUNTIME", "torch"),
+    )
+
+def create_hashing_embedding():
+    return HashingEmbedding(dimensionality=int(os.getenv("HASHING_EMBEDDING_DIMENSIONALITY", 384)))
+
+# Registry of embedding backends by name
+embedding_backends = {
+    "nomic": create_nomic_embedding,
+    "openai": create_openai_embedding,
+    "local": create_local_embedding,
+    "hashing": create_hashing_embedding,
+}
+
+def create_embed_model(backend=None):
+    """
+    Create the embedding model of a registered backend, by default the one set by EMBEDDING_BACKEND.
+    """
+    backend = backend or embedding_backend
+    if backend not in embedding_backends:
+        raise ValueError(f"Unknown embedding backend: {backend}. Expected one of {', '.join(embedding_backends)}.")
+    return embedding_backends[backend]()
@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from array import array
+from typing import Any, List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+class EmbeddingCache:
+    """
+    Disk-backed embedding store in SQLite, capped at max_entries with least-recently-used eviction.
+    """
+    def __init__(self, path, max_entries):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embedding (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS ix_embedding_last_used ON embedding (last_used)")
+        self.connection.commit()
+        self.clock = self.connection.execute("SELECT COALESCE(MAX(last_used), 0) FROM embedding").fetchone()[0]
+
+    def get_many(self, keys):
+        """
+        Look up embeddings by key and mark the hits as recently used.
+
+        Returns:
+            dict: Embedding keyed by cache key, for the keys found.
+        """
+        found = {}
+        with self.lock:
+            # Stay well below SQLite's limit on bound parameters
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                for key, vector in self.connection.execute(f"SELECT key, vector FROM embedding WHERE key IN ({placeholders})", chunk):
+                    found[key] = array('f', vector).tolist()
+            if found:
+                self.clock += 1
+                self.connection.executemany("UPDATE embedding SET last_used = ? WHERE key = ?", [(self.clock, key) for key in found])
+                self.connection.commit()
+        return found
+
+    def put_many(self, entries):
+        """
+        Store embeddings by key, evicting the least recently used ones beyond max_entries.
+        """
+        if not entries:
+            return
+        with self.lock:
+            self.clock += 1
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO embedding (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array('f', vector).tobytes(), self.clock) for key, vector in entries.items()],
+            )
+            excess = self.connection.execute("SELECT COUNT(*) FROM embedding").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.connection.execute(
+                    "DELETE FROM embedding WHERE key IN (SELECT key FROM embedding ORDER BY last_used LIMIT ?)", (excess,)
+                )
+            self.connection.commit()
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Embedding model wrapper that serves repeated texts from a persistent EmbeddingCache.
+
+    Entries are keyed by the wrapped model's name and dimensionality, whether the text was embedded as a
+    query or a document, and the SHA-256 of the text, so one cache can be shared by every pipeline stage.
+    """
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _cache: EmbeddingCache = PrivateAttr()
+    _namespace: str = PrivateAttr()
+
+    def __init__(self, embed_model: BaseEmbedding, cache: EmbeddingCache, **kwargs: Any):
+        super().__init__(model_name=embed_model.model_name, embed_batch_size=embed_model.embed_batch_size, **kwargs)
+        self._embed_model = embed_model
+        self._cache = cache
+        # Key on the underlying model when it is wrapped, e.g. by ScheduledEmbedding
+        base_model = getattr(embed_model, 'embed_model', embed_model)
+        dimensionality = getattr(base_model, 'dimensionality', None)
+        self._namespace = f"{base_model.class_name()}:{base_model.model_name}:{dimensionality}"
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    @property
+    def namespace(self):
+        """
+        Class, model name and dimensionality of the underlying model, whose vectors are only comparable
+        with vectors from the same namespace.
+        """
+        return self._namespace
+
+    def cache_key(self, kind, text):
+        return f"{self._namespace}:{kind}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def lookup(self, kind, texts):
+        """
+        Split texts into cached embeddings and the distinct texts that still need embedding.
+        """
+        keys = [self.cache_key(kind, text) for text in texts]
+        found = self._cache.get_many(list(set(keys)))
+        missing = list(dict.fromkeys(text for text, key in zip(texts, keys) if key not in found))
+        return keys, found, missing
+
+    def store(self, kind, keys, found, texts, embeddings):
+        """
+        Cache freshly computed embeddings and return the embeddings of all texts in order.
+        """
+        computed = {self.cache_key(kind, text): embedding for text, embedding in zip(texts, embeddings)}
+        self._cache.put_many(computed)
+        found.update(computed)
+        return [found[key] for key in keys]
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        keys, found, missing = self.lookup('query', [query])
+        embeddings = [self._embed_model.get_query_embedding(text) for text in missing]
+        return self.store('query', keys, found, missing, embeddings)[0]
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        keys, found, missing = self.lookup('query', [query])
+        embeddings = [await self._embed_model.aget_query_embedding(text) for text in missing]
+        return self.store('query', keys, found, missing, embeddings)[0]
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> Embedding:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        keys, found, missing = self.lookup('text', texts)
+        embeddings = self._embed_model.get_text_embedding_batch(missing) if missing else []
+        return self.store('text', keys, found, missing, embeddings)
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        keys, found, missing = self.lookup('text', texts)
+        embeddings = await self._embed_model.aget_text_embedding_batch(missing) if missing else []
+        return self.store('text', keys, found, missing, embeddings)
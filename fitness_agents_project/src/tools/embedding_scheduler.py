@@ -0,0 +1,183 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, List
+
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+
+def is_rate_limited(error):
+    """
+    Whether an embedding provider error is an HTTP 429 / rate limit response, judged by the status code of
+    the error or its response (requests, httpx, openai) or by a RateLimitError exception type.
+    """
+    response = getattr(error, 'response', None)
+    status_code = getattr(error, 'status_code', None) or getattr(response, 'status_code', None)
+    return status_code == 429 or any(cls.__name__ == 'RateLimitError' for cls in type(error).__mro__)
+
+def retry_after(error):
+    """
+    Seconds to wait from the provider's Retry-After header, when it sent one.
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+class ScheduledEmbedding(BaseEmbedding):
+    """
+    Embedding model wrapper that sends the texts of all its callers through one shared queue, as provider
+    sized batches of batch_size texts, up to max_in_flight requests at a time, backing off and retrying on
+    rate limits.
+
+    A batch is cut from the queue only once a request slot is free, so texts queued in the meantime by other
+    callers, e.g. the summary and the vector index building concurrently, fill up each other's partial
+    batches. embed_batch_size is the coalescing window: callers such as the node parser and the indexes hand
+    over up to that many texts per call.
+    """
+    _embed_model: BaseEmbedding = PrivateAttr()
+    _batch_size: int = PrivateAttr()
+    _max_in_flight: int = PrivateAttr()
+    _max_retries: int = PrivateAttr()
+    _backoff: float = PrivateAttr()
+    _in_flight: Any = PrivateAttr()
+    _queue: Any = PrivateAttr()
+    _queue_lock: Any = PrivateAttr()
+    _executor: Any = PrivateAttr()
+    _stats_lock: Any = PrivateAttr()
+    _stats: dict = PrivateAttr()
+
+    def __init__(
+        self,
+        embed_model: BaseEmbedding,
+        batch_size: int = 64,
+        max_in_flight: int = 4,
+        max_retries: int = 6,
+        backoff: float = 1.0,
+        coalesce_size: int = 2048,
+        **kwargs: Any,
+    ):
+        super().__init__(model_name=embed_model.model_name, embed_batch_size=coalesce_size, **kwargs)
+        self._embed_model = embed_model
+        self._batch_size = batch_size
+        self._max_in_flight = max_in_flight
+        self._max_retries = max_retries
+        self._backoff = backoff
+        # Shared by all callers, so concurrent index builds together stay within the limit
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        # (text, Future) pairs waiting for a batch, in the order the callers queued them
+        self._queue = deque()
+        self._queue_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='embedding-request')
+        self._stats_lock = threading.Lock()
+        self._stats = {"texts": 0, "batches": 0, "rate_limited": 0, "seconds": 0.0}
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ScheduledEmbedding"
+
+    @property
+    def embed_model(self):
+        return self._embed_model
+
+    def report(self):
+        """
+        Cumulative embedding throughput.
+
+        Returns:
+            dict: Texts, batches, rate limited requests, seconds spent and texts per second.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["texts_per_sec"] = stats["texts"] / stats["seconds"] if stats["seconds"] else None
+        return stats
+
+    def embed_batch(self, texts):
+        """
+        Embed one provider batch, retrying with exponential backoff and jitter on rate limits.
+        The caller holds a request slot, which is kept while backing off.
+        """
+        for attempt in range(self._max_retries + 1):
+            try:
+                # Bypass the wrapped model's own (serial) batching, the batch is already sized
+                return self._embed_model._get_text_embeddings(texts)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self._max_retries:
+                    raise
+                with self._stats_lock:
+                    self._stats["rate_limited"] += 1
+                delay = retry_after(e)
+                if delay is None:
+                    delay = self._backoff * 2 ** attempt * (1 + random.random())
+                logging.warning(f"Embedding request rate limited, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        return self._embed_model.get_query_embedding(query)
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        return await self._embed_model.aget_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> Embedding:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def take_batch(self):
+        """
+        Remove up to batch_size of the oldest queued texts, from whichever callers queued them.
+        """
+        with self._queue_lock:
+            return [self._queue.popleft() for _ in range(min(self._batch_size, len(self._queue)))]
+
+    def send_batch(self, batch):
+        """
+        Embed a batch taken from the queue, resolve the futures of its texts and free its request slot.
+        """
+        try:
+            embeddings = self.embed_batch([text for text, _ in batch])
+            for (_, future), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+        finally:
+            with self._stats_lock:
+                self._stats["batches"] += 1
+            self._in_flight.release()
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        start = time.perf_counter()
+        futures = [Future() for _ in texts]
+        with self._queue_lock:
+            self._queue.extend(zip(texts, futures))
+
+        # Every waiting caller dispatches batches from the shared queue whenever a request slot is free,
+        # until its own texts have been embedded, possibly in batches dispatched by other callers
+        pending = futures
+        while pending:
+            if self._in_flight.acquire(blocking=False):
+                batch = self.take_batch()
+                if batch:
+                    self._executor.submit(self.send_batch, batch)
+                    continue
+                self._in_flight.release()
+            wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+            pending = [future for future in pending if not future.done()]
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self._stats["texts"] += len(texts)
+            self._stats["seconds"] += elapsed
+        logging.info(f"Embedded {len(texts)} texts in {elapsed:.2f}s ({len(texts) / elapsed if elapsed else 0:.1f} texts/s)")
+        return [future.result() for future in futures]
+
+    async def _aget_text_embeddings(self, texts: List[str]) -> List[Embedding]:
+        # Provider clients are mostly synchronous under the hood; the batches already run on worker threads
+        return await asyncio.to_thread(self._get_text_embeddings, texts)
@@ -0,0 +1,206 @@
+import json
+from datetime import date, timedelta
+from typing import Any, Type
+
+import numpy as np
+from crewai_tools import BaseTool
+from pydantic.v1 import BaseModel, Field
+from sqlalchemy import create_engine, text
+
+# Metrics accumulated over the day, summarized by their daily total instead of their daily mean
+CUMULATIVE_METRICS = {
+    'step_count',
+    'active_energy',
+    'basal_energy_burned',
+    'walking_running_distance',
+    'flights_climbed',
+    'apple_exercise_time',
+    'apple_stand_time',
+    'dietary_energy',
+}
+
+# Metrics with dedicated recovery rules: a rising resting heart rate or a falling HRV
+RESTING_HEART_RATE = 'resting_heart_rate'
+HEART_RATE_VARIABILITY = 'heart_rate_variability'
+
+DAILY_ROLLUPS_QUERY = text("""
+SELECT name, units, bucket, mean_qty, sum_qty
+FROM health_data_summary
+WHERE period = 'day' AND bucket >= :since
+ORDER BY name, bucket
+""")
+
+def load_daily_matrix(engine, since, until):
+    """
+    Load the daily rollups into a contiguous (metrics x days) array, with NaN for days without data.
+
+    Returns:
+        tuple: Metric names, their units, the day axis and the value matrix.
+    """
+    days = np.arange(np.datetime64(since), np.datetime64(until) + 1)
+    names, units, rows = [], [], {}
+    with engine.connect() as connection:
+        for name, metric_units, bucket, mean_qty, sum_qty in connection.execute(DAILY_ROLLUPS_QUERY, {"since": since}):
+            if name not in rows:
+                names.append(name)
+                units.append(metric_units)
+                rows[name] = ([], [])
+            rows[name][0].append(np.datetime64(bucket if isinstance(bucket, str) else bucket.isoformat(), 'D'))
+            rows[name][1].append(sum_qty if name in CUMULATIVE_METRICS else mean_qty)
+
+    values = np.full((len(names), len(days)), np.nan)
+    for index, name in enumerate(names):
+        buckets, daily = rows[name]
+        positions = (np.array(buckets) - days[0]).astype(int)
+        in_range = (positions >= 0) & (positions < len(days))
+        values[index, positions[in_range]] = np.array(daily, dtype=float)[in_range]
+    return names, units, days, values
+
+def rolling_mean(values, window):
+    """
+    NaN-aware trailing rolling mean along the day axis, computed for all metrics at once.
+    """
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    sums = np.cumsum(np.pad(filled, ((0, 0), (1, 0))), axis=1)
+    counts = np.cumsum(np.pad(valid, ((0, 0), (1, 0))), axis=1)
+    start = np.maximum(np.arange(1, values.shape[1] + 1) - window, 0)
+    window_sums = sums[:, 1:] - sums[:, start]
+    window_counts = counts[:, 1:] - counts[:, start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+def trailing_zscores(values, window):
+    """
+    Z-score of each day against the mean and standard deviation of the preceding window days.
+    """
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    sums = np.cumsum(np.pad(filled, ((0, 0), (1, 0))), axis=1)
+    squares = np.cumsum(np.pad(filled ** 2, ((0, 0), (1, 0))), axis=1)
+    counts = np.cumsum(np.pad(valid, ((0, 0), (1, 0))), axis=1)
+
+    # Baseline for day i covers days [i - window, i)
+    end = np.arange(values.shape[1])
+    start = np.maximum(end - window, 0)
+    n = counts[:, end] - counts[:, start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (sums[:, end] - sums[:, start]) / n
+        variance = (squares[:, end] - squares[:, start]) / n - mean ** 2
+        std = np.sqrt(np.maximum(variance, 0.0))
+        # Require a week of baseline and some spread before flagging anything
+        return np.where((n >= 7) & (std > 0), (values - mean) / std, np.nan)
+
+def weekly_slopes(days, values):
+    """
+    Least-squares slope of every metric over the window, in units per week.
+    """
+    x = (days - days[0]).astype(float) / 7.0
+    slopes = np.full(values.shape[0], np.nan)
+    for index, row in enumerate(values):
+        valid = ~np.isnan(row)
+        if valid.sum() >= 3:
+            slopes[index] = np.polyfit(x[valid], row[valid], 1)[0]
+    return slopes
+
+def rounded(value, digits=2):
+    """
+    Round a NumPy scalar for JSON output, mapping NaN to None.
+    """
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+def summarize_health_trends(engine, lookback_days=56, z_threshold=2.5, anomaly_days=14, today=None):
+    """
+    Compute a compact trend and anomaly summary over the daily health metric rollups.
+
+    Args:
+        engine: SQLAlchemy engine of the health data database.
+        lookback_days (int): Days of history to analyze.
+        z_threshold (float): Absolute z-score from which a day is flagged as anomalous.
+        anomaly_days (int): Only flag anomalies within this many most recent days.
+
+    Returns:
+        dict: Per metric latest value, 7-day means, week-over-week delta, weekly trend and anomalies,
+        plus recovery alerts.
+    """
+    until = today or date.today()
+    since = until - timedelta(days=lookback_days - 1)
+    names, units, days, values = load_daily_matrix(engine, since, until)
+    if not names:
+        return {"window": {"start": since.isoformat(), "end": until.isoformat()}, "metrics": [], "alerts": []}
+
+    rolling_7d = rolling_mean(values, 7)
+    zscores = trailing_zscores(values, 28)
+    slopes = weekly_slopes(days, values)
+    # Week-over-week: mean of the last 7 days against the 7 days before
+    current_week = rolling_7d[:, -1]
+    previous_week = rolling_7d[:, -8] if len(days) >= 8 else np.full(len(names), np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        wow_pct = (current_week - previous_week) / np.abs(previous_week) * 100
+
+    recent = np.zeros(len(days), dtype=bool)
+    recent[-anomaly_days:] = True
+    flagged = (np.abs(np.nan_to_num(zscores)) >= z_threshold) & recent
+
+    metrics = []
+    for index, name in enumerate(names):
+        valid = np.flatnonzero(~np.isnan(values[index]))
+        latest = valid[-1] if len(valid) else None
+        metrics.append({
+            "name": name,
+            "units": units[index],
+            "aggregate": "daily total" if name in CUMULATIVE_METRICS else "daily mean",
+            "days_with_data": int(len(valid)),
+            "latest": None if latest is None else {"date": str(days[latest]), "value": rounded(values[index, latest])},
+            "mean_7d": rounded(current_week[index]),
+            "mean_prev_7d": rounded(previous_week[index]),
+            "wow_delta": rounded(current_week[index] - previous_week[index]),
+            "wow_pct": rounded(wow_pct[index], 1),
+            "trend_per_week": rounded(slopes[index], 3),
+            "anomalies": [
+                {"date": str(days[day]), "value": rounded(values[index, day]), "z": rounded(zscores[index, day])}
+                for day in np.flatnonzero(flagged[index])
+            ],
+        })
+
+    alerts = []
+    by_name = {metric["name"]: metric for metric in metrics}
+    resting_hr = by_name.get(RESTING_HEART_RATE)
+    if resting_hr and resting_hr["wow_delta"] is not None and resting_hr["wow_delta"] >= 3:
+        alerts.append(f"Resting heart rate is up {resting_hr['wow_delta']} {resting_hr['units']} week over week, a possible sign of fatigue, stress or illness.")
+    hrv = by_name.get(HEART_RATE_VARIABILITY)
+    if hrv and hrv["wow_pct"] is not None and hrv["wow_pct"] <= -10:
+        alerts.append(f"Heart rate variability is down {abs(hrv['wow_pct'])}% week over week, suggesting incomplete recovery.")
+    for metric in metrics:
+        value_units = f" {metric['units']}" if metric['units'] else ''
+        for anomaly in metric["anomalies"]:
+            alerts.append(f"{metric['name']} on {anomaly['date']} was {anomaly['value']}{value_units} (z-score {anomaly['z']}).")
+
+    return {
+        "window": {"start": since.isoformat(), "end": until.isoformat()},
+        "metrics": metrics,
+        "alerts": alerts,
+    }
+
+class HealthTrendToolSchema(BaseModel):
+    """Input for HealthTrendTool."""
+    lookback_days: int = Field(56, description="Number of days of health data history to analyze.")
+
+class HealthTrendTool(BaseTool):
+    name: str = "Health Trend Analysis Tool"
+    description: str = (
+        "A tool that returns a precomputed summary of the user's Apple Watch health metrics: latest values, "
+        "7-day means, week-over-week changes, weekly trends, resting heart rate/HRV recovery alerts and anomalous days."
+    )
+    args_schema: Type[BaseModel] = HealthTrendToolSchema
+    db_uri: str
+    z_threshold: float = 2.5
+
+    def _run(self, **kwargs: Any) -> Any:
+        lookback_days = int(kwargs.get('lookback_days') or 56)
+        engine = create_engine(self.db_uri.replace('postgres://', 'postgresql://'))
+        try:
+            summary = summarize_health_trends(engine, lookback_days=lookback_days, z_threshold=self.z_threshold)
+        finally:
+            engine.dispose()
+        return json.dumps(summary)
@@ -1,24 +1,41 @@
 from llama_index.core import (
-    SimpleDirectoryReader,
     DocumentSummaryIndex,
     VectorStoreIndex,
     StorageContext,
     Settings,
-    get_response_synthesizer
+    get_response_synthesizer,
+    load_index_from_storage
 )
+from llama_index.core.ingestion import run_transformations
+from llama_index.core.base.base_query_engine import BaseQueryEngine
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.retrievers import QueryFusionRetriever
 
-from llama_index.core.node_parser import SemanticSplitterNodeParser
 from llama_index.vector_stores.chroma import ChromaVectorStore
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from llama_index.llms.openai import OpenAI
-from llama_index.embeddings.openai import OpenAIEmbedding
-from llama_index.embeddings.nomic import NomicEmbedding
 from crewai_tools import LlamaIndexTool
 
+from tools.embedding_cache import CachedEmbedding, EmbeddingCache
+from tools.embedding_scheduler import ScheduledEmbedding
+from tools.embedding_backends import create_embed_model
+from tools.answer_cache import CachedQueryEngine
+from tools.chunking import create_text_splitter
+from tools.bm25 import BM25Index, BM25Retriever
+from tools.document_loader import iter_loaded_files
+
 import os
+import json
+import shutil
+import contextlib
+import hashlib
 import logging
 import sys
+import time
+import sqlite3
+import threading
+import weakref
 import nest_asyncio
 
 # Apply nest_asyncio to allow nested event loops
@@ -29,51 +46,356 @@ logging.getLogger().addHandler(logging.StreamHandler(stream=sys.stdout))
 
 # Vector store persistent directory
 persist_vector_store_path = 'src/tools/data/chromadb/'
+# Index metadata persistent directory (per collection: the document manifest and the summary index docstore)
+persist_index_storage_path = 'src/tools/data/index_storage/'
+# Embedding cache shared by the semantic splitter and both indexes, across runs
+embedding_cache_path = 'src/tools/data/embedding_cache.sqlite3'
+embedding_cache_max_entries = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 200000))
+# Embedding requests: texts per request and concurrent requests to the embedding provider
+embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+embedding_max_in_flight = int(os.getenv("EMBEDDING_MAX_IN_FLIGHT", 4))
+
+# Collection name prefixes; every session gets its own collections
+summary_collection_name = 'input-summary'
+semantic_search_collection_name = 'input-semantic-search'
+# Seconds after its last use that a session's collections are dropped
+collection_ttl = int(os.getenv("SESSION_COLLECTION_TTL", 86400))
+# Seconds between refreshes of the last use time of a session's collections while it is querying them
+collection_touch_interval = int(os.getenv("SESSION_COLLECTION_TOUCH_INTERVAL", 60))
+document_exts = ['.pdf', '.docx', '.txt', '.md', '.mp3', '.mp4']
+# Parallel document parsing: worker processes and per-file timeout in seconds
+document_loader_workers = int(os.getenv("DOCUMENT_LOADER_WORKERS", os.cpu_count() or 1))
+document_load_timeout = float(os.getenv("DOCUMENT_LOAD_TIMEOUT", 300))
 
 openai_api_key = os.getenv("OPENAI_API_KEY")
-nomic_api_key = os.getenv("NOMIC_API_KEY")
 model_name = os.getenv("OPENAI_MODEL_NAME")
+# Answer cache: minimum query embedding similarity for a cache hit, and answers kept per tool
+answer_cache_similarity = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.95))
+answer_cache_max_entries = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 256))
+# Hybrid search: chunks sent to the LLM, candidates taken from each of BM25 and vector search, and the vector score weight
+hybrid_top_k = int(os.getenv("HYBRID_TOP_K", 3))
+hybrid_candidate_k = int(os.getenv("HYBRID_CANDIDATE_K", 10))
+hybrid_vector_weight = float(os.getenv("HYBRID_VECTOR_WEIGHT", 0.5))
+
+# Serializes builds of the same index, which share its Chroma collection and storage directory
+index_build_locks = {}
+# Pipelines with an open vector store client; the store is only compacted while no other pipeline has one
+vector_store_clients = weakref.WeakSet()
+
+class LazyQueryEngine(BaseQueryEngine):
+    """
+    Query engine that creates the underlying engine, and so builds its index, on the first query.
+    """
+    def __init__(self, create_query_engine):
+        super().__init__(callback_manager=None)
+        self.create_query_engine = create_query_engine
+        self.query_engine = None
+        self.lock = threading.Lock()
+
+    def get_query_engine(self):
+        with self.lock:
+            if self.query_engine is None:
+                self.query_engine = self.create_query_engine()
+            return self.query_engine
+
+    def _get_prompt_modules(self):
+        return {}
+
+    def _query(self, query_bundle):
+        return self.get_query_engine().query(query_bundle)
+
+    async def _aquery(self, query_bundle):
+        return await self.get_query_engine().aquery(query_bundle)
 
 class MedicalReportRagPipeline:
     """
     Class for a RAG pipeline for medical report to create a summarization and semantic search indices.
     """
-    def __init__(self, document_dir):
+    def __init__(self, document_dir, session_id='default'):
         self.document_dir = document_dir
+        self.session_id = session_id
+        self.summary_collection_name = f"{summary_collection_name}-{session_id}"
+        self.semantic_search_collection_name = f"{semantic_search_collection_name}-{session_id}"
         # Define LLM to be utilize for the RAG pipeline
         self.llm = OpenAI(api_key=openai_api_key, model=model_name)
-        self.embed_model = NomicEmbedding( 
-            api_key=nomic_api_key,
-            dimensionality=768,
-            model_name="nomic-embed-text-v1.5"
+        # Embedding backend (nomic, openai, local or hashing) selected by EMBEDDING_BACKEND
+        self.embedding_scheduler = ScheduledEmbedding(
+            create_embed_model(),
+            batch_size=embedding_batch_size,
+            max_in_flight=embedding_max_in_flight,
+        )
+        self.embed_model = CachedEmbedding(
+            self.embedding_scheduler,
+            EmbeddingCache(embedding_cache_path, embedding_cache_max_entries),
         )
-        self.documents = self.load_documents()
-        self.initialize_models()
-        self.chroma_client = self.initialize_vector_store_client()
-        self.summary_index = self.create_summary_index()
-        self.semantic_search_index = self.create_vector_store_index()
+        # Indexes are built on first use, or ahead of time by start_background_build
+        self.chroma_client = None
+        self.document_hashes = None
+        self.documents_by_hash = {}
+        self.nodes_by_hash = {}
+        self.indexes = {}
+        self.bm25_index = None
+        self.build_thread = None
+        self.last_touched = 0
+        self.prepare_lock = threading.Lock()
+        self.nodes_lock = threading.Lock()
+        self.touch_lock = threading.Lock()
 
-    def load_documents(self):
+    @property
+    def summary_index(self):
+        return self.get_index(self.summary_collection_name, self.create_summary_index)
+
+    @property
+    def semantic_search_index(self):
+        return self.get_index(self.semantic_search_collection_name, self.create_vector_store_index)
+
+    def get_index(self, collection_name, create_index):
+        """
+        Return the index of a collection, building it on first access.
+        """
+        # Prepared before taking the build lock, as evicting expired collections takes every build lock
+        self.prepare()
+        with index_build_locks.setdefault(collection_name, threading.Lock()):
+            if collection_name not in self.indexes:
+                self.indexes[collection_name] = create_index(collection_name)
+            index = self.indexes[collection_name]
+        self.touch_collections()
+        return index
+
+    def touch_collections(self):
         """
-        Load documents from the specified directory.
+        Refresh the last use time of the session's collections, so they are not evicted while the session
+        still queries them. Written at most once every collection_touch_interval seconds.
+        """
+        now = time.time()
+        with self.touch_lock:
+            if now - self.last_touched < collection_touch_interval:
+                return
+            self.last_touched = now
+        for collection_name in list(self.indexes):
+            try:
+                collection = self.chroma_client.get_collection(collection_name)
+                collection.modify(metadata={"session_id": self.session_id, "last_used": now})
+            except Exception as e:
+                logging.error(f"Error refreshing last use of collection {collection_name}: {e}")
+
+    def prepare(self):
+        """
+        Set up the models and the vector store client, and hash the documents to index.
+        """
+        with self.prepare_lock:
+            if self.chroma_client is None:
+                self.initialize_models()
+                self.chroma_client = self.initialize_vector_store_client()
+                if self.chroma_client is not None:
+                    vector_store_clients.add(self)
+                self.evict_expired_collections()
+                self.document_hashes = self.hash_documents()
+
+    def build(self):
+        """
+        Build both indexes concurrently, so embedding for the vector index overlaps with summarization.
+        """
+        summary_thread = threading.Thread(target=lambda: self.summary_index, name='rag-summary-index-build')
+        summary_thread.start()
+        self.semantic_search_index
+        summary_thread.join()
+        logging.info(f"Embedding throughput: {self.embedding_scheduler.report()}")
+
+    def start_background_build(self):
+        """
+        Build both indexes in a background thread, e.g. as soon as documents are uploaded.
+        """
+        if self.build_thread is None:
+            self.build_thread = threading.Thread(target=self.build, name='rag-index-build', daemon=True)
+            self.build_thread.start()
+        return self.build_thread
+
+    def evict_expired_collections(self):
+        """
+        Drop the collections and index storage of sessions not used within the TTL, then compact the store.
+        Collections without a last use time predate session scoping and are dropped as well, including the
+        input-summary and input-semantic-search collections shipped in src/tools/data/chromadb.
+
+        Every index build lock is held meanwhile, so no index is built while collections are dropped. The
+        store's SQLite file is only rewritten while no other pipeline has a vector store client open, as
+        VACUUM must not run under the connections of other clients.
         """
         try:
-            reader = SimpleDirectoryReader(input_dir=self.document_dir, required_exts=['.pdf', '.docx', '.txt', '.md', 'mp3', '.mp4'])
-            documents = reader.load_data()
-            return documents
+            expired = self.expired_collections()
+            if not expired:
+                return
+            with contextlib.ExitStack() as build_locks:
+                for collection_name in sorted(set(list(index_build_locks)) | set(expired)):
+                    build_locks.enter_context(index_build_locks.setdefault(collection_name, threading.Lock()))
+                # Sessions may have queried their collections while the locks were taken
+                expired = self.expired_collections()
+                deleted = 0
+                for collection_name in expired:
+                    try:
+                        self.chroma_client.delete_collection(collection_name)
+                    except Exception as e:
+                        logging.error(f"Error dropping expired collection {collection_name}: {e}")
+                        continue
+                    shutil.rmtree(os.path.join(persist_index_storage_path, collection_name), ignore_errors=True)
+                    deleted += 1
+                    logging.info(f"Dropped expired collection: {collection_name}")
+                if deleted and set(vector_store_clients) <= {self}:
+                    # Deleting collections leaves free pages behind in the store's SQLite file
+                    connection = sqlite3.connect(os.path.join(persist_vector_store_path, 'chroma.sqlite3'))
+                    try:
+                        connection.execute("VACUUM")
+                    finally:
+                        connection.close()
         except Exception as e:
-            logging.error(f"Error loading documents: {e}")
-            return []
-        
+            logging.error(f"Error evicting expired collections: {e}")
+
+    def expired_collections(self):
+        """
+        Names of the collections of other sessions not used within the TTL.
+        """
+        now = time.time()
+        own_collections = (self.summary_collection_name, self.semantic_search_collection_name)
+        return [
+            collection.name for collection in self.chroma_client.list_collections()
+            if collection.name not in own_collections and now - (collection.metadata or {}).get('last_used', 0) > collection_ttl
+        ]
+
+    def load_manifest(self, collection_name):
+        """
+        Load the manifest of documents indexed in a collection, keyed by file content hash.
+        Without a manifest the collection may hold vectors from before it existed, and with a manifest of
+        another embedding namespace (backend, model or dimensionality) its vectors are not comparable with
+        the current model's, so in both cases it is reset.
+        """
+        manifest_path = os.path.join(persist_index_storage_path, collection_name, 'manifest.json')
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as manifest_file:
+                manifest = json.load(manifest_file)
+            if manifest.get('embedding_namespace') == self.embed_model.namespace:
+                return manifest['documents']
+            logging.info(f"Resetting collection {collection_name}, indexed with embedding {manifest.get('embedding_namespace')}")
+
+        try:
+            self.chroma_client.delete_collection(collection_name)
+        except Exception:
+            pass
+        shutil.rmtree(os.path.join(persist_index_storage_path, collection_name), ignore_errors=True)
+        return {}
+
+    def save_manifest(self, collection_name, manifest):
+        """
+        Record the documents indexed in a collection and the embedding namespace they were indexed with.
+        """
+        persist_dir = os.path.join(persist_index_storage_path, collection_name)
+        os.makedirs(persist_dir, exist_ok=True)
+        with open(os.path.join(persist_dir, 'manifest.json'), 'w') as manifest_file:
+            json.dump({'embedding_namespace': self.embed_model.namespace, 'documents': manifest}, manifest_file, indent=4)
+
+    def index_version(self):
+        """
+        Version of the indexed document set, changing whenever a document is added, changed or removed.
+        """
+        self.prepare()
+        return hashlib.sha256(''.join(sorted(self.document_hashes)).encode('utf-8')).hexdigest()
+
+    def queried_index_version(self):
+        """
+        Index version for a query to the answer cache. Every query, answered from the cache or not,
+        counts as a use of the session's collections.
+        """
+        self.touch_collections()
+        return self.index_version()
+
+    def hash_documents(self):
+        """
+        Hash the content of every supported file in the document directory.
+
+        Returns:
+            dict: File path keyed by SHA-256 content hash.
+        """
+        document_hashes = {}
+        if not os.path.isdir(self.document_dir):
+            return document_hashes
+        for file_name in sorted(os.listdir(self.document_dir)):
+            file_path = os.path.join(self.document_dir, file_name)
+            if not os.path.isfile(file_path) or os.path.splitext(file_name)[1] not in document_exts:
+                continue
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as document_file:
+                for chunk in iter(lambda: document_file.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            document_hashes.setdefault(digest.hexdigest(), file_path)
+        return document_hashes
+
+    def load_documents(self, content_hashes):
+        """
+        Load documents from the specified directory, given their content hashes, parsing files in parallel.
+        Document ids are derived from the file content hash, so unchanged files keep their ids across runs.
+
+        Yields:
+            tuple: The content hash and documents of each file, as soon as it is parsed.
+        """
+        hash_by_path = {self.document_hashes[content_hash]: content_hash for content_hash in content_hashes}
+        for file_path, documents in iter_loaded_files(list(hash_by_path), document_loader_workers, document_load_timeout):
+            content_hash = hash_by_path[file_path]
+            for part, document in enumerate(documents):
+                document.id_ = f"{content_hash}_part_{part}"
+            yield content_hash, documents
+
+    def load_nodes(self, content_hashes):
+        """
+        Load and split the documents with the given content hashes, once for both indexes.
+        Each file is split as soon as it is parsed, while the remaining files are still being parsed.
+
+        Returns:
+            tuple: The documents and their nodes.
+        """
+        # Both indexes may be built at once; the second waits for the files the first is parsing
+        with self.nodes_lock:
+            missing = [content_hash for content_hash in content_hashes if content_hash not in self.nodes_by_hash]
+            for content_hash, documents in self.load_documents(missing):
+                self.documents_by_hash[content_hash] = documents
+                self.nodes_by_hash[content_hash] = run_transformations(documents, [Settings.text_splitter], show_progress=True) if documents else []
+            for content_hash in missing:
+                self.documents_by_hash.setdefault(content_hash, [])
+                self.nodes_by_hash.setdefault(content_hash, [])
+
+        documents = [document for content_hash in content_hashes for document in self.documents_by_hash[content_hash]]
+        nodes = [node for content_hash in content_hashes for node in self.nodes_by_hash[content_hash]]
+        return documents, nodes
+
+    def sync_index(self, index, manifest, bm25_index=None):
+        """
+        Bring an index, and the BM25 index kept next to it if any, up to date with the document directory:
+        only new or changed files are parsed, embedded and summarized, and the documents of removed files are deleted.
+        """
+        for content_hash in [content_hash for content_hash in manifest if content_hash not in self.document_hashes]:
+            for doc_id in manifest.pop(content_hash)['doc_ids']:
+                index.delete_ref_doc(doc_id, delete_from_docstore=True)
+                if bm25_index is not None:
+                    bm25_index.delete_ref_doc(doc_id)
+
+        new_hashes = [content_hash for content_hash in self.document_hashes if content_hash not in manifest]
+        if not new_hashes:
+            return
+        documents, nodes = self.load_nodes(new_hashes)
+        if nodes:
+            index.insert_nodes(nodes)
+            if bm25_index is not None:
+                bm25_index.add_nodes(nodes)
+        for document in documents:
+            content_hash = document.id_.rsplit('_part_', 1)[0]
+            entry = manifest.setdefault(content_hash, {'file_name': document.metadata.get('file_name'), 'doc_ids': []})
+            entry['doc_ids'].append(document.id_)
+
     def initialize_models(self):
         """
         Initialize LLM and embedding models based on the specified type for query engines.
         """
         Settings.llm = self.llm
         Settings.embed_model = self.embed_model
-        Settings.text_splitter = SemanticSplitterNodeParser(
-            buffer_size=1, breakpoint_percentile_threshold=95, embed_model=Settings.embed_model
-        )
+        Settings.text_splitter = create_text_splitter(Settings.embed_model)
 
     def initialize_vector_store_client(self):
         """
@@ -93,6 +415,8 @@ class MedicalReportRagPipeline:
         """
         try:
             chroma_collection = chroma_client.get_or_create_collection(collection_name)
+            # The last use time drives the expiry of session collections
+            chroma_collection.modify(metadata={"session_id": self.session_id, "last_used": time.time()})
             vector_store_instance = ChromaVectorStore(chroma_collection=chroma_collection)
             logging.info(f"Chroma DB collection created or loaded successfully: {collection_name}")
             return vector_store_instance
@@ -101,13 +425,14 @@ class MedicalReportRagPipeline:
             logging.error(f"Error creating Chroma DB collection: {e}")
             return None
 
-    def create_summary_index(self, collection_name='input-summary'):
+    def create_summary_index(self, collection_name):
         """
-        Create a summary index for the loaded documents.
+        Create or load the summary index and bring it up to date with the document directory.
         """
     
         try:
             logging.info(f"Creating or loading summary vector store with collection name: {collection_name}")
+            manifest = self.load_manifest(collection_name)
             summary_vector_store_instance = self.create_chroma_db_collection(
                 self.chroma_client,
                 collection_name,
@@ -116,33 +441,56 @@ class MedicalReportRagPipeline:
                 logging.error("Failed to create or load summary vector store instance.")
                 return None
 
-            summary_storage_context = StorageContext.from_defaults(vector_store=summary_vector_store_instance)
             response_synthesizer = get_response_synthesizer(
                 llm=Settings.llm, response_mode="tree_summarize", use_async=True
             )
-            
-            logging.info("Creating DocumentSummaryIndex from documents")
-            summary_index = DocumentSummaryIndex.from_documents(
-                documents=self.documents,
-                llm=Settings.llm,
-                transformations=[Settings.text_splitter],
-                response_synthesizer=response_synthesizer,
-                storage_context=summary_storage_context,
-                embed_model=Settings.embed_model,
-                show_progress=True,
-            )
+            # Summaries and their source nodes live in the docstore, persisted next to the Chroma collection
+            persist_dir = os.path.join(persist_index_storage_path, collection_name)
+            if os.path.exists(os.path.join(persist_dir, 'docstore.json')):
+                logging.info("Loading DocumentSummaryIndex from storage")
+                summary_storage_context = StorageContext.from_defaults(vector_store=summary_vector_store_instance, persist_dir=persist_dir)
+                summary_index = load_index_from_storage(
+                    summary_storage_context,
+                    llm=Settings.llm,
+                    transformations=[Settings.text_splitter],
+                    response_synthesizer=response_synthesizer,
+                    embed_model=Settings.embed_model,
+                    show_progress=True,
+                )
+            else:
+                logging.info("Creating DocumentSummaryIndex")
+                summary_storage_context = StorageContext.from_defaults(vector_store=summary_vector_store_instance)
+                summary_index = DocumentSummaryIndex(
+                    nodes=[],
+                    llm=Settings.llm,
+                    transformations=[Settings.text_splitter],
+                    response_synthesizer=response_synthesizer,
+                    storage_context=summary_storage_context,
+                    embed_model=Settings.embed_model,
+                    show_progress=True,
+                )
+
+            self.sync_index(summary_index, manifest)
+            summary_storage_context.persist(persist_dir=persist_dir)
+            self.save_manifest(collection_name, manifest)
             logging.info("DocumentSummaryIndex created successfully")
             return summary_index
         except Exception as e:
             logging.error(f"Error creating summary index: {e}")
             return None
 
-    def create_vector_store_index(self, collection_name='input-semantic-search'):
+    def create_vector_store_index(self, collection_name):
         """
-        Create a vector store index for semantic search.
+        Create or load the vector store index for semantic search and bring it up to date with the document directory.
         """
         try:
             logging.info(f"Creating or loading semantic search vector store with collection name: {collection_name}")
+            # The BM25 index is kept in sync with the collection; without it the collection is rebuilt
+            bm25_path = os.path.join(persist_index_storage_path, collection_name, 'bm25.json')
+            if not os.path.exists(bm25_path):
+                shutil.rmtree(os.path.join(persist_index_storage_path, collection_name), ignore_errors=True)
+            manifest = self.load_manifest(collection_name)
+            bm25_index = BM25Index.load(bm25_path) if os.path.exists(bm25_path) else BM25Index()
             semantic_search_vector_store_instance = self.create_chroma_db_collection(
                 self.chroma_client,
                 collection_name,
@@ -151,30 +499,66 @@ class MedicalReportRagPipeline:
                 logging.error("Failed to create or load semantic search vector store instance.")
                 return None
 
-            semantic_search_storage_context = StorageContext.from_defaults(vector_store=semantic_search_vector_store_instance)
-
-            logging.info("Creating vector store index from documents")
-            vector_store_index = VectorStoreIndex.from_documents(
-                documents=self.documents,
+            # Chroma stores the node text, so the index loads straight from the collection
+            logging.info("Loading vector store index from the vector store")
+            vector_store_index = VectorStoreIndex.from_vector_store(
+                semantic_search_vector_store_instance,
                 llm=Settings.llm,
                 transformations=[Settings.text_splitter],
                 embed_model=Settings.embed_model,
-                storage_context=semantic_search_storage_context,
                 show_progress=True,
             )
+            self.sync_index(vector_store_index, manifest, bm25_index)
+            bm25_index.persist(bm25_path)
+            self.save_manifest(collection_name, manifest)
+            self.bm25_index = bm25_index
             logging.info("Vector store index created successfully")
             return vector_store_index
         except Exception as e:
             logging.error(f"Error creating vector store index: {e}")
             return None
 
+    def create_hybrid_query_engine(self):
+        """
+        Create a query engine over the fused results of vector search and BM25 keyword search,
+        so exact lab values, drug names and units are found with fewer chunks sent to the LLM.
+        """
+        vector_store_index = self.semantic_search_index
+        retriever = QueryFusionRetriever(
+            [
+                vector_store_index.as_retriever(similarity_top_k=hybrid_candidate_k),
+                BM25Retriever(self.bm25_index, similarity_top_k=hybrid_candidate_k),
+            ],
+            mode="relative_score",
+            similarity_top_k=hybrid_top_k,
+            num_queries=1,
+            use_async=False,
+            retriever_weights=[hybrid_vector_weight, 1 - hybrid_vector_weight],
+        )
+        return RetrieverQueryEngine.from_args(retriever, llm=Settings.llm)
+
+    def create_cached_query_engine(self, query_engine):
+        """
+        Wrap a query engine with an answer cache scoped to the current index version.
+        """
+        return CachedQueryEngine(
+            query_engine,
+            embed_model=self.embed_model,
+            index_version=self.queried_index_version,
+            similarity_threshold=answer_cache_similarity,
+            max_entries=answer_cache_max_entries,
+        )
+
     def create_tools(self):
         """
         Create query engine tools for interacting with the summary and vector store indices.
         """
         try:
-            self.summary_query_engine = self.summary_index.as_query_engine(response_mode="tree_summarize", use_async=True)
-            self.vector_store_query_engine = self.semantic_search_index.as_query_engine(similarity_top_k=5, llm=Settings.llm)
+            # The indexes are only built once a tool is first invoked, and repeated questions are answered from cache
+            self.summary_query_engine = self.create_cached_query_engine(LazyQueryEngine(
+                lambda: self.summary_index.as_query_engine(response_mode="tree_summarize", use_async=True)
+            ))
+            self.vector_store_query_engine = self.create_cached_query_engine(LazyQueryEngine(self.create_hybrid_query_engine))
             self.summary_tool = LlamaIndexTool.from_query_engine(
                 self.summary_query_engine,
                 name="Summary Index Query Tool",
@@ -0,0 +1,219 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Any
+
+from pydantic import Field
+from crewai_tools import BaseTool
+
+# Results of search, web page, video and weather tools, shared by every agent and session
+tool_cache_path = os.getenv("TOOL_CACHE_PATH", 'src/tools/data/tool_cache.sqlite3')
+tool_cache_max_bytes = int(os.getenv("TOOL_CACHE_MAX_MB", 256)) * 1024 * 1024
+
+def normalize_argument(value):
+    """
+    Collapse whitespace in string arguments, so trivially different queries share an entry.
+    """
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip()
+    return value
+
+class ToolResultCache:
+    """
+    Disk-backed tool result store in SQLite with a TTL per entry, capped at max_bytes of results with
+    least-recently-used eviction.
+
+    Concurrent calls for the same entry are coalesced: the first caller runs the tool and the others
+    wait for its result. Hits, misses and coalesced calls are counted per tool.
+    """
+    def __init__(self, path, max_bytes):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS tool_result ("
+            "key TEXT PRIMARY KEY, tool TEXT NOT NULL, result TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS ix_tool_result_last_used ON tool_result (last_used)")
+        self.connection.commit()
+        self.clock = self.connection.execute("SELECT COALESCE(MAX(last_used), 0) FROM tool_result").fetchone()[0]
+        # cache key -> Future of the running tool call
+        self.in_flight = {}
+        self.stats = {}
+
+    def cache_key(self, tool_name, args, kwargs):
+        arguments = {
+            "args": [normalize_argument(value) for value in args],
+            "kwargs": {name: normalize_argument(value) for name, value in kwargs.items()},
+        }
+        encoded = json.dumps(arguments, sort_keys=True, default=str).encode('utf-8')
+        return f"{tool_name}:{hashlib.sha256(encoded).hexdigest()}"
+
+    def count(self, tool_name, outcome):
+        with self.lock:
+            counts = self.stats.setdefault(tool_name, {"hits": 0, "misses": 0, "coalesced": 0})
+            counts[outcome] += 1
+
+    def get(self, key):
+        """
+        Look up an unexpired result and mark it as recently used.
+
+        Returns:
+            tuple: (True, result) on a hit, otherwise (False, None).
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT result, expires_at FROM tool_result WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return False, None
+            if row[1] < time.time():
+                self.connection.execute("DELETE FROM tool_result WHERE key = ?", (key,))
+                self.connection.commit()
+                return False, None
+            self.clock += 1
+            self.connection.execute("UPDATE tool_result SET last_used = ? WHERE key = ?", (self.clock, key))
+            self.connection.commit()
+        return True, json.loads(row[0])
+
+    def put(self, key, tool_name, result, ttl):
+        """
+        Store a result, evicting expired and then least recently used entries beyond max_bytes.
+        """
+        try:
+            encoded = json.dumps(result)
+        except (TypeError, ValueError):
+            # Results that do not round-trip through JSON are not cached
+            return
+        with self.lock:
+            self.clock += 1
+            self.connection.execute(
+                "INSERT OR REPLACE INTO tool_result (key, tool, result, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, tool_name, encoded, len(encoded), time.time() + ttl, self.clock),
+            )
+            self.connection.execute("DELETE FROM tool_result WHERE expires_at < ?", (time.time(),))
+            excess = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM tool_result").fetchone()[0] - self.max_bytes
+            if excess > 0:
+                evicted = []
+                for evicted_key, size in self.connection.execute("SELECT key, size FROM tool_result ORDER BY last_used"):
+                    if excess <= 0:
+                        break
+                    evicted.append((evicted_key,))
+                    excess -= size
+                self.connection.executemany("DELETE FROM tool_result WHERE key = ?", evicted)
+            self.connection.commit()
+
+    def get_or_compute(self, tool_name, key, ttl, compute, cacheable=lambda result: True):
+        """
+        Return the cached result for key, or compute it once however many callers ask for it concurrently.
+
+        Args:
+            tool_name (str): Tool the result belongs to, for the metrics.
+            key (str): Cache key of the call.
+            ttl (float): Seconds a computed result stays valid.
+            compute (callable): Runs the tool.
+            cacheable (callable): Whether a computed result may be cached, e.g. not an error response.
+        """
+        hit, result = self.get(key)
+        if hit:
+            self.count(tool_name, "hits")
+            return result
+
+        with self.lock:
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+        if not leader:
+            self.count(tool_name, "coalesced")
+            return future.result()
+
+        self.count(tool_name, "misses")
+        try:
+            result = compute()
+            if cacheable(result):
+                self.put(key, tool_name, result, ttl)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+    def report(self):
+        """
+        Hit rate per tool, counting coalesced calls as hits.
+        """
+        with self.lock:
+            report = {}
+            for tool_name, counts in self.stats.items():
+                calls = sum(counts.values())
+                report[tool_name] = dict(counts, hit_rate=(counts["hits"] + counts["coalesced"]) / calls if calls else None)
+            return report
+
+def is_error_result(result):
+    """
+    Whether a tool returned an error response, such as a failed Composio action, which is never cached.
+    """
+    if isinstance(result, dict):
+        return result.get("successfull", result.get("successful", True)) is False or bool(result.get("error"))
+    return False
+
+class CachedTool(BaseTool):
+    """
+    Crew tool wrapper that serves repeated calls of the wrapped tool from a ToolResultCache.
+
+    The wrapper keeps the wrapped tool's name, description and arguments, so agents see the same tool.
+    Error responses and results the wrapped tool's cache_function rejects are returned but not cached.
+    """
+    tool: Any = Field(exclude=True)
+    cache: Any = Field(exclude=True)
+    ttl: float = Field(description="Seconds a result stays cached.")
+
+    def __init__(self, tool, cache, ttl):
+        super().__init__(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            cache_function=tool.cache_function,
+            result_as_answer=tool.result_as_answer,
+            tool=tool,
+            cache=cache,
+            ttl=ttl,
+        )
+
+    def model_post_init(self, __context: Any) -> None:
+        # The wrapped tool already generated the full description
+        pass
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        key = self.cache.cache_key(self.name, args, kwargs)
+        return self.cache.get_or_compute(
+            self.name,
+            key,
+            self.ttl,
+            lambda: self.tool._run(*args, **kwargs),
+            cacheable=lambda result: not is_error_result(result) and bool(self.tool.cache_function(kwargs, result)),
+        )
+
+shared_tool_cache = None
+shared_tool_cache_lock = threading.Lock()
+
+def get_tool_cache():
+    """
+    The process-wide tool result cache, opened on first use.
+    """
+    global shared_tool_cache
+    with shared_tool_cache_lock:
+        if shared_tool_cache is None:
+            shared_tool_cache = ToolResultCache(tool_cache_path, tool_cache_max_bytes)
+        return shared_tool_cache
@@ -0,0 +1,91 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class ToolRegistry:
+    """
+    Thread-safe, process-wide registry that builds each tool once and shares it across sessions and runs.
+
+    Tools are registered by name with a factory and built on first use, or ahead of time by warm_up.
+    A factory that fails is retried on the next request for the tool, and its error is kept for health().
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.factories = {}
+        self.tools = {}
+        self.build_locks = {}
+        self.status = {}
+        self.warm_up_thread = None
+
+    def register(self, name, factory):
+        """
+        Register a tool factory, unless a tool of that name is already registered.
+        """
+        with self.lock:
+            if name not in self.factories:
+                self.factories[name] = factory
+                self.build_locks[name] = threading.Lock()
+                self.status[name] = {"status": "pending", "build_seconds": None, "error": None}
+
+    def get(self, name):
+        """
+        Return the tool registered under name, building it if this is its first use.
+        """
+        if name in self.tools:
+            return self.tools[name]
+        if name not in self.factories:
+            raise KeyError(f"No tool registered under the name: {name}")
+
+        with self.build_locks[name]:
+            if name not in self.tools:
+                start = time.perf_counter()
+                try:
+                    tool = self.factories[name]()
+                except Exception as e:
+                    self.status[name] = {"status": "failed", "build_seconds": time.perf_counter() - start, "error": str(e)}
+                    logging.error(f"Error building tool {name}: {e}")
+                    raise
+                self.status[name] = {"status": "ready", "build_seconds": time.perf_counter() - start, "error": None}
+                self.tools[name] = tool
+        return self.tools[name]
+
+    def warm_up(self, max_workers=4, wait=True):
+        """
+        Build every registered tool concurrently.
+
+        Args:
+            max_workers (int): Number of tools built at once.
+            wait (bool): Block until done, or build in a background thread started once per process.
+
+        Returns:
+            dict: The health of every tool when waiting, otherwise the background thread.
+        """
+        if not wait:
+            with self.lock:
+                if self.warm_up_thread is None:
+                    self.warm_up_thread = threading.Thread(
+                        target=self.warm_up, kwargs={"max_workers": max_workers}, name='tool-registry-warm-up', daemon=True
+                    )
+                    self.warm_up_thread.start()
+            return self.warm_up_thread
+
+        def build(name):
+            try:
+                self.get(name)
+            except Exception:
+                pass
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(build, list(self.factories)))
+        return self.health()
+
+    def health(self):
+        """
+        Build status of every registered tool: pending, ready or failed, with build time and error.
+        """
+        with self.lock:
+            return {name: dict(status) for name, status in self.status.items()}
+
+# Shared by every session of the app process
+tool_registry = ToolRegistry()
@@ -1,4 +1,5 @@
 import os
+import uuid
 from dotenv import load_dotenv
 
 from crewai_tools import (
@@ -15,6 +16,10 @@ from crewai_tools import LlamaIndexTool
 
 from llama_index.tools.arxiv import ArxivToolSpec
 
+from tools.health_trends import HealthTrendTool
+from tools.tool_registry import tool_registry
+from tools.tool_cache import CachedTool, get_tool_cache
+
 # dotenv_path = '../../.env'
 dotenv_path = os.path.join(os.path.dirname(__file__), '../.env')
 # Load the .env file
@@ -23,22 +28,75 @@ load_dotenv(dotenv_path)
 # Access the environment variables
 database_url = os.getenv('DATABASE_URL')
 
+# Seconds the results of each tool are cached for, shared across agents and users. Tools not listed here,
+# such as the calendar, database, file and website search tools, are never cached
+tool_cache_ttls = {
+    'search_tool': int(os.getenv("SEARCH_TOOL_CACHE_TTL", 6 * 3600)),
+    'youtube_search_tool': int(os.getenv("YOUTUBE_TOOL_CACHE_TTL", 7 * 86400)),
+    'weather_tool': int(os.getenv("WEATHER_TOOL_CACHE_TTL", 30 * 60)),
+}
+
 class Toolset:
     """
     A class to intialize some tools
     """
-    def __init__(self):
+    def __init__(self, registry=tool_registry):
+        """
+        Register all the search and scraping tools. Each tool is built once per process by the registry
+        and shared by every crew. The PostgreSQL search tools are not registered: they embed a snapshot of
+        their table when built, so every run builds its own with create_pg_rag_tool and create_pg_summary_tool.
+        Neither is the website search tool, whose store holds the pages indexed for a run's sites: every run
+        builds its own with create_website_rag_tool.
+        """
+        self.registry = registry
+        for name, factory in self.tool_factories().items():
+            if tool_cache_ttls.get(name):
+                factory = self.cached_factory(factory, tool_cache_ttls[name])
+            self.registry.register(name, factory)
+
+    def cached_factory(self, factory, ttl):
+        """
+        Wrap a tool factory so the tool it builds serves repeated calls from the shared tool result cache.
+        """
+        return lambda: CachedTool(factory(), get_tool_cache(), ttl)
+
+    def tool_factories(self):
+        """
+        Tool factories by tool name.
         """
-        Initialize all the search and scraping tools.
+        return {
+            'search_tool': self.create_search_tool,
+            'youtube_search_tool': self.create_youtube_search_tool,
+            'json_file_reader_tool': self.create_json_file_reader_tool,
+            'health_trend_tool': self.create_health_trend_tool,
+            'calendar_tool': self.create_calendar_tool,
+            'weather_tool': self.create_weather_tool,
+            # 'spotify_tool': self.create_spotify_tool,
+        }
+
+    def get_tool(self, name):
+        """
+        Return a shared tool instance, building it on first use.
+        """
+        return self.registry.get(name)
+
+    def warm_up(self, wait=True):
+        """
+        Build all tools ahead of the first crew run.
         """
-        self.search_tool = self.create_search_tool()
-        self.website_rag_tool = self.create_website_rag_tool()
-        self.youtube_searcth_tool = self.create_youtube_search_tool()
-        self.json_file_reader_tool = self.create_json_file_reader_tool()
-        self.pg_rag_tool = self.create_pg_rag_tool()
-        self.calendar_tool = self.create_calendar_tool()
-        self.weather_tool = self.create_weather_tool()
-        # self.spotify_tool = self.create_spotify_tool()
+        return self.registry.warm_up(wait=wait)
+
+    def health(self):
+        """
+        Build status of all tools.
+        """
+        return self.registry.health()
+
+    def cache_report(self):
+        """
+        Hit rate of the cached tools.
+        """
+        return get_tool_cache().report()
 
     def create_search_tool(self):
         """
@@ -49,14 +107,24 @@ class Toolset:
         """
         return SerperDevTool()
 
-    def create_website_rag_tool(self):
+    def create_website_rag_tool(self, storage_dir=None):
         """
-        Create a tool to scrape websites.
+        Create a tool to semantic search websites, with a store of indexed pages of its own. Its embedchain app
+        has its own id, which scopes its searches to the pages it indexed itself.
+
+        Args:
+            storage_dir (str): Directory of the tool's vector store, by default embedchain's shared one.
 
         Returns:
-            ScrapeWebsiteTool: An instance of ScrapeWebsiteTool for scraping websites.
-        """
-        return WebsiteSearchTool()
+            WebsiteSearchTool: An instance of WebsiteSearchTool for semantic searches within websites.
+        """
+        config = {"app": {"config": {"id": f"website-search-{uuid.uuid4().hex}", "collect_metrics": False}}}
+        if storage_dir:
+            config["vectordb"] = {
+                "provider": "chroma",
+                "config": {"collection_name": "website-search", "dir": storage_dir},
+            }
+        return WebsiteSearchTool(config=config)
     
     def create_youtube_search_tool(self):
         """
@@ -67,18 +135,22 @@ class Toolset:
         """
         return YoutubeVideoSearchTool()
     
-    def create_json_file_reader_tool(self):
+    def create_json_file_reader_tool(self, file_path='src/tools/data/fitness_details.json'):
         """
         Create a tool to read the JSON file input recevied from the App UI
 
+        Args:
+            file_path (str): Path of the JSON file.
+
         returns:
             FileReadTool: An instance of FileReadTool facilitating file reading and content retrieval
         """
-        return FileReadTool(file_path='src/tools/data/fitness_details.json')
+        return FileReadTool(file_path=file_path)
     
     def create_pg_rag_tool(self):
         """
-        Create a tool for semantic searches within PostgreSQL database tables.
+        Create a tool for semantic searches within PostgreSQL database tables, over the rows in the table
+        when it is created.
 
         Returns:
             PGSearchTool: An instance of PGSearchTool to conduct a semantic search on a table within a PostgreSQL database.
@@ -86,7 +158,28 @@ class Toolset:
         return PGSearchTool(
             db_uri=str(database_url), table_name='health_data'
         )
+
+    def create_pg_summary_tool(self):
+        """
+        Create a tool for semantic searches over the daily and weekly health metric rollups, as of when it is
+        created.
+
+        Returns:
+            PGSearchTool: An instance of PGSearchTool over the pre-aggregated health_data_summary view.
+        """
+        return PGSearchTool(
+            db_uri=str(database_url), table_name='health_data_summary'
+        )
     
+    def create_health_trend_tool(self):
+        """
+        Create a tool computing health metric trends and anomalies from the daily rollups.
+
+        Returns:
+            HealthTrendTool: An instance of HealthTrendTool returning a precomputed trend and anomaly summary.
+        """
+        return HealthTrendTool(db_uri=str(database_url))
+
     def create_calendar_tool(self):
         """
         Create a tool to create a new event in a Google Calendar.
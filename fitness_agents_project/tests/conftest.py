@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(project_dir, 'fitness_agents_project'))
+sys.path.insert(0, os.path.join(project_dir, 'src'))
+
+# The health data API configures its database when imported, so point it at a throwaway SQLite file first
+database_dir = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(database_dir.name, 'health.db')}"
+
+@pytest.fixture
+def api():
+    """
+    The health data API module, with an empty database and empty in-process caches.
+    """
+    import health_data_api
+    from sqlalchemy import delete, update
+
+    with health_data_api.app.app_context():
+        session = health_data_api.db.session
+        for model in (health_data_api.HealthSample, health_data_api.HealthRollup, health_data_api.IngestJob,
+                      health_data_api.HealthMetric, health_data_api.HealthSource):
+            session.execute(delete(model))
+        session.execute(update(health_data_api.IngestWatermark).values(version=0))
+        session.commit()
+    health_data_api.metric_ids.clear()
+    health_data_api.source_ids.clear()
+    health_data_api.response_cache.entries.clear()
+    health_data_api.response_cache.version = None
+    health_data_api.response_cache.size = 0
+    yield health_data_api
+
+@pytest.fixture
+def client(api):
+    return api.app.test_client()
+
+def make_payload(name='heart_rate', units='count/min', samples=(), source='Apple Watch'):
+    """
+    A Health Auto Export payload with one metric and (date, qty) samples.
+    """
+    return {
+        "data": {
+            "metrics": [
+                {
+                    "name": name,
+                    "units": units,
+                    "data": [{"date": date, "qty": qty, "source": source} for date, qty in samples],
+                }
+            ]
+        }
+    }
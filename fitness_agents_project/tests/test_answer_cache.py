@@ -0,0 +1,65 @@
+import asyncio
+
+from llama_index.core.base.base_query_engine import BaseQueryEngine
+from llama_index.core.base.response.schema import Response
+
+from tools.answer_cache import CachedQueryEngine
+from tools.embedding_backends import HashingEmbedding
+
+class CountingEmbedding(HashingEmbedding):
+    calls: int = 0
+
+    def _get_query_embedding(self, query):
+        self.calls += 1
+        return super()._get_query_embedding(query)
+
+class CountingQueryEngine(BaseQueryEngine):
+    def __init__(self):
+        super().__init__(callback_manager=None)
+        self.queries = []
+
+    def _get_prompt_modules(self):
+        return {}
+
+    def _query(self, query_bundle):
+        self.queries.append(query_bundle.query_str)
+        return Response(response=f"answer {len(self.queries)}")
+
+    async def _aquery(self, query_bundle):
+        return self._query(query_bundle)
+
+def make_engine(version='v1'):
+    embed_model = CountingEmbedding(dimensionality=64)
+    query_engine = CountingQueryEngine()
+    return CachedQueryEngine(query_engine, embed_model, lambda: version, similarity_threshold=0.9), embed_model, query_engine
+
+def test_exact_matches_are_served_without_embedding_the_query():
+    engine, embed_model, query_engine = make_engine()
+
+    first = engine.query("What is my LDL cholesterol?")
+    second = engine.query("  what is my LDL   cholesterol ")
+
+    assert str(second) == str(first)
+    assert embed_model.calls == 1
+    assert query_engine.queries == ["What is my LDL cholesterol?"]
+    assert engine.stats == {"exact_hits": 1, "semantic_hits": 0, "misses": 1}
+
+def test_similar_queries_are_embedded_and_served_from_the_cache():
+    engine, embed_model, query_engine = make_engine()
+
+    engine.query("what is my ldl cholesterol level")
+    response = engine.query("what is my ldl cholesterol level please")
+
+    assert str(response) == "answer 1"
+    assert embed_model.calls == 2
+    assert engine.stats["semantic_hits"] == 1
+
+def test_async_exact_matches_skip_the_embedding():
+    engine, embed_model, query_engine = make_engine()
+
+    async def ask_twice():
+        await engine.aquery("What is my LDL cholesterol?")
+        return await engine.aquery("what is my ldl cholesterol")
+
+    assert str(asyncio.run(ask_twice())) == "answer 1"
+    assert embed_model.calls == 1
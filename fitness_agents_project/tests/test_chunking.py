@@ -0,0 +1,49 @@
+import pytest
+
+from tools.chunking import FastChunker, HEADING_PATTERN
+
+LAB_REPORT = """LIPID PANEL
+LDL 140
+HDL 45
+TRIGLYCERIDES 180
+
+COMPLETE BLOOD COUNT (CBC)
+WBC 5.4
+HBA1C 5.6
+
+Notes:
+Fasting sample. Repeat the lipid panel in three months.
+"""
+
+@pytest.mark.parametrize("line", ["LIPID PANEL", "COMPLETE BLOOD COUNT (CBC)", "VITAMIN B12", "Notes:", "## Results"])
+def test_title_lines_are_headings(line):
+    assert HEADING_PATTERN.fullmatch(line)
+
+@pytest.mark.parametrize("line", ["LDL 140", "TRIGLYCERIDES 180", "WBC 5.4", "Glucose: 95", "Fasting sample."])
+def test_result_rows_are_not_headings(line):
+    assert not HEADING_PATTERN.fullmatch(line)
+
+def test_result_rows_stay_with_their_section():
+    # The sections are 24, 23 and 14 tokens long
+    chunker = FastChunker(chunk_size=40)
+    chunks = chunker.split_text(LAB_REPORT)
+
+    assert chunks == [
+        "LIPID PANEL\nLDL 140\nHDL 45\nTRIGLYCERIDES 180",
+        "COMPLETE BLOOD COUNT (CBC)\nWBC 5.4\nHBA1C 5.6\n\nNotes:\nFasting sample. Repeat the lipid panel in three months.",
+    ]
+
+def test_small_sections_are_merged_up_to_the_chunk_size():
+    chunker = FastChunker(chunk_size=512)
+    assert chunker.split_text(LAB_REPORT) == [LAB_REPORT.strip()]
+
+def test_oversized_sections_are_packed_by_sentence():
+    sentences = [f"Sentence number {index} of the findings." for index in range(40)]
+    text = "FINDINGS\n" + " ".join(sentences) + "\n\nLIPID PANEL\nLDL 140\n"
+    chunker = FastChunker(chunk_size=40)
+    chunks = chunker.split_text(text)
+
+    assert all(chunker.count_tokens(chunk) <= 40 for chunk in chunks)
+    assert chunks[0].startswith("FINDINGS\nSentence number 0")
+    assert all(chunk.endswith(".") for chunk in chunks[1:-1])
+    assert chunks[-1].endswith("LIPID PANEL\nLDL 140")
@@ -0,0 +1,35 @@
+import time
+
+from tools.document_loader import iter_loaded_files
+
+def load_slowly(file_path):
+    """
+    Stand-in parser run in the worker processes: 'hang' files never finish, 'broken' files fail.
+    """
+    if 'hang' in file_path:
+        time.sleep(60)
+    if 'broken' in file_path:
+        raise ValueError("unreadable")
+    return [f"text of {file_path}"]
+
+def test_files_are_parsed_with_the_default_reader(tmp_path):
+    report = tmp_path / 'report.txt'
+    report.write_text("LDL 140 mg/dL")
+
+    loaded = list(iter_loaded_files([str(report)], max_workers=1, timeout=60))
+
+    assert [file_path for file_path, _ in loaded] == [str(report)]
+    assert "LDL 140" in loaded[0][1][0].text
+
+def test_a_hanging_file_times_out_without_holding_up_the_others():
+    started = time.monotonic()
+    loaded = dict(iter_loaded_files(['a.txt', 'hang.pdf', 'b.txt'], max_workers=2, timeout=1, load=load_slowly))
+
+    assert loaded == {'a.txt': ['text of a.txt'], 'b.txt': ['text of b.txt']}
+    # The hanging worker is terminated instead of waited for
+    assert time.monotonic() - started < 30
+
+def test_a_failing_file_is_skipped():
+    loaded = dict(iter_loaded_files(['a.txt', 'broken.pdf'], max_workers=2, timeout=30, load=load_slowly))
+
+    assert loaded == {'a.txt': ['text of a.txt']}
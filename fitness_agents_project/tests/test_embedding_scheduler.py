@@ -0,0 +1,176 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List
+
+import pytest
+import requests
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+from tools.embedding_scheduler import ScheduledEmbedding, is_rate_limited
+
+class EmbeddingServer(ThreadingHTTPServer):
+    """
+    Stand-in embedding provider that answers the first rate_limited requests with 429s and then embeds
+    each text as [length], recording the batches it served and its peak number of concurrent requests.
+    """
+    def __init__(self, rate_limited=0, retry_after=None, status=429, delay=0.05):
+        super().__init__(('127.0.0.1', 0), EmbeddingHandler)
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.status = status
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.rejected = 0
+        self.batches = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/embed"
+
+class EmbeddingHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        texts = json.loads(self.rfile.read(int(self.headers['Content-Length'])))["texts"]
+        with server.lock:
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            reject = server.rejected < server.rate_limited
+            if reject:
+                server.rejected += 1
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+            if not reject:
+                server.batches.append(texts)
+
+        if reject:
+            self.send_response(server.status)
+            if server.retry_after is not None:
+                self.send_header('Retry-After', str(server.retry_after))
+            self.end_headers()
+            return
+        body = json.dumps({"embeddings": [[float(len(text))] for text in texts]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class HttpEmbedding(BaseEmbedding):
+    """
+    Embedding client of the stand-in server, raising requests' HTTPError on error responses.
+    """
+    url: str
+
+    def __init__(self, url: str, **kwargs: Any):
+        super().__init__(model_name='stand-in', url=url, **kwargs)
+
+    def _get_text_embeddings(self, texts: List[str]):
+        response = requests.post(self.url, json={"texts": texts}, timeout=10)
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    def _get_text_embedding(self, text):
+        return self._get_text_embeddings([text])[0]
+
+    def _get_query_embedding(self, query):
+        return self._get_text_embedding(query)
+
+    async def _aget_query_embedding(self, query):
+        return self._get_query_embedding(query)
+
+@pytest.fixture
+def start_server():
+    servers = []
+
+    def start(**kwargs):
+        server = EmbeddingServer(**kwargs)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def texts(count, prefix='t'):
+    return [f"{prefix}{'x' * index}" for index in range(count)]
+
+def test_rate_limited_batches_are_retried_after_the_retry_after_delay(start_server):
+    server = start_server(rate_limited=3, retry_after=0.2)
+    scheduler = ScheduledEmbedding(HttpEmbedding(server.url), batch_size=4, max_in_flight=2)
+
+    start = time.perf_counter()
+    embeddings = scheduler.get_text_embedding_batch(texts(10))
+
+    assert embeddings == [[float(len(text))] for text in texts(10)]
+    assert scheduler.report()["rate_limited"] == 3
+    assert time.perf_counter() - start >= 0.2
+    assert sorted(len(batch) for batch in server.batches) == [2, 4, 4]
+
+def test_rate_limited_batches_back_off_exponentially_without_retry_after(start_server):
+    server = start_server(rate_limited=2, delay=0)
+    scheduler = ScheduledEmbedding(HttpEmbedding(server.url), batch_size=4, max_in_flight=1, backoff=0.1)
+
+    start = time.perf_counter()
+    scheduler.get_text_embedding_batch(texts(4))
+
+    # 0.1 * (1 + jitter) and then 0.2 * (1 + jitter) seconds
+    assert time.perf_counter() - start >= 0.3
+    assert scheduler.report()["rate_limited"] == 2
+
+def test_concurrent_requests_stay_within_the_in_flight_limit(start_server):
+    server = start_server(rate_limited=4, retry_after=0)
+    scheduler = ScheduledEmbedding(HttpEmbedding(server.url), batch_size=2, max_in_flight=3)
+
+    callers = [threading.Thread(target=scheduler.get_text_embedding_batch, args=(texts(12, prefix),)) for prefix in 'abc']
+    for caller in callers:
+        caller.start()
+    for caller in callers:
+        caller.join()
+
+    assert server.peak <= 3
+    assert sum(len(batch) for batch in server.batches) == 36
+
+def test_callers_share_batches_through_the_queue(start_server):
+    server = start_server(delay=0.2)
+    scheduler = ScheduledEmbedding(HttpEmbedding(server.url), batch_size=8, max_in_flight=1)
+    results = {}
+
+    def embed(prefix):
+        results[prefix] = scheduler.get_text_embedding_batch(texts(10, prefix))
+
+    first = threading.Thread(target=embed, args=('a',))
+    first.start()
+    time.sleep(0.05)
+    embed('b')
+    first.join()
+
+    # 20 texts in 3 batches: the first caller's remaining 2 texts were topped up with the second caller's
+    assert [len(batch) for batch in server.batches] == [8, 8, 4]
+    assert {text[0] for text in server.batches[1]} == {'a', 'b'}
+    assert results['a'] == [[float(len(text))] for text in texts(10, 'a')]
+    assert results['b'] == [[float(len(text))] for text in texts(10, 'b')]
+
+def test_other_errors_are_not_retried(start_server):
+    server = start_server(rate_limited=1, status=500)
+    scheduler = ScheduledEmbedding(HttpEmbedding(server.url), batch_size=4, max_in_flight=2)
+
+    with pytest.raises(requests.HTTPError):
+        scheduler.get_text_embedding_batch(texts(4))
+    assert scheduler.report()["rate_limited"] == 0
+
+def test_rate_limits_are_detected_by_status_code_or_type_only():
+    class RateLimitError(Exception):
+        pass
+
+    assert is_rate_limited(RateLimitError("slow down"))
+    assert not is_rate_limited(ValueError("request 4291 failed: rate limit"))
@@ -0,0 +1,52 @@
+from conftest import make_payload
+
+SAMPLE = [('2024-08-30 07:15:00 +0000', 60)]
+
+def test_matching_etag_answers_not_modified(client):
+    client.post('/health-data', json=make_payload(samples=SAMPLE))
+    first = client.get('/health-data')
+    assert first.status_code == 200 and first.headers['ETag']
+
+    response = client.get('/health-data', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == first.headers['ETag']
+
+def test_if_modified_since_answers_not_modified_until_the_next_ingest(client):
+    client.post('/health-data', json=make_payload(samples=SAMPLE))
+    first = client.get('/health-data')
+    assert client.get('/health-data', headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 304
+
+def test_etags_differ_per_query(client):
+    client.post('/health-data', json=make_payload(samples=SAMPLE))
+    all_data = client.get('/health-data')
+    filtered = client.get('/health-data?name=heart_rate')
+    assert all_data.headers['ETag'] != filtered.headers['ETag']
+    assert client.get('/health-data?name=heart_rate', headers={'If-None-Match': all_data.headers['ETag']}).status_code == 200
+
+def test_an_ingest_invalidates_etags_and_cached_bodies(client):
+    client.post('/health-data', json=make_payload(samples=SAMPLE))
+    first = client.get('/health-data')
+
+    client.post('/health-data', json=make_payload(samples=[('2024-08-30 08:15:00 +0000', 90)]))
+    response = client.get('/health-data', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != first.headers['ETag']
+    assert len(response.get_json()) == 2
+
+def test_a_duplicate_ingest_keeps_etags_valid(client):
+    client.post('/health-data', json=make_payload(samples=SAMPLE))
+    first = client.get('/health-data')
+
+    # Nothing new was written, so the watermark and the client's copy stay current
+    client.post('/health-data', json=make_payload(samples=SAMPLE))
+    assert client.get('/health-data', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+def test_repeated_gets_are_served_from_the_response_cache(api, client):
+    client.post('/health-data', json=make_payload(samples=SAMPLE))
+    first = client.get('/health-data')
+    assert len(api.response_cache.entries) == 1
+
+    second = client.get('/health-data')
+    assert second.data == first.data
+    assert len(api.response_cache.entries) == 1
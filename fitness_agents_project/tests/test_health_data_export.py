@@ -0,0 +1,50 @@
+import io
+
+import pytest
+
+from conftest import make_payload
+
+SAMPLES = [
+    ('2024-08-30 07:15:00 +0100', 61.0),
+    ('2024-08-31 07:15:00 +0100', 62.0),
+]
+
+@pytest.fixture
+def pyarrow_modules(api):
+    """
+    pyarrow and pyarrow.parquet, as imported by the export endpoint.
+    """
+    try:
+        return api.import_pyarrow()
+    except Exception as e:
+        pytest.skip(f"pyarrow cannot be imported: {e}")
+
+@pytest.mark.parametrize('export_format', ['arrow', 'arrow-stream', 'parquet'])
+def test_export_round_trips(client, pyarrow_modules, export_format):
+    pa, pq = pyarrow_modules
+    client.post('/health-data', json=make_payload(samples=SAMPLES))
+
+    response = client.get(f'/health-data/export?format={export_format}&name=heart_rate')
+
+    assert response.status_code == 200
+    body = io.BytesIO(response.get_data())
+    if export_format == 'parquet':
+        exported = pq.read_table(body)
+    elif export_format == 'arrow':
+        exported = pa.ipc.open_file(body).read_all()
+    else:
+        exported = pa.ipc.open_stream(body).read_all()
+    assert exported.column('qty').to_pylist() == [61.0, 62.0]
+    assert exported.column('utc_offset').to_pylist() == [60, 60]
+
+def test_export_without_pyarrow_is_not_implemented(api, client, monkeypatch):
+    def import_pyarrow():
+        raise ImportError("No module named 'pyarrow'")
+    monkeypatch.setattr(api, 'import_pyarrow', import_pyarrow)
+
+    assert client.get('/health-data/export?format=parquet').status_code == 501
+    # The other endpoints are unaffected
+    assert client.get('/health-data').status_code == 200
+
+def test_export_rejects_unknown_formats(client):
+    assert client.get('/health-data/export?format=csv').status_code == 400
@@ -0,0 +1,56 @@
+from conftest import make_payload
+
+SAMPLES = [
+    ('2024-08-30 07:15:00 +0100', 61.0),
+    ('2024-08-30 07:16:00 +0100', 64.0),
+    ('2024-08-30 07:17:00 +0100', 70.0),
+]
+
+def test_duplicate_payload_is_skipped_on_conflict(client):
+    first = client.post('/health-data', json=make_payload(samples=SAMPLES))
+    assert first.status_code == 201
+    assert first.get_json()["inserted"] == 3
+    assert first.get_json()["skipped"] == 0
+
+    second = client.post('/health-data', json=make_payload(samples=SAMPLES))
+    assert second.status_code == 201
+    assert second.get_json()["inserted"] == 0
+    assert second.get_json()["skipped"] == 3
+
+    rows = client.get('/health-data').get_json()
+    assert len(rows) == 3
+
+def test_duplicates_within_a_batch_and_across_batches(client):
+    samples = SAMPLES + SAMPLES[:1]
+    response = client.post('/health-data?batch_size=2', json=make_payload(samples=samples))
+    assert response.get_json()["inserted"] == 3
+    assert response.get_json()["skipped"] == 1
+
+def test_invalid_payload_is_rejected_without_writing(client):
+    response = client.post('/health-data', json=make_payload(samples=[('not a date', 1.0)]))
+    assert response.status_code == 400
+    assert client.get('/health-data').get_json() == []
+
+def test_dictionary_ids_are_shared_only_after_commit(api):
+    with api.app.app_context():
+        records = [{"name": "step_count", "units": "count", "source": "Watch", "date": SAMPLES[0][0], "qty": 10.0}]
+        api.bulk_insert_health_data(records, 100)
+        assert "step_count" not in api.metric_ids
+        api.db.session.commit()
+        assert "step_count" in api.metric_ids
+        assert "Watch" in api.source_ids
+
+def test_dictionary_ids_of_a_rolled_back_transaction_are_discarded(api):
+    with api.app.app_context():
+        records = [{"name": "step_count", "units": "count", "source": "Watch", "date": SAMPLES[0][0], "qty": 10.0}]
+        api.bulk_insert_health_data(records, 100)
+        api.db.session.rollback()
+        assert "step_count" not in api.metric_ids
+        assert "pending_dictionary_ids" not in api.db.session.info
+
+        # The rolled back ids are not reused: a new transaction creates the rows again
+        inserted, skipped = api.bulk_insert_health_data(records, 100)
+        api.db.session.commit()
+        assert (inserted, skipped) == (1, 0)
+        metric = api.db.session.get(api.HealthMetric, api.metric_ids["step_count"])
+        assert metric.name == "step_count"
@@ -0,0 +1,139 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from conftest import make_payload
+
+def queue_job(api, payload, minutes_ago=0):
+    """
+    Store a queued job directly, without waking the background workers.
+    """
+    job = api.IngestJob(
+        id=f"job-{datetime.now().timestamp()}-{minutes_ago}",
+        status='queued',
+        payload=json.dumps(payload).encode(),
+        created_at=datetime.now(timezone.utc) - timedelta(minutes=minutes_ago),
+    )
+    api.db.session.add(job)
+    api.db.session.commit()
+    return job.id
+
+def job_state(api, job_id):
+    api.db.session.expire_all()
+    return api.db.session.get(api.IngestJob, job_id)
+
+def test_jobs_are_claimed_once_in_queue_order(api):
+    with api.app.app_context():
+        job_ids = [queue_job(api, make_payload(), minutes_ago=minutes) for minutes in (3, 2, 1)]
+
+        first_token, first = api.claim_ingest_jobs(2)
+        second_token, second = api.claim_ingest_jobs(2)
+        _, third = api.claim_ingest_jobs(2)
+
+        assert [job.id for job in first] == job_ids[:2]
+        assert [job.id for job in second] == job_ids[2:]
+        assert third == []
+        assert first_token != second_token
+        assert {job_state(api, job_id).claim_token for job_id in job_ids[:2]} == {first_token}
+
+def test_claimed_jobs_are_ingested_and_finished(api):
+    with api.app.app_context():
+        job_id = queue_job(api, make_payload(samples=[('2024-08-30 07:15:00 +0000', 60)]))
+        claim_token, jobs = api.claim_ingest_jobs(10)
+        api.process_ingest_jobs(jobs, claim_token)
+
+        job = job_state(api, job_id)
+        assert (job.status, job.records, job.inserted, job.skipped, job.payload) == ('done', 1, 1, 0, None)
+        assert api.db.session.execute(select(api.func.count()).select_from(api.HealthSample)).scalar() == 1
+
+def test_a_bad_payload_fails_only_its_own_job(api):
+    with api.app.app_context():
+        good_id = queue_job(api, make_payload(samples=[('2024-08-30 07:15:00 +0000', 60)]), minutes_ago=2)
+        bad_id = queue_job(api, make_payload(samples=[('not a date', 60)]), minutes_ago=1)
+        claim_token, jobs = api.claim_ingest_jobs(10)
+        api.process_ingest_jobs(jobs, claim_token)
+
+        assert job_state(api, good_id).status == 'done'
+        assert job_state(api, bad_id).status == 'failed'
+        assert job_state(api, bad_id).error
+
+def test_jobs_with_a_live_heartbeat_are_not_reclaimed(api):
+    with api.app.app_context():
+        job_id = queue_job(api, make_payload())
+        claim_token, _ = api.claim_ingest_jobs(10)
+        # Running for longer than the timeout, but the owner keeps renewing its lease
+        api.db.session.execute(update(api.IngestJob).values(started_at=datetime.now(timezone.utc) - timedelta(hours=1)))
+        api.db.session.commit()
+        with api.db.engine.begin() as connection:
+            assert api.renew_ingest_lease(connection, [job_id], claim_token) == 1
+
+        assert api.claim_ingest_jobs(10)[1] == []
+
+def test_abandoned_jobs_are_reclaimed_and_the_stale_owner_cannot_finish_them(api):
+    with api.app.app_context():
+        job_id = queue_job(api, make_payload(samples=[('2024-08-30 07:15:00 +0000', 60)]))
+        stale_token, stale_jobs = api.claim_ingest_jobs(10)
+        stale_heartbeat = datetime.now(timezone.utc) - timedelta(seconds=api.app.config['INGEST_JOB_TIMEOUT'] + 1)
+        api.db.session.execute(update(api.IngestJob).values(heartbeat_at=stale_heartbeat))
+        api.db.session.commit()
+
+        claim_token, jobs = api.claim_ingest_jobs(10)
+        assert [job.id for job in jobs] == [job_id]
+        assert claim_token != stale_token
+
+        # The stale owner neither renews the lease nor records a result
+        with api.db.engine.begin() as connection:
+            assert api.renew_ingest_lease(connection, [job_id], stale_token) == 0
+        with pytest.raises(api.IngestClaimLost):
+            api.finish_ingest_job(job_id, stale_token, error='late failure')
+        api.db.session.rollback()
+        api.process_ingest_jobs(stale_jobs, stale_token)
+        assert job_state(api, job_id).status == 'running'
+        assert api.db.session.execute(select(api.func.count()).select_from(api.HealthSample)).scalar() == 0
+
+        api.process_ingest_jobs(jobs, claim_token)
+        assert job_state(api, job_id).status == 'done'
+        assert job_state(api, job_id).error is None
+
+def test_the_lease_renews_the_heartbeat_while_processing(api):
+    with api.app.app_context():
+        job_id = queue_job(api, make_payload())
+        claim_token, _ = api.claim_ingest_jobs(10)
+        claimed_heartbeat = job_state(api, job_id).heartbeat_at
+
+        with api.IngestLease(api.db.engine, [job_id], claim_token, interval=0.05, heartbeat=True) as lease:
+            lease.stopped.wait(0.2)
+
+        assert job_state(api, job_id).heartbeat_at > claimed_heartbeat
+
+def test_the_lease_sends_no_heartbeats_on_sqlite(api):
+    with api.app.app_context():
+        job_id = queue_job(api, make_payload())
+        claim_token, _ = api.claim_ingest_jobs(10)
+        claimed_heartbeat = job_state(api, job_id).heartbeat_at
+
+        # The ingest transaction holds SQLite's write lock while the lease is held
+        with api.IngestLease(api.db.engine, [job_id], claim_token, interval=0.05) as lease:
+            lease.stopped.wait(0.2)
+            assert not lease.thread.is_alive()
+
+        assert job_state(api, job_id).heartbeat_at == claimed_heartbeat
+
+def test_async_ingest_limits_the_decompressed_body_size(api, client, monkeypatch):
+    monkeypatch.setitem(api.app.config, 'INGEST_MAX_BODY_BYTES', 10000)
+    body = gzip.compress(b' ' * 100000)
+    assert len(body) < 10000
+
+    response = client.post('/health-data?mode=async', data=body, headers={'Content-Encoding': 'gzip'})
+
+    assert response.status_code == 413
+    with api.app.app_context():
+        assert api.db.session.execute(select(api.func.count()).select_from(api.IngestJob)).scalar() == 0
+
+def test_async_ingest_rejects_an_invalid_encoding(api, client):
+    response = client.post('/health-data?mode=async', data=b'not gzip', headers={'Content-Encoding': 'gzip'})
+
+    assert response.status_code == 400
@@ -0,0 +1,51 @@
+from conftest import make_payload
+
+SAMPLES = [
+    ('2024-08-29 23:30:00 +0000', 50.0),
+    ('2024-08-30 07:15:00 +0000', 60.0),
+    ('2024-08-30 08:15:00 +0000', 90.0),
+]
+
+def summary(client, period='day'):
+    return {row["bucket"]: row for row in client.get(f'/health-data/summary?period={period}').get_json()}
+
+def test_daily_rollups_aggregate_each_day(client):
+    client.post('/health-data', json=make_payload(samples=SAMPLES))
+
+    days = summary(client)
+    assert days['2024-08-29']["count"] == 1
+    assert days['2024-08-30'] == {
+        "name": 'heart_rate', "units": 'count/min', "period": 'day', "bucket": '2024-08-30',
+        "count": 2, "min": 60.0, "max": 90.0, "mean": 75.0, "sum": 150.0,
+    }
+
+def test_duplicate_payloads_do_not_change_the_rollups(client):
+    client.post('/health-data', json=make_payload(samples=SAMPLES))
+    before = summary(client)
+
+    client.post('/health-data', json=make_payload(samples=SAMPLES))
+    client.post('/health-data?batch_size=1', json=make_payload(samples=SAMPLES + SAMPLES))
+    assert summary(client) == before
+
+def test_rollups_are_merged_across_payloads(client):
+    client.post('/health-data', json=make_payload(samples=SAMPLES[1:2]))
+    client.post('/health-data', json=make_payload(samples=SAMPLES[2:]))
+
+    day = summary(client)['2024-08-30']
+    assert (day["count"], day["min"], day["max"], day["sum"]) == (2, 60.0, 90.0, 150.0)
+
+def test_rollup_buckets_use_the_local_day_and_iso_week(client):
+    # 23:30 UTC on Sunday is already Monday in UTC+2, which starts a new ISO week
+    client.post('/health-data', json=make_payload(samples=[('2024-09-02 01:30:00 +0200', 70.0)]))
+
+    assert list(summary(client)) == ['2024-09-02']
+    assert list(summary(client, 'week')) == ['2024-09-02']
+
+def test_weekly_rollups_match_the_samples(client):
+    client.post('/health-data', json=make_payload(samples=SAMPLES))
+
+    week = summary(client, 'week')['2024-08-26']
+    assert (week["count"], week["min"], week["max"], week["sum"]) == (3, 50.0, 90.0, 200.0)
+
+def test_summary_rejects_unknown_periods(client):
+    assert client.get('/health-data/summary?period=month').status_code == 400
@@ -0,0 +1,66 @@
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import select, text
+
+from conftest import make_payload
+
+def test_timestamps_are_stored_in_utc_and_rendered_in_local_time(api, client):
+    client.post('/health-data', json=make_payload(samples=[('2024-08-30 07:15:00 +0100', 61.0)]))
+
+    with api.app.app_context():
+        sample = api.db.session.execute(select(api.HealthSample)).scalar_one()
+        assert sample.ts.replace(tzinfo=timezone.utc) == datetime(2024, 8, 30, 6, 15, tzinfo=timezone.utc)
+        assert sample.utc_offset == 60
+
+    row = client.get('/health-data').get_json()[0]
+    assert row["date"] == '2024-08-30 07:15:00 +0100'
+    assert row["name"] == 'heart_rate'
+    assert row["units"] == 'count/min'
+
+def test_metrics_and_sources_are_stored_once_in_their_dictionaries(api, client):
+    client.post('/health-data', json=make_payload(samples=[('2024-08-30 07:15:00 +0000', 61.0)]))
+    client.post('/health-data', json=make_payload(samples=[('2024-08-30 07:16:00 +0000', 62.0)]))
+
+    with api.app.app_context():
+        assert api.db.session.execute(select(api.HealthMetric.name)).scalars().all() == ['heart_rate']
+        assert api.db.session.execute(select(api.HealthSource.name)).scalars().all() == ['Apple Watch']
+
+def test_samples_without_a_source_share_the_empty_source(api, client):
+    samples = [('2024-08-30 07:15:00 +0000', 61.0)]
+    client.post('/health-data', json=make_payload(samples=samples, source=None))
+    second = client.post('/health-data', json=make_payload(samples=samples, source=None))
+
+    # NULL sources would never conflict; the empty-name row makes the repeat a duplicate
+    assert second.get_json()["skipped"] == 1
+    assert client.get('/health-data').get_json()[0]["source"] is None
+
+def test_health_data_view_keeps_the_legacy_columns(api, client):
+    client.post('/health-data', json=make_payload(samples=[('2024-08-30 07:15:00 +0000', 61.0)], source=None))
+
+    with api.app.app_context():
+        row = api.db.session.execute(text("SELECT name, qty, source, units FROM health_data")).one()
+        assert tuple(row) == ('heart_rate', 61.0, None, 'count/min')
+
+def test_get_filters_by_name_and_time_range(client):
+    client.post('/health-data', json=make_payload(samples=[
+        ('2024-08-30 07:15:00 +0000', 61.0),
+        ('2024-08-31 07:15:00 +0000', 62.0),
+    ]))
+    client.post('/health-data', json=make_payload(name='step_count', units='count', samples=[('2024-08-30 07:15:00 +0000', 100.0)]))
+
+    rows = client.get('/health-data?name=heart_rate&start=2024-08-31T00:00:00%2B00:00').get_json()
+    assert [row["qty"] for row in rows] == [62.0]
+
+def test_ndjson_streams_rows_up_to_the_limit(client):
+    client.post('/health-data', json=make_payload(samples=[
+        ('2024-08-30 07:15:00 +0000', 61.0),
+        ('2024-08-31 07:15:00 +0000', 62.0),
+    ]))
+
+    response = client.get('/health-data?format=ndjson&limit=1')
+    assert response.status_code == 200
+    assert [json.loads(line)["qty"] for line in response.get_data(as_text=True).splitlines()] == [61.0]
+
+    for limit in (0, -1):
+        assert client.get(f'/health-data?format=ndjson&limit={limit}').status_code == 400
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('crewai_tools')
+
+from tools.health_trends import rolling_mean, trailing_zscores, weekly_slopes
+
+nan = np.nan
+
+def test_rolling_mean_skips_gaps():
+    values = np.array([[1.0, nan, 3.0, nan, 5.0]])
+
+    np.testing.assert_allclose(rolling_mean(values, 3), [[1.0, 1.0, 2.0, 3.0, 4.0]])
+
+def test_rolling_mean_with_fewer_days_than_the_window():
+    values = np.array([[2.0, 4.0], [nan, nan]])
+
+    means = rolling_mean(values, 7)
+
+    np.testing.assert_allclose(means[0], [2.0, 3.0])
+    assert np.isnan(means[1]).all()
+
+def test_rolling_mean_windows_end_on_week_boundaries():
+    # Two weeks of data: the last window covers the second week only, the one 7 days earlier the first
+    values = np.arange(14, dtype=float)[np.newaxis]
+
+    means = rolling_mean(values, 7)
+
+    assert means[0, -1] == pytest.approx(np.mean(np.arange(7, 14)))
+    assert means[0, -8] == pytest.approx(np.mean(np.arange(0, 7)))
+
+def test_trailing_zscores_against_the_preceding_days():
+    # Baseline of mean 2 and standard deviation 1, then a value 3 deviations above it
+    values = np.array([[1.0, 3.0] * 4 + [5.0]])
+
+    zscores = trailing_zscores(values, 28)
+
+    assert zscores[0, -1] == pytest.approx(3.0)
+    # The first days have less than a week of baseline
+    assert np.isnan(zscores[0, :7]).all()
+
+def test_trailing_zscores_need_a_week_of_baseline_without_gaps_counted():
+    values = np.array([[1.0, nan, 3.0, nan, 1.0, 3.0, nan, 1.0, 3.0, 5.0]])
+
+    zscores = trailing_zscores(values, 28)
+
+    # Six valid baseline days are not enough, however long the window they span
+    assert np.isnan(zscores).all()
+
+def test_trailing_zscores_of_a_constant_baseline_are_not_flagged():
+    values = np.array([[60.0] * 10 + [80.0]])
+
+    zscores = trailing_zscores(values, 28)
+
+    assert np.isnan(zscores).all()
+
+def test_trailing_zscores_with_fewer_days_than_the_window():
+    values = np.array([[1.0, 3.0] * 4 + [5.0]])
+
+    zscores = trailing_zscores(values, 28)
+
+    assert zscores.shape == values.shape
+    assert np.isfinite(zscores[0, -1])
+
+def test_weekly_slopes_across_week_boundaries():
+    # Monday 2024-08-26 to Sunday 2024-09-08, rising by one unit a day
+    days = np.arange(np.datetime64('2024-08-26'), np.datetime64('2024-09-09'))
+    values = np.vstack([np.arange(14, dtype=float), np.full(14, 5.0)])
+
+    slopes = weekly_slopes(days, values)
+
+    np.testing.assert_allclose(slopes, [7.0, 0.0], atol=1e-9)
+
+def test_weekly_slopes_skip_gaps_and_need_three_days():
+    days = np.arange(np.datetime64('2024-08-26'), np.datetime64('2024-09-02'))
+    values = np.array([
+        [0.0, nan, 2.0, nan, nan, 5.0, nan],
+        [1.0, nan, nan, nan, nan, 2.0, nan],
+    ])
+
+    slopes = weekly_slopes(days, values)
+
+    assert slopes[0] == pytest.approx(7.0)
+    assert np.isnan(slopes[1])
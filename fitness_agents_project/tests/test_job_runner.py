@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+
+import pytest
+
+from job_runner import JobRunner
+
+def wait_until_done(job, timeout=5):
+    deadline = time.time() + timeout
+    while not job.done:
+        assert time.time() < deadline, "job did not finish in time"
+        time.sleep(0.01)
+
+@pytest.fixture
+def runner(tmp_path):
+    runner = JobRunner(max_workers=2, jobs_path=str(tmp_path), retention=3600)
+    yield runner
+    runner.executor.shutdown(wait=True)
+
+def test_submit_runs_job_in_its_workspace(runner):
+    def run(job, name):
+        with open(os.path.join(job.outputs_dir, 'plan.md'), 'w') as file:
+            file.write(name)
+        job.log("Halfway")
+        return name.upper()
+
+    job = runner.submit(run, 'plan')
+    wait_until_done(job)
+
+    assert runner.get(job.job_id) is job
+    assert job.status == 'completed'
+    assert job.result == 'PLAN'
+    assert job.finished is not None
+    with open(os.path.join(job.outputs_dir, 'plan.md')) as file:
+        assert file.read() == 'plan'
+
+def test_progress_reports_events_since_index(runner):
+    release = threading.Event()
+
+    def run(job):
+        job.log("Working")
+        release.wait(5)
+
+    job = runner.submit(run)
+    while len(job.progress()["events"]) < 3:
+        time.sleep(0.01)
+    progress = job.progress()
+    assert progress["status"] == 'running'
+    assert progress["events"] == ["Queued", "Started", "Working"]
+    assert job.progress(since=2)["events"] == ["Working"]
+
+    release.set()
+    wait_until_done(job)
+    progress = job.progress(since=3)
+    assert progress["status"] == 'completed'
+    assert progress["events"] == ["Completed"]
+    assert progress["elapsed"] == job.finished - job.started
+
+def test_failed_job_records_error(runner):
+    def run(job):
+        raise ValueError("no reports")
+
+    job = runner.submit(run)
+    wait_until_done(job)
+
+    assert job.status == 'failed'
+    assert job.error == "no reports"
+    assert job.finished is not None
+    assert job.progress()["events"][-1] == "Failed: no reports"
+
+def test_submit_evicts_expired_jobs_and_their_workspaces(runner):
+    old_job = runner.submit(lambda job: None)
+    wait_until_done(old_job)
+    running_job = runner.submit(lambda job: time.sleep(0.2))
+
+    runner.retention = 0
+    time.sleep(0.01)
+    new_job = runner.submit(lambda job: None)
+
+    assert runner.get(old_job.job_id) is None
+    assert not os.path.exists(old_job.workspace)
+    assert runner.get(running_job.job_id) is running_job
+    assert runner.get(new_job.job_id) is new_job
+    wait_until_done(running_job)
+    wait_until_done(new_job)
+
+def test_eviction_skips_done_jobs_without_finish_time(runner):
+    job = runner.submit(lambda job: None)
+    wait_until_done(job)
+    # A job whose status was set by hand, before its finish time
+    job.finished = None
+    runner.retention = 0
+
+    runner.evict_finished()
+
+    assert runner.get(job.job_id) is job
@@ -0,0 +1,107 @@
+import os
+import time
+import types
+
+import pytest
+
+from conftest import make_payload
+from run_cache import RunCache, ingest_watermark_version
+
+INPUTS = {"age": 30, "dietary_restrictions": "none", "workout_location": "gym"}
+# The crew's task graph and the input fields of each task, as in tasks.task_input_fields
+TASK_INPUT_FIELDS = {
+    'data_ingestion': ['age', 'dietary_restrictions', 'workout_location'],
+    'health_monitoring': ['age', 'documents', 'health_data'],
+    'fitness_coach': ['age', 'workout_location', 'documents', 'health_data'],
+    'nutritionist': ['age', 'dietary_restrictions', 'documents', 'health_data'],
+}
+
+def make_task(description, context=None, goal='goal'):
+    agent = types.SimpleNamespace(role=description, goal=goal, backstory='backstory', tools=[])
+    return types.SimpleNamespace(description=description, expected_output='a report', agent=agent, context=context)
+
+def make_tasks(**goals):
+    ingestion = make_task('data_ingestion', goal=goals.get('data_ingestion', 'goal'))
+    health = make_task('health_monitoring', [ingestion], goal=goals.get('health_monitoring', 'goal'))
+    return {
+        'data_ingestion': ingestion,
+        'health_monitoring': health,
+        'fitness_coach': make_task('fitness_coach', [ingestion, health]),
+        'nutritionist': make_task('nutritionist', [ingestion, health]),
+    }
+
+@pytest.fixture
+def run_cache(tmp_path):
+    return RunCache(str(tmp_path / 'run_cache'), ttl=3600)
+
+def keys(run_cache, tasks=None, inputs=INPUTS, document_hashes=('report-1',), health_data_version=1):
+    tasks = tasks or make_tasks()
+    return {
+        name: run_cache.task_key(task, TASK_INPUT_FIELDS[name], inputs, document_hashes, health_data_version)
+        for name, task in tasks.items()
+    }
+
+def changed(before, after):
+    return sorted(name for name in before if before[name] != after[name])
+
+def test_keys_are_stable(run_cache):
+    assert keys(run_cache) == keys(run_cache)
+    assert len(set(keys(run_cache).values())) == 4
+
+def test_an_input_field_invalidates_only_the_tasks_depending_on_it(run_cache):
+    before = keys(run_cache)
+    after = keys(run_cache, inputs=dict(INPUTS, dietary_restrictions='vegan'))
+    # Tasks list the fields they read through their upstream tasks too, so the other plans are reused
+    assert changed(before, after) == ['data_ingestion', 'nutritionist']
+
+    after = keys(run_cache, tasks=make_tasks(), inputs=dict(INPUTS, unrelated='field'))
+    assert changed(before, after) == []
+
+def test_new_documents_invalidate_the_tasks_reading_them(run_cache):
+    before = keys(run_cache)
+    after = keys(run_cache, document_hashes=('report-1', 'report-2'))
+    assert changed(before, after) == ['fitness_coach', 'health_monitoring', 'nutritionist']
+
+def test_newly_ingested_health_data_invalidates_the_health_report_and_the_plans(run_cache):
+    before = keys(run_cache)
+    after = keys(run_cache, health_data_version=2)
+    assert changed(before, after) == ['fitness_coach', 'health_monitoring', 'nutritionist']
+
+def test_tasks_reading_health_data_are_not_cached_without_its_version(run_cache):
+    assert keys(run_cache, health_data_version=None) == dict(keys(run_cache), health_monitoring=None, fitness_coach=None, nutritionist=None)
+
+def test_a_changed_upstream_definition_invalidates_its_downstream_tasks(run_cache):
+    before = keys(run_cache)
+    after = keys(run_cache, tasks=make_tasks(health_monitoring='another goal'))
+    assert changed(before, after) == ['fitness_coach', 'health_monitoring', 'nutritionist']
+
+def test_stored_outputs_are_loaded_until_they_expire(run_cache):
+    key = keys(run_cache)['nutritionist']
+    assert run_cache.load(key) is None
+    run_cache.store(key, types.SimpleNamespace(raw='a nutrition plan', agent='nutritionist'))
+
+    assert run_cache.load(key)["raw"] == 'a nutrition plan'
+    run_cache.ttl = 0
+    time.sleep(0.01)
+    assert run_cache.load(key) is None
+    assert run_cache.stats == {"hits": 1, "misses": 2}
+
+def test_expired_entries_are_evicted(run_cache):
+    run_cache.store('old', types.SimpleNamespace(raw='old', agent='agent'))
+    path = run_cache.entry_path('old')
+    os.utime(path, (time.time() - 7200, time.time() - 7200))
+    run_cache.evict_expired()
+    assert not os.path.exists(path)
+
+def test_the_watermark_version_advances_with_ingested_samples(client):
+    database_url = os.environ['DATABASE_URL']
+    version = ingest_watermark_version(database_url)
+
+    client.post('/health-data', json=make_payload(samples=[('2024-08-30 07:15:00 +0000', 60)]))
+    assert ingest_watermark_version(database_url) == version + 1
+    # A duplicate payload writes nothing, so the cached plans stay valid
+    client.post('/health-data', json=make_payload(samples=[('2024-08-30 07:15:00 +0000', 60)]))
+    assert ingest_watermark_version(database_url) == version + 1
+
+def test_an_unreadable_watermark_has_no_version(tmp_path):
+    assert ingest_watermark_version(f"sqlite:///{tmp_path / 'missing.db'}") is None
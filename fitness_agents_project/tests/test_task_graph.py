@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from task_graph import run_task_graph
+
+class Task:
+    def __init__(self, description, context=None):
+        self.description = description
+        self.context = context
+
+class Recorder:
+    """
+    Executes tasks by sleeping briefly, recording when each one started and finished.
+    """
+    def __init__(self, delay=0.05, fail=()):
+        self.delay = delay
+        self.fail = fail
+        self.lock = threading.Lock()
+        self.events = []
+        self.active = 0
+        self.peak = 0
+
+    def __call__(self, task, task_index):
+        with self.lock:
+            self.events.append(('start', task.description))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+            self.events.append(('end', task.description))
+        if task.description in self.fail:
+            raise RuntimeError(f"{task.description} failed")
+
+    def index(self, event, description):
+        return self.events.index((event, description))
+
+def plan_tasks():
+    """
+    The crew's plan: ingestion feeds health monitoring, which feeds the three independent plans.
+    """
+    ingestion = Task('data_ingestion')
+    health = Task('health_monitoring', [ingestion])
+    wellbeing = Task('wellbeing', [ingestion, health])
+    fitness = Task('fitness_coach', [ingestion, health])
+    nutrition = Task('nutritionist', [ingestion, health])
+    return [ingestion, health, wellbeing, fitness, nutrition]
+
+def test_tasks_start_only_after_their_upstream_tasks_finish():
+    recorder = Recorder()
+    tasks = plan_tasks()
+    run_task_graph(tasks, recorder, max_workers=3)
+
+    for task in tasks:
+        for upstream in task.context or []:
+            assert recorder.index('end', upstream.description) < recorder.index('start', task.description)
+    assert len(recorder.events) == 2 * len(tasks)
+
+def test_independent_tasks_run_concurrently_within_the_worker_limit():
+    recorder = Recorder(delay=0.2)
+    start = time.perf_counter()
+    run_task_graph(plan_tasks(), recorder, max_workers=3)
+
+    # Two sequential steps and one parallel step instead of five sequential tasks
+    assert recorder.peak == 3
+    assert time.perf_counter() - start < 0.2 * 4
+
+def test_max_workers_bounds_the_tasks_running_at_once():
+    recorder = Recorder()
+    run_task_graph([Task(f'task {index}') for index in range(6)], recorder, max_workers=2)
+    assert recorder.peak == 2
+
+def test_tasks_are_executed_with_their_list_index():
+    tasks = plan_tasks()
+    indexes = {}
+    run_task_graph(tasks, lambda task, task_index: indexes.setdefault(task.description, task_index), max_workers=2)
+    assert indexes == {task.description: index for index, task in enumerate(tasks)}
+
+def test_a_failed_task_stops_its_downstream_tasks():
+    recorder = Recorder(fail=('health_monitoring',))
+    with pytest.raises(RuntimeError, match='health_monitoring failed'):
+        run_task_graph(plan_tasks(), recorder, max_workers=3)
+
+    assert [description for event, description in recorder.events if event == 'start'] == ['data_ingestion', 'health_monitoring']
+
+def test_upstream_tasks_outside_the_crew_are_rejected():
+    with pytest.raises(ValueError):
+        run_task_graph([Task('orphan', [Task('not in the crew')])], Recorder(), max_workers=2)
+
+def test_dependency_cycles_are_rejected():
+    first, second = Task('first'), Task('second')
+    first.context, second.context = [second], [first]
+    with pytest.raises(ValueError):
+        run_task_graph([first, second], Recorder(), max_workers=2)